@@ -0,0 +1,155 @@
+# analyzer_scheduler.py
+import time
+import threading
+from . import metrics
+
+
+class PlanificadorAnalizadores:
+    """
+    Reparte la CPU de una cámara entre sus analizadores según FPS objetivo y prioridad.
+
+    Cada analizador infiere como máximo a su FPS objetivo y solo uno de cada 'stride' frames;
+    en los demás se publica el frame con su último resultado dibujado.
+
+    La saturación se mide con la tasa lograda: por cada analizador con objetivo se cuentan
+    sus inferencias frente a las que debió hacer en el tiempo en que estuvo habilitado (el
+    filtro de movimiento no cuenta como atraso). Si un analizador a stride completo logra menos
+    de 'umbral_saturado' de su tasa esperada, se duplica el stride del analizador de menor
+    prioridad. Tras varios ajustes en que todos alcanzan su tasa se devuelve el stride,
+    empezando por el de mayor prioridad. Los analizadores sin objetivo (fps_objetivo None)
+    infieren todo lo que pueden y no se usan como señal de saturación.
+    """
+
+    def __init__(self, camara_id, analizadores, fps_captura=None, stride_max=8, intervalo_ajuste=1.0,
+                 umbral_saturado=0.8, umbral_holgado=0.95):
+        """
+        analizadores: {tipo: {"fps_objetivo": float o None, "prioridad": int}} (mayor prioridad = más
+        importante; fps_objetivo None: infiere todos los frames que permita su stride)
+        fps_captura: función que devuelve los FPS actuales de la fuente (limita el objetivo)
+        """
+        self.camara_id = camara_id
+        self.fps_captura = fps_captura
+        self.stride_max = stride_max
+        self.intervalo_ajuste = intervalo_ajuste
+        self.umbral_saturado = umbral_saturado
+        self.umbral_holgado = umbral_holgado
+        self._lock = threading.Lock()
+        self._ultimo_ajuste = time.time()
+        self._ajustes_holgados = 0
+        self._estado = {
+            tipo: {
+                "fps_objetivo": None if parametros["fps_objetivo"] is None else float(parametros["fps_objetivo"]),
+                "prioridad": parametros["prioridad"],
+                "stride": 1,
+                "frames": 0,
+                "proxima": 0.0,  # Instante desde el que puede volver a inferir (fps_objetivo)
+                "consulta": None,  # Última consulta y si estaba habilitado por el filtro de movimiento
+                "habilitado": False,
+                "credito": 0.0,  # Segundos habilitado desde el último ajuste
+                "inferencias": 0,  # Inferencias desde el último ajuste
+                "duracion": None,  # EMA del tiempo de inferencia (s)
+                "medidor": metrics.MedidorTasa(),
+            }
+            for tipo, parametros in analizadores.items()
+        }
+
+    def permitir(self, tipo, habilitado=True):
+        """
+        Indica si el analizador debe inferir sobre el frame actual (o solo redibujar). Se
+        consulta en cada frame; 'habilitado' es False si otro filtro (el de movimiento) ya
+        descartó el frame.
+        """
+        estado = self._estado.get(tipo)
+        if estado is None:
+            return habilitado
+        with self._lock:
+            now = time.time()
+            # Solo el tiempo habilitado cuenta para la tasa esperada
+            if estado["consulta"] is not None and habilitado and estado["habilitado"]:
+                estado["credito"] += now - estado["consulta"]
+            estado["consulta"] = now
+            estado["habilitado"] = habilitado
+            if not habilitado:
+                return False
+
+            estado["frames"] += 1
+            if estado["frames"] < estado["stride"] or now < estado["proxima"]:
+                return False
+            estado["frames"] = 0
+            if estado["fps_objetivo"] is not None:
+                intervalo = 1.0 / estado["fps_objetivo"]
+                # Agenda fija (no 'ahora + intervalo'), así la tasa no se redondea a la de los frames;
+                # si se atrasó más de un intervalo no se intenta recuperar
+                atraso = now - estado["proxima"]
+                estado["proxima"] = now + intervalo if atraso > intervalo else estado["proxima"] + intervalo
+            estado["inferencias"] += 1
+            return True
+
+    def registrar(self, tipo, duracion):
+        """
+        Registra la duración de una inferencia y reajusta los strides si corresponde.
+        """
+        estado = self._estado.get(tipo)
+        if estado is None:
+            return
+        with self._lock:
+            anterior = estado["duracion"]
+            estado["duracion"] = duracion if anterior is None else 0.8 * anterior + 0.2 * duracion
+            tasa = estado["medidor"].marcar()
+            if time.time() - self._ultimo_ajuste >= self.intervalo_ajuste:
+                self._ultimo_ajuste = time.time()
+                self._ajustar()
+        metrics.fijar(f"{self.camara_id}.{tipo}.inferencias_s", tasa)
+
+    def _tasa_esperada(self, estado):
+        # Inferencias por segundo que debería lograr con su objetivo y stride actuales
+        objetivo = estado["fps_objetivo"]
+        if self.fps_captura is not None:
+            captura = self.fps_captura()
+            if captura > 0:
+                return min(objetivo, captura / estado["stride"])
+        return objetivo
+
+    def _cumplimiento(self, estado):
+        # Fracción de la tasa esperada que logró desde el último ajuste (None: sin objetivo o
+        # sin tiempo habilitado suficiente para medirla)
+        if estado["fps_objetivo"] is None or estado["credito"] < 0.5 * self.intervalo_ajuste:
+            return None
+        return estado["inferencias"] / (estado["credito"] * self._tasa_esperada(estado))
+
+    def _ajustar(self):
+        por_prioridad = sorted(self._estado.items(), key=lambda item: -item[1]["prioridad"])
+        cumplimiento = {tipo: self._cumplimiento(e) for tipo, e in por_prioridad}
+        for e in self._estado.values():
+            e["credito"] = 0.0
+            e["inferencias"] = 0
+        medidos = [(tipo, e) for tipo, e in por_prioridad if e["stride"] == 1 and cumplimiento[tipo] is not None]
+
+        # ¿Algún analizador a stride completo no alcanza su tasa?
+        retrasado = next(((tipo, e) for tipo, e in medidos if cumplimiento[tipo] < self.umbral_saturado), None)
+        if retrasado is not None:
+            self._ajustes_holgados = 0
+            # Se sacrifica primero el de menor prioridad que aún pueda alargar su stride
+            for tipo, e in reversed(por_prioridad):
+                if e["prioridad"] < retrasado[1]["prioridad"] and e["stride"] < self.stride_max:
+                    e["stride"] = min(self.stride_max, e["stride"] * 2)
+                    print(f"[INFO] CPU saturada en {self.camara_id} ({retrasado[0]} logra el "
+                          f"{cumplimiento[retrasado[0]]:.0%} de su tasa): stride de {tipo} -> {e['stride']}")
+                    break
+        elif medidos and all(cumplimiento[tipo] >= self.umbral_holgado for tipo, _ in medidos):
+            # Hay margen: tras varios ajustes holgados se recupera el de mayor prioridad
+            self._ajustes_holgados += 1
+            if self._ajustes_holgados >= 3:
+                self._ajustes_holgados = 0
+                for tipo, e in por_prioridad:
+                    if e["stride"] > 1:
+                        e["stride"] //= 2
+                        print(f"[INFO] Hay margen de CPU en {self.camara_id}: stride de {tipo} -> {e['stride']}")
+                        break
+        else:
+            self._ajustes_holgados = 0
+
+        for tipo, e in self._estado.items():
+            metrics.fijar(f"{self.camara_id}.{tipo}.stride", e["stride"])
+            if cumplimiento[tipo] is not None:
+                metrics.fijar(f"{self.camara_id}.{tipo}.cumplimiento", cumplimiento[tipo])
@@ -1,24 +1,56 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
-import cv2
+from .event_hub import CentroEventos
+from .stream_hub import DifusorStream, EscaleraStream
+from . import config, metrics
 
-# Variables globales para las colas
-pose_queue = None
-object_queue = None
-face_queue = None
+# Cámaras registradas y anillos de frames en memoria compartida: rings[(camara_id, stream)]
+camaras = []
+rings = {}
 event_queue = None
 
-def set_queues(p_pose_queue, p_object_queue, p_face_queue, p_event_queue):
+# Métricas publicadas por los procesos (diccionario compartido)
+metricas = None
+
+def set_queues(p_camaras, p_rings, p_event_queue, p_metricas=None):
     """
-    Asigna las colas compartidas desde el proceso principal.
+    Asigna las cámaras, los anillos de frames y la cola de eventos desde el proceso principal.
     """
-    global pose_queue, object_queue, face_queue, event_queue
-    pose_queue = p_pose_queue
-    object_queue = p_object_queue
-    face_queue = p_face_queue
+    global camaras, rings, event_queue, metricas
+    camaras = p_camaras
+    rings = p_rings
     event_queue = p_event_queue
+    metricas = p_metricas
+
+# Difunde los eventos de la cola a todos los clientes de /ws/events
+centro_eventos = CentroEventos(config.EVENTOS_WS_CAPACIDAD, config.EVENTOS_WS_POLITICA, metrics.fijar)
+
+# Por (camara_id, stream, miniatura): escalera de calidades del stream completo o difusor de
+# la miniatura; cada variante se codifica una vez para todos sus visores
+difusores = {}
+
+# Hilos que codifican JPEG para todos los streams (fuera del bucle de asyncio)
+ejecutor_jpeg = ThreadPoolExecutor(config.STREAM_HILOS_JPEG, thread_name_prefix="jpeg")
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    metrics.set_destino(metricas, "fastapi")
+    metrics.iniciar_publicador(config.INTERVALO_METRICAS, imprimir=False)
+    if event_queue is not None:
+        centro_eventos.iniciar(event_queue)
+    retraso = asyncio.ensure_future(metrics.medir_retraso_bucle())
+    yield
+    retraso.cancel()
+    centro_eventos.detener()
+    ejecutor_jpeg.shutdown(wait=False)
 
-app = FastAPI()
+app = FastAPI(lifespan=ciclo_de_vida)
+
+# La vista DVR se sirve desde otro origen (Dash) y consulta /cameras
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["GET"])
 
 async def safe_close(websocket: WebSocket):
     """
@@ -30,98 +62,104 @@ async def safe_close(websocket: WebSocket):
         except Exception as e:
             print(f"[ERROR] Error al cerrar el WebSocket: {e}")
 
-@app.websocket("/ws/poses")
-async def pose_stream(websocket: WebSocket):
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Devuelve las últimas métricas publicadas por cada proceso (FPS por analizador, etc.).
+    """
+    if metricas is None:
+        return {}
+    return dict(metricas)
+
+@app.get("/cameras")
+async def get_cameras():
+    """
+    Devuelve las cámaras registradas (sin la fuente, que puede contener credenciales RTSP).
+    """
+    return [{"id": camara["id"], "nombre": camara["nombre"]} for camara in camaras]
+
+def obtener_difusor(camara_id, stream, miniatura=False):
+    clave = (camara_id, stream, miniatura)
+    if clave not in difusores:
+        ring = rings.get((camara_id, stream))
+        if ring is None:
+            return None
+        if miniatura:
+            # Variante reducida para las miniaturas: se escala y codifica una vez para todos
+            difusores[clave] = DifusorStream(
+                ring, f"{camara_id}.{stream}.thumb", registrar_metrica=metrics.fijar,
+                calidad=config.MINIATURA_CALIDAD_JPEG, ejecutor=ejecutor_jpeg,
+                ancho=config.MINIATURA_ANCHO, fps_max=config.MINIATURA_FPS,
+            )
+        else:
+            # Peldaños de calidad compartidos; cada cliente elige el suyo y baja si no le alcanza
+            difusores[clave] = EscaleraStream(
+                ring, f"{camara_id}.{stream}", config.STREAM_ESCALERA, registrar_metrica=metrics.fijar,
+                ejecutor=ejecutor_jpeg, ventana=config.STREAM_VENTANA_ENVIOS,
+                umbral_saltos=config.STREAM_UMBRAL_SALTOS, subir_tras=config.STREAM_SUBIR_S,
+            )
+    return difusores[clave]
+
+async def transmitir_camara(websocket: WebSocket, camara_id, stream, ruta, miniatura=False):
+    """
+    Envía al cliente cada frame nuevo del stream, codificado en JPEG una sola vez para todos.
+    En los streams completos el cliente puede pedir ancho, FPS y calidad máximos (EscaleraStream).
+    """
+    difusor = obtener_difusor(camara_id, stream, miniatura)
+    if difusor is None:
+        print(f"[WARNING] Stream inexistente solicitado: {ruta}")
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
-    print("[DEBUG] Cliente conectado a /ws/poses")
+    print(f"[DEBUG] Cliente conectado a {ruta}")
     try:
-        while True:
-            if pose_queue and not pose_queue.empty():
-                frame = pose_queue.get()
-                if frame is not None:
-                    _, buffer = cv2.imencode(".jpg", frame)
-                    if _:
-                        await websocket.send_bytes(buffer.tobytes())
-                        # print("[DEBUG] Frame de poses enviado al cliente.")
-                    else:
-                        print("[ERROR] Falló la codificación del frame de poses.")
-            # else:
-            #     print("[DEBUG] Cola de poses vacía.")
-            await asyncio.sleep(0.03)
+        await difusor.atender(websocket)
     except WebSocketDisconnect:
-        print("[INFO] Conexión cerrada por el cliente en /ws/poses")
+        print(f"[INFO] Conexión cerrada por el cliente en {ruta}")
     except Exception as e:
-        print(f"[ERROR] Error inesperado en /ws/poses: {e}")
+        print(f"[ERROR] Error inesperado en {ruta}: {e}")
     finally:
         await safe_close(websocket)
 
+# Rutas originales: streams de la primera cámara registrada
+@app.websocket("/ws/poses")
+async def pose_stream(websocket: WebSocket):
+    await transmitir_camara(websocket, camaras[0]["id"] if camaras else None, "poses", "/ws/poses")
+
 @app.websocket("/ws/objects")
 async def object_stream(websocket: WebSocket):
-    await websocket.accept()
-    print("[DEBUG] Cliente conectado a /ws/objects")
-    try:
-        while True:
-            if object_queue and not object_queue.empty():
-                frame = object_queue.get()
-                if frame is not None:
-                    _, buffer = cv2.imencode(".jpg", frame)
-                    if _:
-                        await websocket.send_bytes(buffer.tobytes())
-                        # print("[DEBUG] Frame de objetos enviado al cliente.")
-                    else:
-                        print("[ERROR] Falló la codificación del frame de objetos.")
-            # else:
-            #     print("[DEBUG] Cola de objetos vacía.")
-            await asyncio.sleep(0.03)
-    except WebSocketDisconnect:
-        print("[INFO] Conexión cerrada por el cliente en /ws/objects")
-    except Exception as e:
-        print(f"[ERROR] Error inesperado en /ws/objects: {e}")
-    finally:
-        await safe_close(websocket)
+    await transmitir_camara(websocket, camaras[0]["id"] if camaras else None, "objects", "/ws/objects")
 
 @app.websocket("/ws/faces")
 async def face_stream(websocket: WebSocket):
-    await websocket.accept()
-    print("[DEBUG] Cliente conectado a /ws/faces")
-    try:
-        while True:
-            if face_queue and not face_queue.empty():
-                frame = face_queue.get()
-                if frame is not None:
-                    _, buffer = cv2.imencode(".jpg", frame)
-                    if _:
-                        await websocket.send_bytes(buffer.tobytes())
-                        # print("[DEBUG] Frame de rostros enviado al cliente.")
-                    else:
-                        print("[ERROR] Falló la codificación del frame de rostros.")
-            # else:
-            #     print("[DEBUG] Cola de rostros vacía.")
-            await asyncio.sleep(0.03)
-    except WebSocketDisconnect:
-        print("[INFO] Conexión cerrada por el cliente en /ws/faces")
-    except Exception as e:
-        print(f"[ERROR] Error inesperado en /ws/faces: {e}")
-    finally:
-        await safe_close(websocket)
+    await transmitir_camara(websocket, camaras[0]["id"] if camaras else None, "faces", "/ws/faces")
 
 @app.websocket("/ws/events")
 async def event_stream(websocket: WebSocket):
     await websocket.accept()
     print("[DEBUG] Cliente conectado a /ws/events")
     try:
-        while True:
-            if event_queue and not event_queue.empty():
-                evento = event_queue.get()
-                if evento is not None:
-                    await websocket.send_json(evento)
-                    # print("[DEBUG] Evento enviado al cliente.")
-            # else:
-            #     print("[DEBUG] Cola de eventos vacía.")
-            await asyncio.sleep(0.03)
+        if await centro_eventos.atender(websocket):
+            print("[INFO] Conexión cerrada por el cliente en /ws/events")
+        else:
+            print("[WARNING] Cliente lento desconectado de /ws/events")
     except WebSocketDisconnect:
         print("[INFO] Conexión cerrada por el cliente en /ws/events")
     except Exception as e:
         print(f"[ERROR] Error inesperado en /ws/events: {e}")
     finally:
         await safe_close(websocket)
+
+# Miniaturas (tamaño y FPS reducidos). Se declaran antes de /ws/{camera_id}/{stream},
+# que también coincidiría con /ws/{stream}/thumb
+@app.websocket("/ws/{stream}/thumb")
+async def thumb_stream(websocket: WebSocket, stream: str):
+    await transmitir_camara(websocket, camaras[0]["id"] if camaras else None, stream, f"/ws/{stream}/thumb", True)
+
+@app.websocket("/ws/{camera_id}/{stream}/thumb")
+async def camera_thumb_stream(websocket: WebSocket, camera_id: str, stream: str):
+    await transmitir_camara(websocket, camera_id, stream, f"/ws/{camera_id}/{stream}/thumb", True)
+
+@app.websocket("/ws/{camera_id}/{stream}")
+async def camera_stream(websocket: WebSocket, camera_id: str, stream: str):
+    await transmitir_camara(websocket, camera_id, stream, f"/ws/{camera_id}/{stream}")
@@ -0,0 +1,138 @@
+# batch_inference.py
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+from . import metrics
+
+
+class PlanificadorLotes(threading.Thread):
+    """
+    Agrupa en un solo predict() los frames que envían varias cámaras al mismo modelo.
+
+    Cada cámara llama a inferir(frame) con su último frame y queda esperando. El planificador
+    toma la primera petición y espera como máximo 'espera_max' segundos (o hasta completar
+    'max_lote') a que lleguen las de las demás cámaras; luego ejecuta una única inferencia
+    por lotes y devuelve a cada cámara su resultado.
+
+    Una cámara nunca espera más de 'timeout' segundos: al vencer, o si el planificador se
+    detiene, inferir() lanza una excepción en lugar de bloquear el hilo de la cámara.
+    """
+
+    def __init__(self, nombre, predecir, max_lote=4, espera_max=0.015, timeout=10.0):
+        super().__init__(name=f"lotes-{nombre}", daemon=True)
+        self.nombre = nombre
+        self.predecir = predecir  # función: lista de frames -> lista de resultados
+        self.max_lote = max_lote
+        self.espera_max = espera_max
+        self.timeout = timeout
+        self._peticiones = queue.Queue()
+        self._detener = threading.Event()
+
+        # Tiempo medio (EMA) de una inferencia según el tamaño del lote
+        self.tiempo_por_lote = {}
+        self.medidor = metrics.MedidorTasa()
+
+    def detener(self):
+        self._detener.set()
+        self._fallar_pendientes()
+
+    def inferir(self, frame):
+        """
+        Encola el frame y espera el resultado de su lote (como máximo 'timeout' segundos).
+        """
+        if self._detener.is_set():
+            raise RuntimeError(f"El planificador de {self.nombre} está detenido")
+        futuro = Future()
+        self._peticiones.put((frame, futuro))
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutError:
+            futuro.cancel()  # Si aún no entró en un lote, el planificador la descarta
+            raise TimeoutError(f"Sin resultado de {self.nombre} tras {self.timeout:.0f} s") from None
+
+    def _fallar_pendientes(self):
+        # Las peticiones que quedaron en la cola no se van a atender
+        while True:
+            try:
+                _, futuro = self._peticiones.get_nowait()
+            except queue.Empty:
+                return
+            if futuro.set_running_or_notify_cancel():
+                futuro.set_exception(RuntimeError(f"El planificador de {self.nombre} se detuvo"))
+
+    def _tomar(self, timeout):
+        # Siguiente petición vigente (las canceladas por timeout se descartan)
+        limite = time.time() + timeout
+        while True:
+            frame, futuro = self._peticiones.get(timeout=max(0.0, limite - time.time()))
+            if futuro.set_running_or_notify_cancel():
+                return frame, futuro
+
+    def _recolectar(self):
+        try:
+            primera = self._tomar(0.5)
+        except queue.Empty:
+            return []
+        lote = [primera]
+        limite = time.time() + self.espera_max
+        while len(lote) < self.max_lote:
+            restante = limite - time.time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._tomar(restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def run(self):
+        try:
+            while not self._detener.is_set():
+                lote = self._recolectar()
+                if lote:
+                    self._inferir_lote(lote)
+        finally:
+            self._fallar_pendientes()
+
+    def _inferir_lote(self, lote):
+        frames = [frame for frame, _ in lote]
+        inicio = time.time()
+        try:
+            resultados = list(self.predecir(frames))
+        except Exception as e:
+            for _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        duracion = time.time() - inicio
+
+        if len(resultados) != len(lote):
+            print(f"[ERROR] {self.nombre}: predict devolvió {len(resultados)} resultados para {len(lote)} frames.")
+        for (_, futuro), resultado in zip(lote, resultados):
+            futuro.set_result(resultado)
+        for _, futuro in lote[len(resultados):]:
+            futuro.set_exception(RuntimeError(f"{self.nombre}: sin resultado para el frame en el lote"))
+
+        self._registrar(len(lote), duracion)
+
+    def ganancia(self):
+        """
+        Aceleración estimada frente a inferir frame por frame: tiempo(1) * n / tiempo(n)
+        para el lote más grande observado. None mientras no haya muestras de ambos tamaños.
+        """
+        if 1 not in self.tiempo_por_lote or len(self.tiempo_por_lote) < 2:
+            return None
+        n = max(self.tiempo_por_lote)
+        return self.tiempo_por_lote[1] * n / self.tiempo_por_lote[n]
+
+    def _registrar(self, tam, duracion):
+        anterior = self.tiempo_por_lote.get(tam)
+        self.tiempo_por_lote[tam] = duracion if anterior is None else 0.9 * anterior + 0.1 * duracion
+
+        for _ in range(tam):
+            tasa = self.medidor.marcar()
+        metrics.fijar(f"lotes.{self.nombre}.imagenes_s", tasa)
+        metrics.fijar(f"lotes.{self.nombre}.tam_lote", tam)
+        ganancia = self.ganancia()
+        if ganancia is not None:
+            metrics.fijar(f"lotes.{self.nombre}.ganancia", ganancia)
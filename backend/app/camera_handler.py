@@ -1,205 +1,398 @@
-import cv2
 import time
+import threading
 from datetime import datetime
-from .pose_detection import procesar_frame as procesar_poses
-from .object_detection import procesar_objetos
-from .face_detection import procesar_rostros
+from .pose_detection import procesar_frame as procesar_poses, redibujar_poses, regiones_cabeza
+from .object_detection import procesar_objetos, redibujar_objetos
+from .face_detection import procesar_rostros, redibujar_rostros, usar_regiones
+from . import face_detection, gallery_feed
 from .db_connection import get_db_connection
+from .event_writer import EscritorEventos
+from .event_spool import SpoolEventos
+from .capture import CapturaCamara
+from .camera_registry import abrir_fuente, es_archivo
+from .motion_gate import CompuertaMovimiento, DetectorMovimiento
+from .analyzer_scheduler import PlanificadorAnalizadores
+from .identity_store import AlmacenIdentidades
+from .event_debounce import FiltroEventos
+from . import config, metrics
 import os
 
-# Variables para colas compartidas
-pose_queue = None
-object_queue = None
-face_queue = None
+# Cola de eventos compartida
 event_queue = None
 
-# Historial de detecciones recientes (compartido)
+# Diccionario compartido donde se publica el historial de detecciones de este proceso
 detection_history = None
+# Diccionario compartido donde se publican las instantáneas de identidades de este proceso
 track_id_to_name = None
 
-# Flag compartido para recargar encodings
+# Nombre de cada track, local al proceso (sin llamadas al Manager por frame)
+identidades = AlmacenIdentidades(config.IDENTIDADES_TTL, config.IDENTIDADES_MAX)
+
+# Versión compartida de los encodings (Flask la incrementa si no puede publicar el cambio
+# en la cola de cambios; fuerza una recarga completa)
 reload_flag = None
+_version_encodings = 0
+_recarga_lock = threading.Lock()
+
+# Cola de cambios de la galería (altas, bajas, renombres) publicados por Flask
+cambios_galeria = None
+
+# Escritor en segundo plano de la tabla detecciones (tiene su propia conexión)
+escritor_eventos = None
+
+# guardar_eventos se llama desde varios hilos en modo concurrente
+eventos_lock = threading.Lock()
+
+# Filtros anti-rebote de eventos, locales al proceso, por parámetros de guardar_eventos
+filtros_eventos = {}
 
-# Conexión persistente a la base de datos
-db_connection = None
-db_cursor = None
+
+def obtener_filtro(tiempo_persistencia, tiempo_min_deteccion, tiempo_maximo_sin_detectar):
+    parametros = (tiempo_persistencia, tiempo_min_deteccion, tiempo_maximo_sin_detectar)
+    if parametros not in filtros_eventos:
+        filtros_eventos[parametros] = FiltroEventos(*parametros)
+    return filtros_eventos[parametros]
+
+
+def historial_detecciones():
+    """
+    Historial de todas las etiquetas del proceso, en el formato del antiguo detection_history.
+    """
+    historial = {}
+    for filtro in list(filtros_eventos.values()):
+        historial.update(filtro.instantanea())
+    metrics.fijar("eventos.etiquetas", len(historial))
+    return historial
 
 
-def set_queues(p_pose_queue, p_object_queue, p_face_queue, p_event_queue, p_detection_history,p_track_id_to_name, p_reload_flag):
+def set_queues(p_event_queue, p_detection_history,p_track_id_to_name, p_reload_flag, p_cambios_galeria=None):
     """
-    Configura las colas compartidas y el historial de detecciones.
+    Configura la cola de eventos, el historial de detecciones, el flag de recarga
+    y la cola de cambios de la galería.
     """
-    global pose_queue, object_queue, face_queue, event_queue, detection_history, track_id_to_name, reload_flag
-    pose_queue = p_pose_queue
-    object_queue = p_object_queue
-    face_queue = p_face_queue
+    global event_queue, detection_history, track_id_to_name, reload_flag, cambios_galeria
     event_queue = p_event_queue
     detection_history = p_detection_history
     track_id_to_name = p_track_id_to_name
     reload_flag = p_reload_flag
+    cambios_galeria = p_cambios_galeria
 
 
 
-def init_db_connection():
+def iniciar_escritor_eventos():
     """
-    Inicializa una conexión persistente a la base de datos.
+    Inicia el hilo que escribe los eventos en la base de datos por lotes
+    (con spool local mientras la base de datos no esté disponible).
     """
-    global db_connection, db_cursor
-    try:
-        db_connection = get_db_connection()
-        if db_connection:
-            db_cursor = db_connection.cursor()
-            print("[INFO] Conexión a la base de datos inicializada.")
-    except Exception as e:
-        print(f"[ERROR] No se pudo inicializar la conexión a la base de datos: {e}")
+    global escritor_eventos
+    spool = None
+    if config.EVENTOS_SPOOL:
+        # Un archivo por proceso: SQLite no se comparte entre escritores de distintos procesos
+        raiz, extension = os.path.splitext(config.EVENTOS_SPOOL)
+        spool = SpoolEventos(f"{raiz}-{metrics.nombre_proceso()}{extension}")
+    escritor_eventos = EscritorEventos(
+        get_db_connection, config.EVENTOS_LOTE_MAX, config.EVENTOS_ESPERA_MAX, config.EVENTOS_COLA_MAX,
+        spool=spool, max_reproducir=config.EVENTOS_REPRODUCIR_LOTE,
+    )
+    escritor_eventos.start()
+    print("[INFO] Escritor de eventos iniciado.")
 
 
-def close_db_connection():
+def detener_escritor_eventos():
     """
-    Cierra la conexión persistente a la base de datos.
+    Escribe los eventos pendientes y cierra la conexión del escritor.
     """
-    global db_connection, db_cursor
     try:
-        if db_cursor:
-            db_cursor.close()
-        if db_connection:
-            db_connection.close()
-        print("[INFO] Conexión a la base de datos cerrada.")
+        if escritor_eventos is not None:
+            escritor_eventos.detener()
+        print("[INFO] Escritor de eventos detenido.")
     except Exception as e:
-        print(f"[ERROR] No se pudo cerrar la conexión a la base de datos: {e}")
+        print(f"[ERROR] No se pudo detener el escritor de eventos: {e}")
 
-def guardar_eventos(eventos, tipo, tiempo_persistencia=5, min_ocurrencias=60, tiempo_maximo_sin_detectar=3):
+def guardar_eventos(eventos, tipo, tiempo_persistencia=5, tiempo_min_deteccion=config.EVENTOS_TIEMPO_MIN_DETECCION,
+                    tiempo_maximo_sin_detectar=3):
     """
     Guarda eventos en la base de datos y en la cola solo si cumplen los criterios:
     1. No se han guardado en los últimos 'tiempo_persistencia' segundos.
-    2. Han aparecido al menos 'min_ocurrencias' veces consecutivas antes de guardarse.
-    3. Reinicia las ocurrencias si pasa más de 'tiempo_maximo_sin_detectar' segundos desde la última detección.
+    2. Se vienen detectando desde hace al menos 'tiempo_min_deteccion' segundos (por tiempo, no
+       por frames: el filtro de movimiento y el stride reducen las inferencias por segundo).
+    3. Reinicia la racha si pasa más de 'tiempo_maximo_sin_detectar' segundos desde la última detección.
     """
-    global db_connection, db_cursor
+    with eventos_lock:
+        _guardar_eventos(eventos, tipo, tiempo_persistencia, tiempo_min_deteccion, tiempo_maximo_sin_detectar)
+
+
+def _guardar_eventos(eventos, tipo, tiempo_persistencia, tiempo_min_deteccion, tiempo_maximo_sin_detectar):
+    filtro = obtener_filtro(tiempo_persistencia, tiempo_min_deteccion, tiempo_maximo_sin_detectar)
     try:
         now = time.time()
 
         for evento in eventos:
             etiqueta = evento['etiqueta']
             confianza = evento['confianza']
-            # print(f"[DEBUG] Procesando evento: {etiqueta}, confianza: {confianza}, tipo: {tipo}")
-
-            # Si la detección está en el historial
-            if etiqueta in detection_history:
-                history = detection_history[etiqueta].copy()  # Copia el valor actual para modificarlo
-                last_saved = history['last_saved']
-                last_detected = history.get('last_detected', 0)
-                occurrences = history['occurrences']
-                last_detected_type = history['last_detected_type']
-
-                # Verificar si ha pasado mucho tiempo desde la última ocurrencia
-                if now - last_detected > tiempo_maximo_sin_detectar:
-                    # print(f"[DEBUG] Reiniciando ocurrencias para {etiqueta} por tiempo sin detectar.")
-                    occurrences = 1
-                elif tipo == last_detected_type:
-                    occurrences += 1
-                    # print(f"[DEBUG] Incrementando ocurrencias para {etiqueta}: {occurrences}")
-                else:
-                    # Reinicia las ocurrencias si cambió el tipo de evento
-                    occurrences = 1
-                    # print(f"[DEBUG] Reiniciando ocurrencias para {etiqueta} debido a cambio de tipo.")
-
-                # Actualiza los valores en el historial
-                history['occurrences'] = occurrences
-                history['last_detected'] = now
-                history['last_detected_type'] = tipo
-
-                # Condiciones para guardar:
-                if (now - last_saved > tiempo_persistencia and occurrences >= min_ocurrencias):
-                    print(f"[DEBUG] Cumple condiciones para guardar: {etiqueta}")
-                    query = """
-                        INSERT INTO detecciones (tipo, etiqueta, confianza, fecha)
-                        VALUES (%s, %s, %s, NOW())
-                    """
-                    db_cursor.execute(query, (tipo, etiqueta, confianza))
-
-                    # Coloca el evento en la cola
-                    if not event_queue.full():
-                        event_queue.put({
-                            "tipo": tipo,
-                            "etiqueta": etiqueta,
-                            "confianza": confianza,
-                            "fecha": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        })
-                        print(f"[DEBUG] Evento colocado en la cola: {etiqueta}")
-
-                    # Actualiza el tiempo de la última vez que se guardó
-                    history['last_saved'] = now
-                    # print(f"[DEBUG] Reiniciando ocurrencias para {etiqueta} después de guardar.")
-                    occurrences = 0  # Reinicia las ocurrencias después de guardar
-                # else:
-                #     print(f"[DEBUG] No cumple condiciones para guardar: {etiqueta}. "
-                #           f"Tiempo desde último guardado: {now - last_saved}, "
-                #           f"Ocurrencias: {occurrences}")
-
-                # Escribe nuevamente en el diccionario compartido
-                history['occurrences'] = occurrences
-                detection_history[etiqueta] = history
-
-            else:
-                # Si es la primera vez que se detecta, inicializa el historial
-                detection_history[etiqueta] = {
-                    "last_saved": 0,  # Última vez que se guardó
-                    "last_detected": now,  # Última vez que se detectó
-                    "occurrences": 1,  # Número de ocurrencias consecutivas
-                    "last_detected_type": tipo,  # Último tipo detectado
-                }
-                # print(f"[DEBUG] Inicializando historial para {etiqueta}")
-
-        # Realiza commit solo una vez por lote de eventos
-        db_connection.commit()
-        # print("[DEBUG] Cambios confirmados en la base de datos.")
+
+            if filtro.registrar(etiqueta, tipo, now):
+                print(f"[DEBUG] Cumple condiciones para guardar: {etiqueta}")
+                fecha = datetime.now()
+                # La escritura en la base de datos se hace por lotes en el hilo del escritor
+                escritor_eventos.encolar(tipo, etiqueta, confianza, fecha)
+
+                # Coloca el evento en la cola
+                if not event_queue.full():
+                    event_queue.put({
+                        "tipo": tipo,
+                        "etiqueta": etiqueta,
+                        "confianza": confianza,
+                        "fecha": fecha.strftime('%Y-%m-%d %H:%M:%S')
+                    })
+                    print(f"[DEBUG] Evento colocado en la cola: {etiqueta}")
     except Exception as e:
         print(f"[ERROR] No se pudo guardar el evento: {e}")
 
 
 
-def capturar_frames():
+class AnalizadorWorker(threading.Thread):
     """
-    Captura frames de la cámara y los procesa para detecciones.
+    Ejecuta un analizador (poses, objetos o rostros) en su propio hilo.
+    Toma siempre el frame más reciente y publica en su anillo a su propio ritmo.
+    Los frames en los que no infiere se publican con su último resultado dibujado.
     """
-    print("[INFO] Iniciando captura de frames...")
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    # base_dir = os.path.dirname(__file__)  # Directorio del archivo actual
-    # model_path = os.path.abspath(os.path.join(base_dir, "../videos/caminando.mp4"))
-    # cap = cv2.VideoCapture(model_path)
+
+    def __init__(self, tipo, procesar, redibujar, ring, fuente, camara_id="cam0", compuerta=None, planificador=None):
+        super().__init__(name=f"analizador-{camara_id}-{tipo}", daemon=True)
+        self.tipo = tipo
+        self.camara_id = camara_id
+        self.procesar = procesar
+        self.redibujar = redibujar
+        self.ring = ring
+        self.fuente = fuente
+        self.compuerta = compuerta
+        self.planificador = planificador
+        self.medidor = metrics.MedidorTasa()
+        self._detener = threading.Event()
+
+    def detener(self):
+        self._detener.set()
+
+    def run(self):
+        prev_time = time.time()
+        ultimo_id = 0
+        saltados = 0
+        while not self._detener.is_set():
+            frame_id, frame, timestamp = self.fuente.esperar(ultimo_id)
+            if frame is None or frame_id == ultimo_id:
+                continue
+            # Frames capturados mientras este analizador seguía ocupado con el anterior
+            if ultimo_id:
+                saltados += frame_id - ultimo_id - 1
+            ultimo_id = frame_id
+
+            # Se trabaja sobre copias: el frame capturado lo comparten todos los analizadores
+            if not debe_inferir(self.tipo, frame_id, frame, self.compuerta, self.planificador):
+                # Escena estática o stride: se publica el frame con el último resultado
+                self.ring.escribir(self.redibujar(frame.copy(), camara_id=self.camara_id))
+                continue
+
+            inicio = time.time()
+            try:
+                processed_frame, eventos, prev_time = self.procesar(frame.copy(), prev_time, identidades,
+                                                                    camara_id=self.camara_id)
+            except Exception as e:
+                print(f"[ERROR] Falló el analizador de {self.tipo}: {e}")
+                continue
+            if self.planificador is not None:
+                self.planificador.registrar(self.tipo, time.time() - inicio)
+
+            if processed_frame is not None:
+                self.ring.escribir(processed_frame)
+            if eventos:
+                guardar_eventos(eventos, self.tipo)
+
+            prefijo = f"{self.camara_id}.{self.tipo}"
+            metrics.fijar(f"{prefijo}.fps", self.medidor.marcar())
+            metrics.fijar(f"{prefijo}.frames_saltados", saltados)
+            metrics.fijar(f"{prefijo}.latencia_ms", (time.time() - timestamp) * 1000)
+
+
+def debe_inferir(tipo, frame_id, frame, compuerta, planificador):
+    """
+    Combina el filtro de movimiento y el planificador de strides. La compuerta registra la
+    decisión final, así un frame que el planificador rechaza cuenta como omitido.
+    """
+    inferir = compuerta is None or compuerta.permitir(tipo, frame_id, frame)
+    if planificador is not None:
+        # Se consulta en cada frame para que mida la tasa lograda solo en el tiempo habilitado
+        inferir = planificador.permitir(tipo, inferir)
+    if compuerta is not None:
+        compuerta.registrar(tipo, inferir)
+    return inferir
+
+
+def recargar_encodings_si_necesario():
+    """
+    Verifica si se debe recargar los encodings (por ejemplo, tras un nuevo registro).
+    Cada proceso de cámara compara la versión compartida con la última que cargó.
+    """
+    global _version_encodings
+    if reload_flag is None:
+        return
+    with _recarga_lock:
+        if reload_flag.value != _version_encodings:
+            _version_encodings = reload_flag.value
+            from .face_detection import initialize_encodings
+            initialize_encodings()
+            print("[INFO] Encodings recargados por actualización del flag.")
+
+
+def aplicar_cambios_galeria():
+    """
+    Hilo que aplica a la galería los cambios publicados por Flask, fila por fila, sin
+    detener el procesamiento de frames ni volver a leer la base de datos.
+    Comparte el lock con la recarga completa (y la reconciliación del snapshot) para no
+    aplicar cambios sobre una galería que está siendo reemplazada. Si un cambio no se puede
+    aplicar se recarga la galería completa desde la base de datos.
+    """
+    aplicados = 0
+    fallidos = 0
+    while True:
+        try:
+            cambio = cambios_galeria.get()
+        except (EOFError, OSError):
+            # El Manager se cerró: el sistema se está apagando
+            return
+        try:
+            with face_detection.galeria_lock:
+                if gallery_feed.aplicar(face_detection.galeria, cambio):
+                    aplicados += 1
+                    face_detection.marcar_snapshot_pendiente()
+                personas = len(face_detection.galeria)
+        except Exception as e:
+            fallidos += 1
+            metrics.fijar("galeria.cambios_fallidos", fallidos)
+            print(f"[ERROR] No se pudo aplicar el cambio de galería ({cambio.get('op')} id={cambio.get('id')}): {e}. "
+                  f"Recargando la galería completa.")
+            try:
+                face_detection.initialize_encodings()
+            except Exception as e:
+                print(f"[ERROR] Falló la recarga completa de la galería: {e}")
+            continue
+        print(f"[INFO] Galería actualizada ({cambio['op']} id={cambio['id']}): {personas} personas.")
+        metrics.fijar("galeria.cambios_aplicados", aplicados)
+        metrics.fijar("galeria.personas", personas)
+
+
+def iniciar_cambios_galeria():
+    if cambios_galeria is not None:
+        threading.Thread(target=aplicar_cambios_galeria, name="cambios-galeria", daemon=True).start()
+
+
+def iniciar_publicacion_estado():
+    """
+    Publica periódicamente el estado local que otros procesos pueden consultar
+    (identidades por track e historial de detecciones).
+    """
+    if track_id_to_name is not None:
+        identidades.iniciar_publicacion(track_id_to_name, metrics.nombre_proceso(), config.INTERVALO_IDENTIDADES)
+    if detection_history is not None:
+        metrics.publicar_periodicamente(detection_history, metrics.nombre_proceso(), historial_detecciones,
+                                        config.INTERVALO_IDENTIDADES, "publicar-historial")
+
+
+def capturar_frames(camara, pose_ring, object_ring, face_ring, inicializar=True):
+    """
+    Captura frames de una cámara del registro y los procesa para detecciones.
+    Con inicializar=False se asume que la conexión a la base de datos y el publicador
+    de métricas ya fueron iniciados (varias cámaras en el mismo proceso).
+    """
+    camara_id = camara["id"]
+    print(f"[INFO] Iniciando captura de frames de {camara_id} ({camara['fuente']})...")
+    cap = abrir_fuente(camara["fuente"])
     if not cap.isOpened():
-        print("[ERROR] No se pudo abrir la cámara.")
+        print(f"[ERROR] No se pudo abrir la cámara {camara_id}.")
         return
 
-    # Inicializar conexión a la base de datos
-    init_db_connection()
+    global _version_encodings
+    if inicializar:
+        if reload_flag is not None:
+            _version_encodings = reload_flag.value
+
+        # Escritura de eventos en la base de datos en segundo plano
+        iniciar_escritor_eventos()
+        metrics.iniciar_publicador(config.INTERVALO_METRICAS)
+        iniciar_cambios_galeria()
+        iniciar_publicacion_estado()
+
+    # Rostros solo en las cabezas que encuentra el modelo de poses
+    if config.ROSTROS_ROI_POSE:
+        usar_regiones(lambda cid: regiones_cabeza(cid, config.ROSTROS_ROI_MAX_EDAD))
+
+    analizadores = [
+        (procesar_poses, redibujar_poses, pose_ring, "poses"),
+        (procesar_objetos, redibujar_objetos, object_ring, "objetos"),
+        (procesar_rostros, redibujar_rostros, face_ring, "rostros")
+    ]
+
+    # Hilo de captura: conserva solo el frame más reciente
+    captura = CapturaCamara(
+        cap, nombre=camara_id, es_archivo=es_archivo(camara["fuente"]),
+        reabrir=lambda: abrir_fuente(camara["fuente"]),
+        reintento_min=config.CAPTURA_REINTENTO_MIN, reintento_max=config.CAPTURA_REINTENTO_MAX,
+    )
+    captura.start()
+
+    # Filtro de movimiento: limita las inferencias cuando la escena está quieta
+    compuerta = None
+    if config.MOVIMIENTO_ACTIVO:
+        compuerta = CompuertaMovimiento(
+            camara_id,
+            DetectorMovimiento(config.MOVIMIENTO_ANCHO, config.MOVIMIENTO_UMBRAL_PIXEL, config.MOVIMIENTO_FRACCION_MIN),
+            retencion=config.MOVIMIENTO_RETENCION,
+            intervalo_quieto=config.MOVIMIENTO_INTERVALO_QUIETO,
+        )
+
+    # FPS objetivo y prioridad por analizador; bajo saturación se alarga el stride de los menos prioritarios
+    planificador = None
+    if config.PLANIFICADOR_ACTIVO:
+        planificador = PlanificadorAnalizadores(
+            camara_id, config.ANALIZADORES, fps_captura=captura.medidor.tasa, stride_max=config.STRIDE_MAX
+        )
+
+    workers = []
+    if config.MODO_CONCURRENTE:
+        workers = [AnalizadorWorker(tipo, procesar, redibujar, ring, captura, camara_id, compuerta, planificador)
+                   for procesar, redibujar, ring, tipo in analizadores]
+        for worker in workers:
+            worker.start()
+        print("[INFO] Analizadores ejecutándose en modo concurrente.")
+
+    ultimo_id = 0
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("[WARNING] No se pudo leer el frame.")
+            recargar_encodings_si_necesario()
+
+            if workers:
+                # Los analizadores trabajan en sus propios hilos; aquí solo se atienden las recargas
                 time.sleep(0.1)
                 continue
 
-            # Verificar si se debe recargar los encodings (por ejemplo, tras un nuevo registro)
-            if reload_flag is not None and reload_flag.value:
-                from .face_detection import initialize_encodings
-                initialize_encodings()
-                reload_flag.value = False
-                print("[INFO] Encodings recargados por actualización del flag.")
+            frame_id, frame, _ = captura.esperar(ultimo_id)
+            if frame is None or frame_id == ultimo_id:
+                continue
+            ultimo_id = frame_id
 
             prev_time = time.time()  # Inicializar tiempo para calcular FPS
 
             # Procesar cada frame para detecciones
-            for procesar, queue, tipo in [
-                (procesar_poses, pose_queue, "poses"),
-                (procesar_objetos, object_queue, "objetos"),
-                (procesar_rostros, face_queue, "rostros")
-            ]:
-                processed_frame, eventos, prev_time = procesar(frame, prev_time,track_id_to_name)
-                if not queue.full() and processed_frame is not None:
-                    queue.put(processed_frame)
+            for procesar, redibujar, ring, tipo in analizadores:
+                if not debe_inferir(tipo, frame_id, frame, compuerta, planificador):
+                    ring.escribir(redibujar(frame.copy(), camara_id=camara_id))
+                    continue
+                inicio = time.time()
+                processed_frame, eventos, prev_time = procesar(frame, prev_time, identidades, camara_id=camara_id)
+                if planificador is not None:
+                    planificador.registrar(tipo, time.time() - inicio)
+                if processed_frame is not None:
+                    ring.escribir(processed_frame)
                 if eventos:
                     guardar_eventos(eventos, tipo)
 
@@ -207,6 +400,62 @@ def capturar_frames():
     except Exception as e:
         print(f"[ERROR] Error durante captura: {e}")
     finally:
-        cap.release()
-        close_db_connection()  # Cerrar conexión a la base de datos
-        print("[INFO] Cámara cerrada.")
+        for worker in workers:
+            worker.detener()
+        captura.detener()
+        captura.join(timeout=2)
+        captura.cap.release()
+        if inicializar:
+            detener_escritor_eventos()  # Escribe los eventos pendientes
+        print(f"[INFO] Cámara {camara_id} cerrada.")
+
+
+def capturar_camaras(camaras, rings):
+    """
+    Procesa todas las cámaras en este proceso, agrupando en lotes las inferencias YOLO
+    (poses y objetos) de las distintas cámaras.
+    """
+    from . import pose_detection, object_detection
+    from .batch_inference import PlanificadorLotes
+
+    global _version_encodings
+    if reload_flag is not None:
+        _version_encodings = reload_flag.value
+
+    iniciar_escritor_eventos()
+    metrics.iniciar_publicador(config.INTERVALO_METRICAS)
+    iniciar_cambios_galeria()
+    iniciar_publicacion_estado()
+
+    planificadores = [
+        PlanificadorLotes("poses", pose_detection.predecir_lote, config.BATCH_MAX_LOTE, config.BATCH_ESPERA_MAX,
+                          config.BATCH_TIMEOUT),
+        PlanificadorLotes("objetos", object_detection.predecir_lote, config.BATCH_MAX_LOTE, config.BATCH_ESPERA_MAX,
+                          config.BATCH_TIMEOUT),
+    ]
+    for planificador in planificadores:
+        planificador.start()
+    pose_detection.usar_planificador(planificadores[0])
+    object_detection.usar_planificador(planificadores[1])
+    print(f"[INFO] Inferencia por lotes entre {len(camaras)} cámaras "
+          f"(lote máx. {config.BATCH_MAX_LOTE}, espera máx. {config.BATCH_ESPERA_MAX * 1000:.0f} ms).")
+
+    hilos = [
+        threading.Thread(
+            target=capturar_frames,
+            args=(camara, rings[(camara["id"], "poses")], rings[(camara["id"], "objects")],
+                  rings[(camara["id"], "faces")], False),
+            name=f"camara-{camara['id']}",
+            daemon=True,
+        )
+        for camara in camaras
+    ]
+    try:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        for planificador in planificadores:
+            planificador.detener()
+        detener_escritor_eventos()
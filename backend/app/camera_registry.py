@@ -0,0 +1,69 @@
+# camera_registry.py
+"""
+Registro de cámaras del sistema.
+
+Las cámaras se definen en backend/cameras.json como una lista de objetos:
+    {"id": "entrada", "nombre": "Puerta principal", "fuente": 0}
+donde 'fuente' puede ser un índice USB (0, 1, ...), la ruta de un archivo de video
+(relativa a backend/) o una URL RTSP/HTTP.
+"""
+import os
+import json
+import cv2
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ARCHIVO_CAMARAS = os.path.join(base_dir, "cameras.json")
+
+# Se usa si no existe el archivo de configuración
+CAMARAS_POR_DEFECTO = [{"id": "cam0", "nombre": "Cámara 0", "fuente": 0}]
+
+# Nombre del stream en la URL del WebSocket -> tipo de detección interno
+STREAMS = {
+    "poses": "poses",
+    "objects": "objetos",
+    "faces": "rostros",
+}
+
+
+def cargar_camaras(ruta=ARCHIVO_CAMARAS):
+    """
+    Lee el registro de cámaras. Cada cámara debe tener 'id' único y 'fuente'.
+    """
+    if not os.path.exists(ruta):
+        print(f"[WARNING] No existe {ruta}, se usa la cámara por defecto.")
+        return [dict(c) for c in CAMARAS_POR_DEFECTO]
+
+    with open(ruta, "r", encoding="utf-8") as f:
+        camaras = json.load(f)
+
+    ids = set()
+    for camara in camaras:
+        if "id" not in camara or "fuente" not in camara:
+            raise ValueError(f"Cámara inválida en {ruta}: {camara}")
+        if camara["id"] in ids:
+            raise ValueError(f"Id de cámara repetido en {ruta}: {camara['id']}")
+        ids.add(camara["id"])
+        camara.setdefault("nombre", camara["id"])
+    return camaras
+
+
+def es_indice_usb(fuente):
+    return isinstance(fuente, int) or (isinstance(fuente, str) and fuente.isdigit())
+
+
+def es_archivo(fuente):
+    return not es_indice_usb(fuente) and "://" not in str(fuente)
+
+
+def abrir_fuente(fuente):
+    """
+    Abre la fuente de video de una cámara según su tipo.
+    """
+    if es_indice_usb(fuente):
+        if os.name == "nt":
+            return cv2.VideoCapture(int(fuente), cv2.CAP_DSHOW)
+        return cv2.VideoCapture(int(fuente))
+    if es_archivo(fuente):
+        ruta = fuente if os.path.isabs(fuente) else os.path.join(base_dir, fuente)
+        return cv2.VideoCapture(ruta)
+    return cv2.VideoCapture(fuente)
@@ -0,0 +1,118 @@
+# capture.py
+import cv2
+import time
+import threading
+from . import metrics
+
+
+class CapturaCamara(threading.Thread):
+    """
+    Lee frames de una fuente en su propio hilo y conserva solo el más reciente.
+
+    La inferencia nunca espera a cap.read() ni procesa frames acumulados en el buffer de OpenCV:
+    siempre toma el último frame capturado. Los frames sobrescritos sin que nadie los haya leído
+    se cuentan como descartados.
+
+    Con 'es_archivo=True' el video se lee a su velocidad nominal y se repite al terminar. En una
+    fuente en vivo (RTSP/USB) que deja de entregar frames, la fuente se libera y se vuelve a abrir
+    con 'reabrir' esperando entre intentos un tiempo que se duplica hasta 'reintento_max'.
+    """
+
+    def __init__(self, cap, nombre="camara", es_archivo=False, reabrir=None, reintento_min=0.5, reintento_max=30.0):
+        super().__init__(name=f"captura-{nombre}", daemon=True)
+        self.cap = cap
+        self.nombre = nombre
+        self.es_archivo = es_archivo
+        self.reabrir = reabrir
+        self.reintento_min = reintento_min
+        self.reintento_max = reintento_max
+        self._espera = reintento_min
+        self.intervalo = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if es_archivo else 0.0
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._id = 0
+        self._leido = True
+        self._detener = threading.Event()
+        self.medidor = metrics.MedidorTasa()
+
+        # Contadores expuestos como métricas
+        self.capturados = 0
+        self.descartados = 0
+        self.reconexiones = 0
+
+        # Mantener el buffer interno del driver lo más corto posible
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def detener(self):
+        self._detener.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def run(self):
+        siguiente = time.time()
+        while not self._detener.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.es_archivo:
+                    # Fin del video: volver al inicio
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    time.sleep(self.intervalo)
+                    continue
+                self._reconectar()
+                continue
+            self._espera = self.reintento_min
+
+            if self.intervalo:
+                siguiente += self.intervalo
+                espera = siguiente - time.time()
+                if espera > 0:
+                    time.sleep(espera)
+                else:
+                    siguiente = time.time()
+
+            with self._cond:
+                if not self._leido:
+                    self.descartados += 1
+                self._frame = frame
+                self._timestamp = time.time()
+                self._id += 1
+                self._leido = False
+                self.capturados += 1
+                self._cond.notify_all()
+
+            metrics.fijar(f"{self.nombre}.captura.fps", self.medidor.marcar())
+            metrics.fijar(f"{self.nombre}.captura.descartados", self.descartados)
+
+    def _reconectar(self):
+        # Un intento por llamada: la espera se duplica mientras no vuelva a leerse un frame, así
+        # una fuente caída no genera más de un aviso por intento
+        print(f"[WARNING] No se pudo leer el frame ({self.nombre}); reabriendo la fuente en {self._espera:.1f} s.")
+        if self.reabrir is not None:
+            self.cap.release()
+        if self._detener.wait(self._espera):
+            return
+        self._espera = min(self._espera * 2, self.reintento_max)
+        if self.reabrir is None:
+            return
+        try:
+            self.cap = self.reabrir()
+        except Exception as e:
+            print(f"[ERROR] Error al reabrir la fuente ({self.nombre}): {e}")
+            self.cap = cv2.VideoCapture()
+            return
+        if self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.reconexiones += 1
+            metrics.fijar(f"{self.nombre}.captura.reconexiones", self.reconexiones)
+            print(f"[INFO] Fuente reabierta ({self.nombre}).")
+
+    def esperar(self, ultimo_id, timeout=1.0):
+        """
+        Espera un frame más nuevo que 'ultimo_id' y devuelve (id, frame, timestamp).
+        El frame devuelto se comparte entre consumidores: no debe modificarse.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._id != ultimo_id or self._detener.is_set(), timeout)
+            self._leido = True
+            return self._id, self._frame, self._timestamp
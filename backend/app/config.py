@@ -0,0 +1,196 @@
+# config.py
+"""
+Parámetros de ejecución del backend de detección.
+"""
+import os
+
+# ---------------------------------------------------
+# Pipeline de análisis
+# ---------------------------------------------------
+# True: poses, objetos y rostros corren en hilos independientes sobre el mismo frame.
+# False: se procesan uno tras otro en el bucle de captura (modo original).
+MODO_CONCURRENTE = True
+
+# ---------------------------------------------------
+# Inferencia por lotes entre cámaras
+# ---------------------------------------------------
+# True: todas las cámaras corren en un solo proceso y YOLO (poses/objetos) infiere en lotes.
+# False: un proceso de detección por cámara.
+BATCH_ENTRE_CAMARAS = False
+# Máximo de frames por lote y espera máxima (s) para completar un lote
+BATCH_MAX_LOTE = 4
+BATCH_ESPERA_MAX = 0.015
+# Espera máxima (s) de una cámara por el resultado de su lote; al vencer se omite ese frame
+BATCH_TIMEOUT = 10.0
+
+# ---------------------------------------------------
+# Planificador de analizadores (FPS objetivo y prioridad)
+# ---------------------------------------------------
+PLANIFICADOR_ACTIVO = True
+# Mayor prioridad = se sacrifica al último cuando la CPU no alcanza; fps_objetivo None: sin
+# límite (a la tasa de la cámara)
+ANALIZADORES = {
+    "objetos": {"fps_objetivo": None, "prioridad": 3},  # Armas: siempre a tasa completa
+    "rostros": {"fps_objetivo": 10, "prioridad": 2},
+    "poses": {"fps_objetivo": 10, "prioridad": 1},
+}
+# Stride máximo (1 de cada N frames) al que se puede llevar a un analizador
+STRIDE_MAX = 8
+
+# ---------------------------------------------------
+# Rostros sobre regiones de cabeza (a partir de las poses)
+# ---------------------------------------------------
+# True: InsightFace detecta solo en las cabezas que encontró el modelo de poses
+ROSTROS_ROI_POSE = False
+# Cada cuántas inferencias se revisa igualmente el frame completo
+ROSTROS_ROI_CUADRO_COMPLETO_CADA = 10
+# Tamaño de entrada del detector para cada recorte (múltiplo de 32)
+ROSTROS_ROI_DET_SIZE = 160
+# Antigüedad máxima (s) de las poses para usarlas como regiones
+ROSTROS_ROI_MAX_EDAD = 0.5
+
+# ---------------------------------------------------
+# Caché de identidad por track
+# ---------------------------------------------------
+# True: un track ya reconocido reutiliza su nombre sin recalcular el embedding
+ROSTROS_CACHE_ACTIVO = True
+# Inferencias entre verificaciones de una identidad conocida
+ROSTROS_CACHE_REVERIFICAR = 30
+# Se verifica antes si la caja crece este factor o el score de detección sube este valor
+ROSTROS_CACHE_MEJORA_TAMANO = 1.5
+ROSTROS_CACHE_MEJORA_SCORE = 0.1
+# Reintentos de un track desconocido: espera (en inferencias) que se duplica hasta el máximo
+ROSTROS_CACHE_REINTENTO_MIN = 2
+ROSTROS_CACHE_REINTENTO_MAX = 32
+# IoU mínima para asociar un rostro a la última caja de un track
+ROSTROS_CACHE_IOU = 0.5
+
+# ---------------------------------------------------
+# Identidades por track (local a cada proceso de detección)
+# ---------------------------------------------------
+# Segundos sin ver un track antes de olvidar su nombre
+IDENTIDADES_TTL = 60.0
+# Máximo de tracks recordados (se descarta el usado hace más tiempo)
+IDENTIDADES_MAX = 10_000
+# Cada cuántos segundos se publica la instantánea (y el historial de detecciones) en los
+# diccionarios compartidos
+INTERVALO_IDENTIDADES = 5.0
+
+# ---------------------------------------------------
+# Galería de rostros conocidos
+# ---------------------------------------------------
+# Modelo que genera los embeddings (se guarda con cada persona) y su dimensión;
+# solo se cargan los embeddings del modelo actual
+MODELO_EMBEDDING = "buffalo_l"
+DIMENSION_EMBEDDING = 512
+# Filas por lectura al cargar la galería desde la base de datos
+GALERIA_FILAS_POR_LECTURA = 5000
+# Snapshot en disco de la galería: al arrancar se mapea en memoria y se reconcilia con la
+# base de datos en segundo plano (el reconocimiento funciona aunque MySQL esté lento o caído)
+GALERIA_SNAPSHOT = True
+GALERIA_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "galeria_snapshot")
+# Con cambios incrementales pendientes, el snapshot se reescribe cada N segundos
+GALERIA_SNAPSHOT_INTERVALO = 30.0
+# Espera (s) entre reintentos de la reconciliación con la base de datos; se duplica hasta el máximo
+GALERIA_RECONCILIAR_REINTENTO_MIN = 2.0
+GALERIA_RECONCILIAR_REINTENTO_MAX = 60.0
+# "exacto": compara contra todas las personas; "ivf": búsqueda aproximada por listas invertidas
+GALERIA_INDICE = "exacto"
+# Número de listas del IVF (None: 4 * sqrt(personas))
+GALERIA_IVF_LISTAS = None
+# Listas que se revisan por consulta (más listas = mejor recall, más latencia)
+GALERIA_IVF_NPROBE = 16
+# Por debajo de este número de personas el IVF usa la búsqueda exacta
+GALERIA_IVF_MIN_PERSONAS = 2000
+
+# ---------------------------------------------------
+# Filtro de movimiento
+# ---------------------------------------------------
+# Omite inferencias mientras la escena está quieta
+MOVIMIENTO_ACTIVO = True
+# Ancho (px) del frame reducido sobre el que se compara contra el fondo
+MOVIMIENTO_ANCHO = 160
+# Diferencia mínima de intensidad por píxel y fracción de píxeles que deben cambiar
+MOVIMIENTO_UMBRAL_PIXEL = 25
+MOVIMIENTO_FRACCION_MIN = 0.003
+# Segundos que se sigue procesando a tasa completa después del último movimiento
+MOVIMIENTO_RETENCION = 2.0
+# Sin movimiento, cada analizador corre como máximo una vez cada N segundos (None: nunca)
+MOVIMIENTO_INTERVALO_QUIETO = 2.0
+
+# ---------------------------------------------------
+# Captura
+# ---------------------------------------------------
+# Espera (s) antes de reabrir una fuente en vivo que dejó de entregar frames; se duplica en
+# cada intento fallido hasta el máximo
+CAPTURA_REINTENTO_MIN = 0.5
+CAPTURA_REINTENTO_MAX = 30.0
+
+# ---------------------------------------------------
+# Transporte de frames (memoria compartida)
+# ---------------------------------------------------
+# Slots por anillo y tamaño máximo de frame; los frames más grandes se reducen al publicarse
+BUS_SLOTS = 4
+BUS_MAX_ALTO = 1080
+BUS_MAX_ANCHO = 1920
+
+# ---------------------------------------------------
+# Streams de video (FastAPI)
+# ---------------------------------------------------
+# Calidad JPEG de los frames enviados a los visores (0-100; OpenCV usa 95 por defecto)
+STREAM_CALIDAD_JPEG = 80
+# Hilos que codifican JPEG para todos los streams
+STREAM_HILOS_JPEG = 2
+# Escalera de congestión de los streams completos, de mayor a menor costo (ancho/fps None: los
+# del original). Un cliente puede enviar {"ancho", "fps", "calidad"} como texto JSON: la
+# calidad elige su peldaño inicial y el ancho y los FPS son topes que se aplican sobre
+# cualquier peldaño (redondeados a los valores de la escalera). Se baja de peldaño solo si su
+# conexión no alcanza. Cada variante se codifica una vez para todos sus clientes
+STREAM_ESCALERA = [
+    {"ancho": None, "fps": None, "calidad": STREAM_CALIDAD_JPEG},
+    {"ancho": 1280, "fps": None, "calidad": 75},
+    {"ancho": 640, "fps": None, "calidad": 65},
+    {"ancho": 640, "fps": 10, "calidad": 60},
+    {"ancho": 320, "fps": 5, "calidad": 50},
+]
+# Se baja un peldaño si en STREAM_VENTANA_ENVIOS envíos el cliente saltó más de esta
+# proporción de frames; se vuelve a subir tras STREAM_SUBIR_S segundos sin saltos
+STREAM_VENTANA_ENVIOS = 30
+STREAM_UMBRAL_SALTOS = 0.3
+STREAM_SUBIR_S = 10.0
+# Miniaturas (/ws/{stream}/thumb): ancho máximo en px, FPS y calidad JPEG
+MINIATURA_ANCHO = 160
+MINIATURA_FPS = 5
+MINIATURA_CALIDAD_JPEG = 60
+
+# ---------------------------------------------------
+# Escritura de eventos (tabla detecciones)
+# ---------------------------------------------------
+# Segundos que una etiqueta debe detectarse de forma sostenida antes de generar un evento
+# (equivale a las 60 detecciones consecutivas de antes a 30 FPS)
+EVENTOS_TIEMPO_MIN_DETECCION = 2.0
+# Los eventos se insertan por lotes desde un hilo en segundo plano: un lote se escribe al
+# juntar EVENTOS_LOTE_MAX eventos o EVENTOS_ESPERA_MAX segundos después del primero
+EVENTOS_LOTE_MAX = 200
+EVENTOS_ESPERA_MAX = 1.0
+# Eventos en memoria esperando escritura; si se llena se descartan
+EVENTOS_COLA_MAX = 10_000
+# Spool SQLite donde se guardan los eventos mientras MySQL no está disponible; se reproducen
+# al reconectar (None: sin spool, el lote se reintenta en memoria)
+EVENTOS_SPOOL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "eventos_spool.db")
+# Eventos por escritura al reproducir el spool
+EVENTOS_REPRODUCIR_LOTE = 5000
+
+# ---------------------------------------------------
+# Difusión de eventos a los dashboards (/ws/events)
+# ---------------------------------------------------
+# Eventos en espera por cliente y qué hacer si un cliente lento lo llena:
+# "descartar_antiguos", "descartar_nuevos" o "desconectar"
+EVENTOS_WS_CAPACIDAD = 100
+EVENTOS_WS_POLITICA = "descartar_antiguos"
+
+# ---------------------------------------------------
+# Métricas
+# ---------------------------------------------------
+# Cada cuántos segundos se publican (e imprimen) las métricas del proceso
+INTERVALO_METRICAS = 5.0
@@ -1,4 +1,9 @@
 import mysql.connector
+from . import config
+
+# Las migraciones se verifican una sola vez por proceso
+_personas_migrada = False
+_detecciones_migrada = False
 
 def get_db_connection():
     try:
@@ -23,22 +28,27 @@ def ensure_tables_exist(connection):
             CREATE TABLE IF NOT EXISTS personas (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 persona VARCHAR(255) NOT NULL,
-                encoding TEXT NOT NULL,
+                embedding BLOB NOT NULL, -- float32 crudo (DIMENSION_EMBEDDING * 4 bytes)
+                modelo VARCHAR(64) NOT NULL, -- modelo que generó el embedding
                 estado CHAR(1) DEFAULT 'A',
                 fecha DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        migrar_personas(cursor)
         
         # Crear tabla para detecciones si no existe
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS detecciones (
                 id INT AUTO_INCREMENT PRIMARY KEY,
+                uid CHAR(32) NULL, -- identificador del evento (evita duplicados al reproducir el spool)
                 tipo VARCHAR(50) NOT NULL,
                 etiqueta VARCHAR(255) NOT NULL,
                 confianza FLOAT NOT NULL,
-                fecha DATETIME DEFAULT CURRENT_TIMESTAMP
+                fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY uq_detecciones_uid (uid)
             )
         """)
+        migrar_detecciones(cursor)
 
     # Crear tabla usuarios si no existe
         cursor.execute("""
@@ -58,3 +68,56 @@ def ensure_tables_exist(connection):
         cursor.close()
     except mysql.connector.Error as err:
         print(f"Error al asegurar las tablas: {err}")
+
+def migrar_personas(cursor):
+    """
+    Migra las tablas creadas con la columna 'encoding' (base64 en TEXT) al formato binario:
+    agrega 'embedding' (BLOB float32) y 'modelo', convierte las filas existentes en el servidor
+    (FROM_BASE64) y deja 'encoding' como columna opcional. Es idempotente.
+    """
+    global _personas_migrada
+    if _personas_migrada:
+        return
+
+    cursor.execute("SHOW COLUMNS FROM personas")
+    columnas = {fila[0]: fila for fila in cursor.fetchall()}
+    if "embedding" not in columnas:
+        cursor.execute("""
+            ALTER TABLE personas
+                ADD COLUMN embedding BLOB NULL AFTER persona,
+                ADD COLUMN modelo VARCHAR(64) NULL AFTER embedding
+        """)
+        print("[INFO] Tabla personas: columnas embedding y modelo agregadas.")
+    if "encoding" in columnas:
+        cursor.execute("""
+            UPDATE personas SET embedding = FROM_BASE64(encoding), modelo = %s
+            WHERE embedding IS NULL AND encoding IS NOT NULL
+        """, (config.MODELO_EMBEDDING,))
+        if cursor.rowcount:
+            print(f"[INFO] Tabla personas: {cursor.rowcount} encodings migrados a formato binario.")
+        if columnas["encoding"][2] == "NO":
+            # Los registros nuevos ya no escriben la columna base64
+            cursor.execute("ALTER TABLE personas MODIFY encoding TEXT NULL")
+
+    _personas_migrada = True
+
+def migrar_detecciones(cursor):
+    """
+    Agrega a detecciones la columna 'uid' con índice único, que permite reescribir eventos
+    (INSERT IGNORE) sin duplicarlos. Las filas anteriores quedan con uid NULL. Es idempotente.
+    """
+    global _detecciones_migrada
+    if _detecciones_migrada:
+        return
+
+    cursor.execute("SHOW COLUMNS FROM detecciones")
+    columnas = {fila[0] for fila in cursor.fetchall()}
+    if "uid" not in columnas:
+        cursor.execute("""
+            ALTER TABLE detecciones
+                ADD COLUMN uid CHAR(32) NULL AFTER id,
+                ADD UNIQUE KEY uq_detecciones_uid (uid)
+        """)
+        print("[INFO] Tabla detecciones: columna uid agregada.")
+
+    _detecciones_migrada = True
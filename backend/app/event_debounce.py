@@ -0,0 +1,82 @@
+# event_debounce.py
+import threading
+
+
+class HistorialDeteccion:
+    """
+    Estado de una etiqueta para decidir cuándo persistir su evento.
+    """
+    __slots__ = ("last_saved", "last_detected", "first_detected", "occurrences", "last_detected_type")
+
+    def __init__(self, last_detected, tipo):
+        self.last_saved = 0.0  # Última vez que se guardó
+        self.last_detected = last_detected  # Última vez que se detectó
+        self.first_detected = last_detected  # Inicio de la racha actual de detecciones
+        self.occurrences = 1  # Número de ocurrencias consecutivas
+        self.last_detected_type = tipo  # Último tipo detectado
+
+
+class FiltroEventos:
+    """
+    Filtro anti-rebote de eventos, local al proceso de detección (antes vivía en un
+    diccionario del Manager: dos llamadas entre procesos por etiqueta y frame).
+
+    Un evento se persiste solo si:
+    1. No se guardó en los últimos 'tiempo_persistencia' segundos.
+    2. Se viene detectando (del mismo tipo) desde hace al menos 'tiempo_min_deteccion'
+       segundos, con al menos 'min_ocurrencias' ocurrencias.
+    3. La racha se reinicia si pasan más de 'tiempo_maximo_sin_detectar' segundos sin verlo.
+
+    La condición es por tiempo y no por número de frames: un analizador que infiere pocas
+    veces por segundo (escena quieta, stride del planificador) confirma el evento en el mismo
+    tiempo que uno a tasa completa.
+    """
+
+    def __init__(self, tiempo_persistencia=5, tiempo_min_deteccion=2.0, tiempo_maximo_sin_detectar=3,
+                 min_ocurrencias=2):
+        self.tiempo_persistencia = tiempo_persistencia
+        self.tiempo_min_deteccion = tiempo_min_deteccion
+        self.min_ocurrencias = min_ocurrencias
+        self.tiempo_maximo_sin_detectar = tiempo_maximo_sin_detectar
+        self._historial = {}  # etiqueta -> HistorialDeteccion
+        self._lock = threading.Lock()
+
+    def registrar(self, etiqueta, tipo, now):
+        """
+        Registra una ocurrencia de 'etiqueta' y devuelve True si el evento debe guardarse.
+        """
+        with self._lock:
+            historial = self._historial.get(etiqueta)
+            if historial is None:
+                # Primera vez que se detecta
+                self._historial[etiqueta] = HistorialDeteccion(now, tipo)
+                return False
+
+            if now - historial.last_detected > self.tiempo_maximo_sin_detectar or tipo != historial.last_detected_type:
+                # Se dejó de ver o cambió el tipo de evento: empieza una racha nueva
+                historial.occurrences = 1
+                historial.first_detected = now
+            else:
+                historial.occurrences += 1
+            historial.last_detected = now
+            historial.last_detected_type = tipo
+
+            if (now - historial.last_saved > self.tiempo_persistencia
+                    and now - historial.first_detected >= self.tiempo_min_deteccion
+                    and historial.occurrences >= self.min_ocurrencias):
+                historial.last_saved = now
+                # La racha se reinicia después de guardar
+                historial.occurrences = 0
+                historial.first_detected = now
+                return True
+            return False
+
+    def instantanea(self):
+        """
+        Copia del estado en el formato del antiguo detection_history: {etiqueta: {...}}.
+        """
+        with self._lock:
+            return {
+                etiqueta: {campo: getattr(historial, campo) for campo in HistorialDeteccion.__slots__}
+                for etiqueta, historial in self._historial.items()
+            }
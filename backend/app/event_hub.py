@@ -0,0 +1,149 @@
+# event_hub.py
+import json
+import queue
+import asyncio
+import threading
+
+# Qué hacer cuando el buffer de un cliente lento está lleno
+DESCARTAR_ANTIGUOS = "descartar_antiguos"  # Se pierde el evento más viejo del cliente
+DESCARTAR_NUEVOS = "descartar_nuevos"  # Se pierde el evento que acaba de llegar
+DESCONECTAR = "desconectar"  # Se cierra la conexión del cliente
+
+POLITICAS = (DESCARTAR_ANTIGUOS, DESCARTAR_NUEVOS, DESCONECTAR)
+
+
+class Suscriptor:
+    """
+    Buffer acotado de eventos (ya serializados) de un cliente. None indica fin de la conexión.
+    """
+
+    def __init__(self, capacidad):
+        self.cola = asyncio.Queue(maxsize=capacidad)
+        self.descartados = 0
+
+    def cerrar(self):
+        while not self.cola.empty():
+            self.cola.get_nowait()
+        self.cola.put_nowait(None)
+
+
+class CentroEventos:
+    """
+    Difunde cada evento de la cola entre procesos a todos los clientes conectados.
+
+    Un único hilo lector consume la cola (antes cada WebSocket hacía get() y un evento llegaba
+    solo a uno de los clientes) y entrega cada evento al bucle de asyncio con
+    call_soon_threadsafe. Allí se serializa una sola vez y se copia al buffer de cada
+    suscriptor; si un buffer está lleno se aplica 'politica' (ver POLITICAS), de modo que un
+    cliente lento no frena a los demás ni hace crecer la memoria.
+
+    'registrar_metrica(clave, valor)' recibe los contadores del centro (p. ej. metrics.fijar).
+    """
+
+    def __init__(self, capacidad_cliente=100, politica=DESCARTAR_ANTIGUOS, registrar_metrica=None):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconocida: {politica}")
+        self.capacidad_cliente = capacidad_cliente
+        self.politica = politica
+        self.registrar_metrica = registrar_metrica
+        self._suscriptores = set()
+        self._loop = None
+        self._detener = threading.Event()
+        self.recibidos = 0
+        self.descartados = 0
+        self.desconectados = 0
+
+    def iniciar(self, cola, loop=None):
+        """
+        Lanza el hilo lector de 'cola'. Debe llamarse desde el bucle de asyncio (o pasarlo en 'loop').
+        """
+        self._loop = loop or asyncio.get_running_loop()
+        self._detener.clear()
+        hilo = threading.Thread(target=self._leer, args=(cola,), name="lector-eventos", daemon=True)
+        hilo.start()
+        return hilo
+
+    def detener(self):
+        self._detener.set()
+
+    def _leer(self, cola):
+        while not self._detener.is_set():
+            try:
+                evento = cola.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError) as e:
+                print(f"[ERROR] Se perdió la cola de eventos: {e}")
+                break
+            if evento is None:
+                continue
+            # Misma serialización que websocket.send_json
+            texto = json.dumps(evento, separators=(",", ":"), ensure_ascii=False)
+            try:
+                self._loop.call_soon_threadsafe(self._difundir, texto)
+            except RuntimeError:
+                break  # El bucle de asyncio ya se cerró
+
+    def _difundir(self, texto):
+        self.recibidos += 1
+        for suscriptor in list(self._suscriptores):
+            if suscriptor.cola.full():
+                suscriptor.descartados += 1
+                self.descartados += 1
+                if self.politica == DESCONECTAR:
+                    self._expulsar(suscriptor)
+                    continue
+                if self.politica == DESCARTAR_NUEVOS:
+                    continue
+                suscriptor.cola.get_nowait()
+            suscriptor.cola.put_nowait(texto)
+        self._medir()
+
+    def _expulsar(self, suscriptor):
+        self._suscriptores.discard(suscriptor)
+        suscriptor.cerrar()
+        self.desconectados += 1
+
+    def suscribir(self):
+        suscriptor = Suscriptor(self.capacidad_cliente)
+        self._suscriptores.add(suscriptor)
+        self._medir()
+        return suscriptor
+
+    def desuscribir(self, suscriptor):
+        self._suscriptores.discard(suscriptor)
+        self._medir()
+
+    def _medir(self):
+        if self.registrar_metrica is None:
+            return
+        self.registrar_metrica("eventos_ws.clientes", len(self._suscriptores))
+        self.registrar_metrica("eventos_ws.recibidos", self.recibidos)
+        self.registrar_metrica("eventos_ws.descartados", self.descartados)
+        self.registrar_metrica("eventos_ws.desconectados", self.desconectados)
+
+    async def atender(self, websocket):
+        """
+        Envía al WebSocket (ya aceptado) los eventos hasta que el cliente se desconecte
+        o la política lo expulse. Devuelve False si fue expulsado por lento.
+        """
+        suscriptor = self.suscribir()
+        # Detecta el cierre del cliente aunque no lleguen eventos
+        cierre = asyncio.ensure_future(_esperar_cierre(websocket))
+        cierre.add_done_callback(lambda _: suscriptor.cerrar())
+        try:
+            while True:
+                texto = await suscriptor.cola.get()
+                if texto is None:
+                    return cierre.done()
+                await websocket.send_text(texto)
+        finally:
+            cierre.cancel()
+            self.desuscribir(suscriptor)
+
+
+async def _esperar_cierre(websocket):
+    while True:
+        mensaje = await websocket.receive()
+        if mensaje["type"] == "websocket.disconnect":
+            return
@@ -0,0 +1,75 @@
+# event_spool.py
+import os
+import sqlite3
+
+
+class SpoolEventos:
+    """
+    Cola durable de eventos en un archivo SQLite local (modo WAL), para no perder detecciones
+    mientras MySQL no está disponible.
+
+    Cada evento se guarda con su uid; al reproducirse se inserta en MySQL con INSERT IGNORE
+    sobre la columna única detecciones.uid y solo después se borra del spool. Si el proceso
+    cae entre el commit en MySQL y el borrado, la siguiente reproducción no duplica nada.
+
+    La conexión SQLite pertenece al hilo que llama a abrir() (el escritor de eventos).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._conexion = None
+
+    def abrir(self):
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._conexion = sqlite3.connect(self.ruta)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=FULL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS eventos (
+                orden INTEGER PRIMARY KEY AUTOINCREMENT,
+                uid TEXT NOT NULL UNIQUE,
+                tipo TEXT NOT NULL,
+                etiqueta TEXT NOT NULL,
+                confianza REAL NOT NULL,
+                fecha TEXT NOT NULL
+            )
+        """)
+        self._conexion.commit()
+        return self
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def agregar(self, eventos):
+        """
+        Guarda eventos (uid, tipo, etiqueta, confianza, fecha) en una sola transacción.
+        """
+        with self._conexion:
+            self._conexion.executemany(
+                "INSERT OR IGNORE INTO eventos (uid, tipo, etiqueta, confianza, fecha) VALUES (?, ?, ?, ?, ?)",
+                [(uid, tipo, etiqueta, confianza, _texto_fecha(fecha))
+                 for uid, tipo, etiqueta, confianza, fecha in eventos],
+            )
+
+    def leer(self, maximo):
+        """
+        Los 'maximo' eventos más antiguos, en el mismo formato en que se agregaron.
+        """
+        return self._conexion.execute(
+            "SELECT uid, tipo, etiqueta, confianza, fecha FROM eventos ORDER BY orden LIMIT ?", (maximo,)
+        ).fetchall()
+
+    def eliminar(self, uids):
+        with self._conexion:
+            self._conexion.executemany("DELETE FROM eventos WHERE uid = ?", [(uid,) for uid in uids])
+
+    def pendientes(self):
+        return self._conexion.execute("SELECT COUNT(*) FROM eventos").fetchone()[0]
+
+
+def _texto_fecha(fecha):
+    return fecha if isinstance(fecha, str) else fecha.strftime('%Y-%m-%d %H:%M:%S')
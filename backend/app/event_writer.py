@@ -0,0 +1,204 @@
+# event_writer.py
+import time
+import uuid
+import queue
+import threading
+from . import metrics
+
+# INSERT IGNORE sobre la columna única uid: reescribir un evento ya guardado no lo duplica
+INSERTAR_DETECCION = """
+    INSERT IGNORE INTO detecciones (uid, tipo, etiqueta, confianza, fecha)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+class EscritorEventos(threading.Thread):
+    """
+    Escribe en la tabla detecciones desde un hilo propio, para que el bucle de captura nunca
+    espere a la base de datos.
+
+    encolar() solo deja el evento en una cola en memoria (si está llena el evento se descarta
+    y se cuenta). El hilo junta hasta 'max_lote' eventos o espera como máximo 'espera_max'
+    segundos desde el primero, y los inserta con un solo executemany() y un commit.
+    La fecha de cada evento se toma al detectarlo, no al escribirlo.
+
+    La conexión es propia del hilo: 'conectar' devuelve una conexión nueva (o None) y se
+    vuelve a intentar cada 'reintento' segundos si una escritura falla. Con 'spool'
+    (SpoolEventos) los lotes que no se pueden escribir se guardan en disco y se reproducen en
+    bloques de 'max_reproducir' al reconectar; mientras quede algo en el spool los lotes nuevos
+    también pasan por él para conservar el orden. Sin spool el lote que falló se reintenta.
+    """
+
+    def __init__(self, conectar, max_lote=200, espera_max=1.0, capacidad=10_000, reintento=2.0,
+                 spool=None, max_reproducir=5000):
+        super().__init__(name="escritor-eventos", daemon=True)
+        self.conectar = conectar
+        self.max_lote = max_lote
+        self.espera_max = espera_max
+        self.reintento = reintento
+        self.spool = spool
+        self.max_reproducir = max_reproducir
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._detener = threading.Event()
+        self._limite = None  # Hasta cuándo se reintenta al detenerse
+        self._conexion = None
+        self._proximo_intento = 0.0  # No se reconecta antes de este instante
+        self._en_spool = 0
+        self.escritos = 0
+        self.descartados = 0
+        self.reproducidos = 0
+
+    def encolar(self, tipo, etiqueta, confianza, fecha):
+        """
+        Agrega un evento sin bloquear. Devuelve False si la cola está llena.
+        """
+        try:
+            self._cola.put_nowait((uuid.uuid4().hex, tipo, etiqueta, float(confianza), fecha))
+            return True
+        except queue.Full:
+            self.descartados += 1
+            metrics.fijar("eventos.descartados", self.descartados)
+            return False
+
+    def detener(self, timeout=5.0):
+        """
+        Escribe lo que quede en la cola y cierra la conexión.
+        """
+        self._limite = time.time() + timeout
+        self._detener.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def _recolectar(self):
+        try:
+            lote = [self._cola.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        limite = time.time() + self.espera_max
+        while len(lote) < self.max_lote:
+            # Al detenerse se vacía la cola sin esperar a que lleguen más eventos
+            restante = 0 if self._detener.is_set() else limite - time.time()
+            try:
+                lote.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def run(self):
+        self._abrir_spool()
+        pendiente = []
+        while True:
+            if not pendiente:
+                if self._detener.is_set() and self._cola.empty():
+                    break
+                pendiente = self._recolectar()
+            if pendiente:
+                metrics.fijar("eventos.cola", self._cola.qsize())
+                if self._guardar(pendiente):
+                    pendiente = []
+                elif self._detener.is_set() and time.time() + self.reintento > self._limite:
+                    print(f"[ERROR] Se pierden {len(pendiente) + self._cola.qsize()} eventos sin escribir.")
+                    break
+                else:
+                    self._detener.wait(self.reintento)
+                    continue
+            self._reproducir()
+        self._cerrar()
+        if self.spool is not None:
+            self.spool.cerrar()
+
+    def _abrir_spool(self):
+        if self.spool is None:
+            return
+        try:
+            self.spool.abrir()
+            self._en_spool = self.spool.pendientes()
+            metrics.fijar("eventos.spool", self._en_spool)
+            if self._en_spool:
+                print(f"[INFO] {self._en_spool} eventos pendientes en el spool {self.spool.ruta}.")
+        except Exception as e:
+            print(f"[ERROR] No se pudo abrir el spool de eventos: {e}")
+            self.spool = None
+
+    def _guardar(self, lote):
+        if not self._en_spool and self._escribir(lote):
+            return True
+        if self.spool is None:
+            return False
+        # Base de datos no disponible (o eventos anteriores sin reproducir): al spool
+        try:
+            self.spool.agregar(lote)
+        except Exception as e:
+            print(f"[ERROR] No se pudieron guardar {len(lote)} eventos en el spool: {e}")
+            return False
+        self._en_spool += len(lote)
+        metrics.fijar("eventos.spool", self._en_spool)
+        return True
+
+    def _reproducir(self):
+        """
+        Escribe en la base de datos los eventos del spool, del más antiguo al más reciente.
+        """
+        if not self._en_spool:
+            return
+        inicio = time.time()
+        total = 0
+        try:
+            while True:
+                filas = self.spool.leer(self.max_reproducir)
+                if not filas or not self._escribir(filas):
+                    break
+                self.spool.eliminar([fila[0] for fila in filas])
+                total += len(filas)
+            self._en_spool = self.spool.pendientes()
+        except Exception as e:
+            print(f"[ERROR] No se pudo reproducir el spool de eventos: {e}")
+        metrics.fijar("eventos.spool", self._en_spool)
+        if total:
+            duracion = max(time.time() - inicio, 1e-6)
+            self.reproducidos += total
+            metrics.fijar("eventos.reproducidos", self.reproducidos)
+            metrics.fijar("eventos.reproducidos_s", total / duracion)
+            print(f"[INFO] {total} eventos del spool escritos en la base de datos "
+                  f"({total / duracion:.0f} eventos/s, {self._en_spool} pendientes).")
+
+    def _escribir(self, lote):
+        if self._conexion is None:
+            if time.time() < self._proximo_intento:
+                return False
+            self._conexion = self.conectar()
+            if self._conexion is None:
+                self._proximo_intento = time.time() + self.reintento
+                return False
+
+        inicio = time.time()
+        cursor = None
+        try:
+            cursor = self._conexion.cursor()
+            cursor.executemany(INSERTAR_DETECCION, lote)
+            self._conexion.commit()
+        except Exception as e:
+            print(f"[ERROR] No se pudieron guardar {len(lote)} eventos: {e}")
+            self._cerrar()
+            self._proximo_intento = time.time() + self.reintento
+            return False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+        self.escritos += len(lote)
+        metrics.fijar("eventos.tam_lote", len(lote))
+        metrics.fijar("eventos.escritura_ms", (time.time() - inicio) * 1000)
+        metrics.fijar("eventos.escritos", self.escritos)
+        return True
+
+    def _cerrar(self):
+        if self._conexion is not None:
+            try:
+                self._conexion.close()
+            except Exception:
+                pass
+            self._conexion = None
@@ -1,88 +1,341 @@
 from insightface.app import FaceAnalysis
+from insightface.app.common import Face
 from deep_sort_realtime.deepsort_tracker import DeepSort
 import cv2
 import numpy as np
-import base64
 import time
+import threading
 from .db_connection import get_db_connection
+from .face_gallery import GaleriaRostros, bloques_desde_cursor, cargar_snapshot, crear_indice, guardar_snapshot
+from .identity_cache import CacheIdentidades, iou
+from . import config, metrics
 
 # Configuración de modelo y dispositivo para InsightFace
 app_insightface = FaceAnalysis(providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
 app_insightface.prepare(ctx_id=0, det_size=(640, 640))  # ctx_id=0 para usar GPU
 
-# Inicialización del tracker (DeepSORT)
-tracker = DeepSort(max_age=5, nn_budget=100, embedder_gpu=True)
+# Un tracker (DeepSORT) por cámara: los IDs y estados no se mezclan entre fuentes
+trackers = {}
 
-# Variables globales para encodings
+def obtener_tracker(camara_id):
+    """
+    Devuelve el tracker de la cámara, creándolo la primera vez. No usa su propio embedder:
+    recibe como descriptor de apariencia el embedding ArcFace que ya calcula InsightFace.
+    """
+    if camara_id not in trackers:
+        trackers[camara_id] = DeepSort(max_age=5, nn_budget=100, embedder=None)
+    return trackers[camara_id]
+
+# Caché de identidad por track y cámara (None si está desactivada)
+caches = {}
+
+def obtener_cache(camara_id):
+    if not config.ROSTROS_CACHE_ACTIVO:
+        return None
+    if camara_id not in caches:
+        caches[camara_id] = CacheIdentidades(
+            camara_id,
+            reverificar=config.ROSTROS_CACHE_REVERIFICAR,
+            mejora_tamano=config.ROSTROS_CACHE_MEJORA_TAMANO,
+            mejora_score=config.ROSTROS_CACHE_MEJORA_SCORE,
+            reintento_min=config.ROSTROS_CACHE_REINTENTO_MIN,
+            reintento_max=config.ROSTROS_CACHE_REINTENTO_MAX,
+            iou_min=config.ROSTROS_CACHE_IOU,
+        )
+    return caches[camara_id]
+
+# Últimos rostros dibujados por cámara: [(bbox, etiqueta, track_id)], para redibujarlos en
+# los frames que no se infieren
+ultimos_rostros = {}
+
+# Proveedor de regiones de cabeza (las poses de la misma cámara); None: siempre frame completo
+proveedor_regiones = None
+# Inferencias por cámara desde el último barrido del frame completo
+_inferencias_roi = {}
+
+def usar_regiones(p_proveedor_regiones):
+    """
+    Activa la detección de rostros solo en las regiones de cabeza que indican las poses.
+    'p_proveedor_regiones(camara_id)' devuelve [(x1, y1, x2, y2)], o None si no hay poses recientes.
+    """
+    global proveedor_regiones
+    proveedor_regiones = p_proveedor_regiones
+
+def crear_indice_galeria():
+    """
+    Índice de búsqueda de la galería según la configuración.
+    """
+    if config.GALERIA_INDICE == "ivf":
+        return crear_indice(
+            "ivf",
+            nlist=config.GALERIA_IVF_LISTAS,
+            nprobe=config.GALERIA_IVF_NPROBE,
+            min_filas=config.GALERIA_IVF_MIN_PERSONAS,
+        )
+    return crear_indice(config.GALERIA_INDICE)
+
+# Galería de encodings conocidos (matriz contigua normalizada); se reemplaza completa al recargar
 _encodings_loaded = False
-known_encodings = []
-known_names = []
+galeria = GaleriaRostros(indice=crear_indice_galeria())
+# Serializa las recargas completas con los cambios incrementales de la galería
+galeria_lock = threading.Lock()
+
+def cargar_galeria_bd():
+    """
+    Lee los embeddings registrados desde la base de datos y devuelve una galería nueva
+    (None si no se pudo leer). Se leen por bloques (fetchmany) como bytes float32
+    directamente a la matriz de la galería.
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("[ERROR] No se pudo establecer la conexión con la base de datos.")
+        return None
+
+    cursor = connection.cursor()
+    try:
+        inicio = time.time()
+        bytes_embedding = config.DIMENSION_EMBEDDING * 4
+        cursor.execute(
+            "SELECT COUNT(*), COALESCE(SUM(modelo = %s AND LENGTH(embedding) = %s), 0) "
+            "FROM personas WHERE estado = 'A'",
+            (config.MODELO_EMBEDDING, bytes_embedding),
+        )
+        activas, total = (int(valor) for valor in cursor.fetchone())
+        if activas > total:
+            print(f"[WARNING] {activas - total} personas activas tienen embeddings de otro modelo "
+                  f"(actual: {config.MODELO_EMBEDDING}) y no se cargan.")
+
+        cursor.execute(
+            "SELECT id, persona, embedding FROM personas "
+            "WHERE estado = 'A' AND modelo = %s AND LENGTH(embedding) = %s",
+            (config.MODELO_EMBEDDING, bytes_embedding),
+        )
+        nueva_galeria = GaleriaRostros(
+            dimension=config.DIMENSION_EMBEDDING, capacidad=total, indice=crear_indice_galeria()
+        )
+        nueva_galeria.cargar_por_bloques(
+            bloques_desde_cursor(cursor, config.DIMENSION_EMBEDDING, config.GALERIA_FILAS_POR_LECTURA), total
+        )
+        print(f"[INFO] Encodings cargados: {len(nueva_galeria)} personas en {time.time() - inicio:.2f} s.")
+        return nueva_galeria
+    except Exception as e:
+        print(f"[ERROR] Error al cargar encodings desde la base de datos: {e}")
+        return None
+    finally:
+        cursor.close()
+        connection.close()
+
+# Hay cambios incrementales aplicados que todavía no están en el snapshot en disco
+_snapshot_pendiente = threading.Event()
+
+def guardar_snapshot_galeria():
+    _snapshot_pendiente.clear()
+    try:
+        guardar_snapshot(galeria, config.GALERIA_SNAPSHOT_DIR, config.MODELO_EMBEDDING)
+    except Exception as e:
+        _snapshot_pendiente.set()
+        print(f"[WARNING] No se pudo guardar el snapshot de la galería: {e}")
+
+def marcar_snapshot_pendiente():
+    """
+    Indica que la galería cambió (p. ej. por un cambio incremental); el snapshot se reescribe
+    en la próxima pasada de guardar_snapshot_periodicamente.
+    """
+    if config.GALERIA_SNAPSHOT:
+        _snapshot_pendiente.set()
+
+def guardar_snapshot_periodicamente():
+    """
+    Hilo que reescribe el snapshot cada GALERIA_SNAPSHOT_INTERVALO segundos si hubo cambios,
+    así un reinicio con la base de datos caída no pierde los registros aplicados desde la
+    última carga completa.
+    """
+    while True:
+        time.sleep(config.GALERIA_SNAPSHOT_INTERVALO)
+        if _snapshot_pendiente.is_set():
+            with galeria_lock:
+                guardar_snapshot_galeria()
 
 def initialize_encodings():
     """
-    Carga los encodings registrados desde la base de datos.
+    Carga los encodings registrados desde la base de datos, publica la nueva galería de una
+    sola vez y actualiza el snapshot en disco. Si la base de datos no responde se conserva
+    la galería actual. Devuelve True si la carga se completó.
     """
-    global _encodings_loaded, known_encodings, known_names
+    global _encodings_loaded, galeria
 
-    known_encodings = []
-    known_names = []
-    # if not _encodings_loaded:
-    connection = get_db_connection()
-    if connection:
+    with galeria_lock:
+        nueva_galeria = cargar_galeria_bd()
+        if nueva_galeria is not None:
+            galeria = nueva_galeria
+            if config.GALERIA_SNAPSHOT:
+                guardar_snapshot_galeria()
+    _encodings_loaded = True
+    return nueva_galeria is not None
+
+def reconciliar_galeria(esperar_primero=False):
+    """
+    Recarga la galería desde la base de datos, reintentando con espera creciente hasta lograrlo
+    (mientras tanto se sigue sirviendo el snapshot o la galería vacía). Con esperar_primero, el
+    primer intento ya falló y se espera antes de reintentar.
+    """
+    espera = config.GALERIA_RECONCILIAR_REINTENTO_MIN
+    if esperar_primero:
+        time.sleep(espera)
+        espera = min(espera * 2, config.GALERIA_RECONCILIAR_REINTENTO_MAX)
+    while not initialize_encodings():
+        print(f"[WARNING] No se pudo reconciliar la galería con la base de datos; reintento en {espera:.0f} s.")
+        time.sleep(espera)
+        espera = min(espera * 2, config.GALERIA_RECONCILIAR_REINTENTO_MAX)
+    print("[INFO] Galería reconciliada con la base de datos.")
+
+def iniciar_galeria():
+    """
+    Con un snapshot válido en disco, la galería se sirve desde él (mapeado en memoria) de
+    inmediato y se reconcilia con la base de datos en segundo plano. Sin snapshot, se carga
+    desde la base de datos antes de procesar frames; si falla, se reintenta en segundo plano.
+    """
+    global galeria
+
+    snapshot = None
+    if config.GALERIA_SNAPSHOT:
         try:
-            cursor = connection.cursor()
-            cursor.execute("SELECT persona, encoding FROM personas WHERE estado = 'A'")
-            for row in cursor.fetchall():
-                name, encoding_serialized = row
-                encoding = np.frombuffer(base64.b64decode(encoding_serialized), dtype=np.float32)
-                encoding = encoding / np.linalg.norm(encoding)  # Normalizar el encoding
-                known_encodings.append(encoding)
-                known_names.append(name)
-            print(f"[DEBUG] Total encodings cargados: {len(known_encodings)}")
+            snapshot = cargar_snapshot(
+                config.GALERIA_SNAPSHOT_DIR, config.MODELO_EMBEDDING, config.DIMENSION_EMBEDDING,
+                indice=crear_indice_galeria(),
+            )
         except Exception as e:
-            print(f"[ERROR] Error al cargar encodings desde la base de datos: {e}")
-        finally:
-            cursor.close()
-            connection.close()
-    else:
-        print("[ERROR] No se pudo establecer la conexión con la base de datos.")
-    _encodings_loaded = True
-    print(f"[INFO] Encodings cargados: {known_names}")
+            print(f"[WARNING] No se pudo leer el snapshot de la galería: {e}")
+
+    if config.GALERIA_SNAPSHOT:
+        threading.Thread(target=guardar_snapshot_periodicamente, name="snapshot-galeria", daemon=True).start()
+
+    if snapshot is None:
+        if not initialize_encodings():
+            print(f"[WARNING] Galería sin cargar; se reintentará en {config.GALERIA_RECONCILIAR_REINTENTO_MIN:.0f} s.")
+            threading.Thread(target=reconciliar_galeria, kwargs={"esperar_primero": True},
+                             name="reconciliar-galeria", daemon=True).start()
+        return
+
+    galeria = snapshot
+    print(f"[INFO] Galería servida desde el snapshot: {len(galeria)} personas. Reconciliando con la base de datos...")
+    threading.Thread(target=reconciliar_galeria, name="reconciliar-galeria", daemon=True).start()
 
 # Cargar los encodings al importar el módulo
-initialize_encodings()
+iniciar_galeria()
 
-def procesar_rostros(frame, prev_time, track_id_to_name):
+def detectar_rostros(frame, camara_id="cam0"):
     """
-    Detecta y procesa rostros en un frame usando InsightFace, realiza el seguimiento con DeepSORT y mantiene la identificación.
+    Detecta rostros (solo cajas, puntos y score; los embeddings se calculan aparte con
+    calcular_embeddings). Con regiones de cabeza disponibles, el detector corre solo sobre
+    esos recortes (el costo depende del número de personas, no del tamaño del frame);
+    cada ROSTROS_ROI_CUADRO_COMPLETO_CADA inferencias se revisa el frame completo.
     """
-    global known_encodings, known_names
+    if proveedor_regiones is None:
+        return detectar_en_frame(frame)
+
+    contador = _inferencias_roi.get(camara_id, 0) + 1
+    regiones = proveedor_regiones(camara_id)
+    if regiones is None or contador >= config.ROSTROS_ROI_CUADRO_COMPLETO_CADA:
+        _inferencias_roi[camara_id] = 0
+        return detectar_en_frame(frame)
+
+    _inferencias_roi[camara_id] = contador
+    metrics.fijar(f"{camara_id}.rostros.regiones", len(regiones))
+    return detectar_en_regiones(frame, regiones)
 
-    # Detectar rostros y obtener embeddings
-    faces = app_insightface.get(frame)
+def detectar_en_frame(frame):
+    """
+    Detector de InsightFace sobre el frame completo (como FaceAnalysis.get, sin el resto de modelos).
+    """
+    bboxes, kpss = app_insightface.det_model.detect(frame, max_num=0, metric='default')
+    return [
+        Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4])
+        for i in range(bboxes.shape[0])
+    ]
+
+def detectar_en_regiones(frame, regiones):
+    """
+    Ejecuta el detector de InsightFace sobre cada región y traslada las coordenadas al frame completo.
+    """
+    alto, ancho = frame.shape[:2]
+    tam = config.ROSTROS_ROI_DET_SIZE
+    candidatos = []
+
+    for x1, y1, x2, y2 in regiones:
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(ancho, x2), min(alto, y2)
+        if x2 - x1 < 16 or y2 - y1 < 16:
+            continue
+        bboxes, kpss = app_insightface.det_model.detect(frame[y1:y2, x1:x2], input_size=(tam, tam))
+        for i in range(bboxes.shape[0]):
+            bbox = bboxes[i, 0:4] + np.array([x1, y1, x1, y1], dtype=np.float32)
+            kps = kpss[i] + np.array([x1, y1], dtype=np.float32) if kpss is not None else None
+            candidatos.append((bbox, kps, bboxes[i, 4]))
+
+    # Regiones superpuestas pueden detectar el mismo rostro: se conserva el de mayor score
+    candidatos.sort(key=lambda c: -c[2])
+    faces = []
+    for bbox, kps, det_score in candidatos:
+        if any(iou(bbox, face.bbox) > 0.5 for face in faces):
+            continue
+        faces.append(Face(bbox=bbox, kps=kps, det_score=det_score))
+    return faces
+
+def calcular_embeddings(frame, faces):
+    """
+    Ejecuta sobre los rostros dados los modelos de InsightFace distintos del detector
+    (embedding ArcFace, etc.).
+    """
+    for face in faces:
+        for taskname, model in app_insightface.models.items():
+            if taskname == 'detection':
+                continue
+            model.get(frame, face)
+
+def procesar_rostros(frame, prev_time, track_id_to_name, camara_id="cam0"):
+    """
+    Detecta y procesa rostros en un frame usando InsightFace, realiza el seguimiento con DeepSORT y mantiene la identificación.
+    """
+    # Detectar rostros (sin embeddings)
+    faces = detectar_rostros(frame, camara_id)
 
     detecciones = []  # Lista de detecciones para el tracker
+    indices = []  # Rostro (índice en faces) de cada detección
     eventos = []  # Lista de eventos solo para notificar desconocidos
 
+    # Los rostros de tracks ya reconocidos reutilizan su nombre; solo el resto calcula embedding
+    cache = obtener_cache(camara_id)
+    nombres = [None] * len(faces)
+    embeddings = [None] * len(faces)  # Descriptor de apariencia para DeepSORT (normalizado)
+    if cache is not None:
+        for i, track_id in enumerate(cache.asociar([face.bbox for face in faces])):
+            nombres[i] = cache.consultar(track_id, faces[i].bbox, faces[i].det_score)
+            if nombres[i] is not None:
+                embeddings[i] = cache.embedding(track_id)
+        metrics.fijar(f"{camara_id}.rostros.cache_aciertos_pct", cache.porcentaje_aciertos())
+    # También se calcula el embedding de un acierto sin descriptor guardado
+    pendientes = [i for i in range(len(faces)) if nombres[i] is None or embeddings[i] is None]
+
+    # Comparar los rostros pendientes con la galería en una sola operación
+    if pendientes:
+        calcular_embeddings(frame, [faces[i] for i in pendientes])
+        reconocidos = galeria.identificar(np.stack([faces[i].embedding for i in pendientes]))
+        for i, nombre in zip(pendientes, reconocidos):
+            nombres[i] = nombre
+            embeddings[i] = faces[i].normed_embedding
+    pendientes = set(pendientes)
+
     for i, face in enumerate(faces):
         # Coordenadas del bounding box
         x1, y1, x2, y2 = map(int, face.bbox)
         width = x2 - x1
         height = y2 - y1
         x1, y1, width, height = max(0, x1), max(0, y1), max(0, width), max(0, height)
+        if width == 0 or height == 0:
+            # DeepSORT descarta estas cajas sin filtrar 'embeds' ni 'others': se omiten aquí
+            continue
 
-        # Extraer el embedding
-        encoding = face.embedding
-        encoding = encoding / np.linalg.norm(encoding)  # Normalizar el embedding detectado
-        name = "Desconocido"  # Valor por defecto para rostros no identificados
-
-        # Comparar con encodings conocidos
-        if known_encodings:
-            distances = np.linalg.norm(known_encodings - encoding, axis=1)
-            min_distance_index = np.argmin(distances)
-
-            if distances[min_distance_index] < 1.1:  # Umbral de similitud
-                name = known_names[min_distance_index]
+        name = nombres[i]  # "Desconocido" si no supera el umbral de similitud
 
         # Validación de formato
         confianza = float(1.0)  # Asegurar que confianza sea flotante
@@ -91,41 +344,55 @@ def procesar_rostros(frame, prev_time, track_id_to_name):
         # Agregar la detección al formato esperado por DeepSORT
         deteccion = (detection_bbox, confianza, name)
         detecciones.append(deteccion)
+        indices.append(i)
 
-    # Actualizar el tracker con las detecciones
+    # Actualizar el tracker con las detecciones y sus embeddings ('others' identifica el rostro de cada track)
     try:
-        tracks = tracker.update_tracks(detecciones, frame=frame)
+        tracks = obtener_tracker(camara_id).update_tracks(
+            detecciones, embeds=[embeddings[i] for i in indices], others=indices
+        )
     except Exception as e:
         return frame, eventos, prev_time
 
+    if cache is not None:
+        cache.podar([track.track_id for track in tracks])
+        for track in tracks:
+            i = track.get_det_supplementary() if track.time_since_update == 0 else None
+            if i is not None:
+                calculado = i in pendientes
+                cache.registrar(track.track_id, faces[i].bbox, nombres[i] if calculado else None,
+                                faces[i].det_score, embeddings[i] if calculado else None)
+
     # Dibujar los resultados del tracker en el frame
+    rostros = []
     for track in tracks:
         if not track.is_confirmed():
             continue
 
         track_id = track.track_id  # ID único del tracker
         det_class = track.get_det_class()  # Clase detectada en esta iteración
+        clave = f"{camara_id}/{track_id}"  # Los IDs de track se repiten entre cámaras
 
         # Si el nombre actual es "Desconocido" pero se detecta un nombre conocido, actualiza el diccionario
-        if track_id in track_id_to_name and track_id_to_name[track_id] == "Desconocido" and det_class != "Desconocido":
-            track_id_to_name[track_id] = det_class
-        elif track_id not in track_id_to_name:
+        if clave in track_id_to_name and track_id_to_name[clave] == "Desconocido" and det_class != "Desconocido":
+            track_id_to_name[clave] = det_class
+        elif clave not in track_id_to_name:
             # Si el track_id no está en el diccionario, lo agregamos
-            track_id_to_name[track_id] = det_class
+            track_id_to_name[clave] = det_class
 
         # Obtener el nombre final
-        label = track_id_to_name.get(track_id, "Desconocido")
+        label = track_id_to_name.get(clave, "Desconocido")
 
         # Agregar a eventos si sigue siendo desconocido
         if label == "Desconocido":
             eventos.append({"etiqueta": "Desconocido", "confianza": 1.0})
 
-        # Dibujar en el frame
-        bbox = track.to_tlbr()
-        cv2.rectangle(frame, (int(bbox[0]), int(bbox[1])), (int(bbox[2]), int(bbox[3])), (0, 255, 0), 2)
-        cv2.putText(frame, f"{label} (ID: {track_id})", (int(bbox[0]), int(bbox[1] - 10)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-        
+        rostros.append((track.to_tlbr(), label, track_id))
+
+    # Dibujar en el frame
+    ultimos_rostros[camara_id] = rostros
+    dibujar_rostros(frame, rostros)
+
     #Calcular y mostrar FPS
     current_time = time.time()
     fps = 1 / (current_time - prev_time)
@@ -133,3 +400,19 @@ def procesar_rostros(frame, prev_time, track_id_to_name):
     cv2.putText(frame, f"FPS: {fps:.2f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
     return frame, eventos, prev_time
+
+def dibujar_rostros(frame, rostros):
+    """
+    Dibuja el recuadro y la etiqueta de cada rostro seguido.
+    """
+    for bbox, label, track_id in rostros:
+        cv2.rectangle(frame, (int(bbox[0]), int(bbox[1])), (int(bbox[2]), int(bbox[3])), (0, 255, 0), 2)
+        cv2.putText(frame, f"{label} (ID: {track_id})", (int(bbox[0]), int(bbox[1] - 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+    return frame
+
+def redibujar_rostros(frame, camara_id="cam0"):
+    """
+    Dibuja sobre el frame los últimos rostros de la cámara, sin ejecutar el modelo.
+    """
+    return dibujar_rostros(frame, ultimos_rostros.get(camara_id, []))
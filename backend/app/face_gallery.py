@@ -0,0 +1,422 @@
+# face_gallery.py
+import os
+import json
+import time
+import threading
+import numpy as np
+
+# Umbral histórico de reconocimiento: distancia euclidiana entre embeddings normalizados.
+# Para vectores unitarios d^2 = 2 - 2*cos, así que equivale a una similitud coseno mínima.
+UMBRAL_DISTANCIA = 1.1
+
+# Formato del snapshot en disco (matriz .npy + índice JSON); cambia si cambia su estructura
+FORMATO_SNAPSHOT = 1
+INDICE_SNAPSHOT = "galeria.json"
+
+
+def normalizar(embeddings):
+    """
+    Normaliza por filas (L2) y devuelve una matriz float32 contigua.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings[None, :]
+    normas = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return embeddings / normas
+
+
+def bloques_desde_cursor(cursor, dimension=512, filas_por_lectura=5000):
+    """
+    Recorre un cursor ya ejecutado (id, nombre, embedding en bytes float32) con fetchmany y
+    entrega bloques (ids, nombres, embeddings (b, dimension)) sin decodificar fila por fila.
+    """
+    while True:
+        filas = cursor.fetchmany(filas_por_lectura)
+        if not filas:
+            return
+        ids, nombres, embeddings = zip(*filas)
+        matriz = np.frombuffer(b"".join(embeddings), dtype=np.float32).reshape(len(filas), dimension)
+        yield list(ids), list(nombres), matriz
+
+
+def _top_k(similitudes, k):
+    """
+    Índices (m, k) de las k mayores similitudes por fila, ordenados de mayor a menor.
+    """
+    if k == 1:
+        return np.argmax(similitudes, axis=1)[:, None]
+    indices = np.argpartition(-similitudes, k - 1, axis=1)[:, :k]
+    orden = np.argsort(-np.take_along_axis(similitudes, indices, axis=1), axis=1)
+    return np.take_along_axis(indices, orden, axis=1)
+
+
+class IndiceExacto:
+    """
+    Búsqueda exacta: compara contra todas las filas de la galería.
+    """
+
+    def construir(self, matriz):
+        pass
+
+    def agregar(self, fila, vector):
+        pass
+
+    def eliminar(self, fila, ultima):
+        pass
+
+    def buscar(self, matriz, embeddings, k):
+        similitudes = embeddings @ matriz.T  # (m, n)
+        indices = _top_k(similitudes, k)
+        return indices, np.take_along_axis(similitudes, indices, axis=1)
+
+
+class IndiceIVF:
+    """
+    Búsqueda aproximada tipo IVF (inverted file) en NumPy puro.
+
+    Las filas se agrupan en 'nlist' listas con k-means esférico; una consulta solo se compara
+    con las filas de las 'nprobe' listas cuyos centroides son más parecidos. Con menos de
+    'min_filas' identidades se usa la búsqueda exacta (el IVF no compensa).
+    """
+
+    def __init__(self, nlist=None, nprobe=16, iteraciones=10, min_filas=2000, max_muestras=50_000, semilla=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iteraciones = iteraciones
+        self.min_filas = min_filas
+        self.max_muestras = max_muestras
+        self.semilla = semilla
+        self.centroides = None
+        self.listas = []
+        self._lista_de_fila = []  # Lista a la que pertenece cada fila de la galería
+        self._exacto = IndiceExacto()
+
+    def construir(self, matriz):
+        n = matriz.shape[0]
+        if n < self.min_filas:
+            self.centroides = None
+            self.listas = []
+            self._lista_de_fila = []
+            return
+
+        rng = np.random.default_rng(self.semilla)
+        nlist = self.nlist or int(4 * np.sqrt(n))
+        muestra = matriz[rng.choice(n, min(n, self.max_muestras), replace=False)]
+        centroides = muestra[rng.choice(muestra.shape[0], nlist, replace=False)].copy()
+        for _ in range(self.iteraciones):
+            asignacion = np.argmax(muestra @ centroides.T, axis=1)
+            sumas = np.zeros_like(centroides)
+            np.add.at(sumas, asignacion, muestra)
+            vacios = np.bincount(asignacion, minlength=nlist) == 0
+            sumas[vacios] = centroides[vacios]  # Centroides sin puntos se conservan
+            centroides = normalizar(sumas)
+        self.centroides = centroides
+
+        asignacion = self._asignar(matriz)
+        orden = np.argsort(asignacion, kind="stable")
+        cortes = np.searchsorted(asignacion[orden], np.arange(nlist + 1))
+        self.listas = [orden[cortes[i]:cortes[i + 1]].astype(np.int64) for i in range(nlist)]
+        self._lista_de_fila = asignacion.tolist()
+
+    def _asignar(self, matriz, bloque=65_536):
+        return np.concatenate([
+            np.argmax(matriz[i:i + bloque] @ self.centroides.T, axis=1)
+            for i in range(0, matriz.shape[0], bloque)
+        ]) if matriz.shape[0] else np.zeros(0, dtype=np.int64)
+
+    def agregar(self, fila, vector):
+        if self.centroides is None:
+            return
+        lista = int(np.argmax(self.centroides @ vector))
+        self.listas[lista] = np.append(self.listas[lista], fila)
+        self._lista_de_fila.append(lista)
+
+    def eliminar(self, fila, ultima):
+        """
+        Quita 'fila'; la galería mueve la fila 'ultima' a su lugar (borrado por intercambio).
+        """
+        if self.centroides is None:
+            return
+        lista = self._lista_de_fila[fila]
+        self.listas[lista] = self.listas[lista][self.listas[lista] != fila]
+        if ultima != fila:
+            lista_ultima = self._lista_de_fila[ultima]
+            self.listas[lista_ultima][self.listas[lista_ultima] == ultima] = fila
+            self._lista_de_fila[fila] = lista_ultima
+        self._lista_de_fila.pop()
+
+    def buscar(self, matriz, embeddings, k):
+        if self.centroides is None:
+            return self._exacto.buscar(matriz, embeddings, k)
+
+        nprobe = min(self.nprobe, len(self.listas))
+        cercanas = _top_k(embeddings @ self.centroides.T, nprobe)
+        m = embeddings.shape[0]
+        indices = np.zeros((m, k), dtype=np.int64)
+        similitudes = np.full((m, k), -np.inf, dtype=np.float32)
+        for q in range(m):
+            candidatos = np.concatenate([self.listas[lista] for lista in cercanas[q]])
+            if candidatos.size == 0:
+                continue
+            sims = matriz[candidatos] @ embeddings[q]
+            kq = min(k, candidatos.size)
+            mejores = _top_k(sims[None, :], kq)[0]
+            indices[q, :kq] = candidatos[mejores]
+            similitudes[q, :kq] = sims[mejores]
+        return indices, similitudes
+
+
+def crear_indice(tipo="exacto", **parametros):
+    """
+    Crea el índice de búsqueda de la galería: "exacto" o "ivf".
+    """
+    if tipo == "exacto":
+        return IndiceExacto()
+    if tipo == "ivf":
+        return IndiceIVF(**parametros)
+    raise ValueError(f"Tipo de índice desconocido: {tipo}")
+
+
+class GaleriaRostros:
+    """
+    Embeddings conocidos en una única matriz float32 contigua y normalizada (una fila por persona).
+
+    Todos los rostros de un frame se comparan con la galería en una sola operación; la capacidad
+    se reserva por adelantado y crece por duplicación. La búsqueda la resuelve un índice
+    intercambiable (exacto o IVF) con la misma interfaz match(embeddings, k).
+
+    Las altas, bajas y cambios de nombre se aplican por id de persona en O(1) filas (las bajas
+    mueven la última fila al hueco), así que la galería se actualiza sin recargarla completa.
+    """
+
+    def __init__(self, dimension=512, capacidad=1024, indice=None):
+        self.dimension = dimension
+        self._matriz = np.zeros((max(1, capacidad), dimension), dtype=np.float32)
+        self.n = 0
+        self.nombres = []
+        self.ids = []
+        self._filas = {}  # id de persona -> fila
+        self.indice = indice or IndiceExacto()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def matriz(self):
+        """
+        Vista (sin copia) de las filas ocupadas.
+        """
+        return self._matriz[:self.n]
+
+    def _reservar(self, capacidad):
+        # Crece por duplicación; una matriz de solo lectura (snapshot mapeado) se copia a memoria propia
+        if capacidad <= self._matriz.shape[0] and self._matriz.flags.writeable:
+            return
+        nueva = np.zeros((max(capacidad, 2 * self._matriz.shape[0]), self.dimension), dtype=np.float32)
+        nueva[:self.n] = self._matriz[:self.n]
+        self._matriz = nueva
+
+    def cargar(self, nombres, embeddings, ids=None):
+        """
+        Reemplaza el contenido de la galería con los embeddings dados (en bloque).
+        """
+        embeddings = normalizar(embeddings) if len(nombres) else np.zeros((0, self.dimension), np.float32)
+        with self._lock:
+            self.n = 0
+            self._reservar(len(nombres))
+            self._matriz[:len(nombres)] = embeddings
+            self.n = len(nombres)
+            self.nombres = list(nombres)
+            self.ids = list(ids) if ids is not None else list(range(len(nombres)))
+            self._filas = {id_persona: fila for fila, id_persona in enumerate(self.ids)}
+            self.indice.construir(self.matriz)
+
+    def usar_matriz(self, matriz, nombres, ids):
+        """
+        Usa una matriz ya normalizada sin copiarla (p. ej. un snapshot mapeado en memoria de solo
+        lectura); se copia a memoria propia recién con el primer cambio.
+        """
+        with self._lock:
+            self._matriz = matriz
+            self.n = matriz.shape[0]
+            self.nombres = list(nombres)
+            self.ids = list(ids)
+            self._filas = {id_persona: fila for fila, id_persona in enumerate(self.ids)}
+            self.indice.construir(self.matriz)
+
+    def cargar_por_bloques(self, bloques, total=0):
+        """
+        Reemplaza el contenido de la galería leyendo bloques (ids, nombres, embeddings), por ejemplo
+        de bloques_desde_cursor. Cada bloque se copia directamente a la matriz preasignada para
+        'total' filas (crece si llegan más) y se normaliza en el lugar.
+        """
+        with self._lock:
+            self.n = 0
+            self.nombres = []
+            self.ids = []
+            self._reservar(total)
+            for ids, nombres, embeddings in bloques:
+                tam = len(ids)
+                self._reservar(self.n + tam)
+                destino = self._matriz[self.n:self.n + tam]
+                destino[:] = embeddings
+                normas = np.linalg.norm(destino, axis=1, keepdims=True)
+                normas[normas == 0] = 1.0
+                destino /= normas
+                self.ids.extend(ids)
+                self.nombres.extend(nombres)
+                self.n += tam
+            self._filas = {id_persona: fila for fila, id_persona in enumerate(self.ids)}
+            self.indice.construir(self.matriz)
+
+    def agregar(self, id_persona, nombre, embedding):
+        """
+        Agrega una persona; si el id ya existe, reemplaza su nombre y embedding.
+        """
+        vector = normalizar(embedding)[0]
+        with self._lock:
+            if id_persona in self._filas:
+                self._eliminar(id_persona)
+            self._reservar(self.n + 1)
+            self._matriz[self.n] = vector
+            self.nombres.append(nombre)
+            self.ids.append(id_persona)
+            self._filas[id_persona] = self.n
+            self.indice.agregar(self.n, self._matriz[self.n])
+            self.n += 1
+
+    def eliminar(self, id_persona):
+        """
+        Quita una persona de la galería. Devuelve False si no estaba.
+        """
+        with self._lock:
+            if id_persona not in self._filas:
+                return False
+            self._eliminar(id_persona)
+            return True
+
+    def _eliminar(self, id_persona):
+        self._reservar(self.n)
+        fila = self._filas.pop(id_persona)
+        ultima = self.n - 1
+        if fila != ultima:
+            self._matriz[fila] = self._matriz[ultima]
+            self.nombres[fila] = self.nombres[ultima]
+            self.ids[fila] = self.ids[ultima]
+            self._filas[self.ids[fila]] = fila
+        self.indice.eliminar(fila, ultima)
+        self.nombres.pop()
+        self.ids.pop()
+        self.n -= 1
+
+    def renombrar(self, id_persona, nombre):
+        """
+        Cambia el nombre asociado a una persona. Devuelve False si no estaba.
+        """
+        with self._lock:
+            fila = self._filas.get(id_persona)
+            if fila is None:
+                return False
+            self.nombres[fila] = nombre
+            return True
+
+    def match(self, embeddings, k=1):
+        """
+        Compara m embeddings (ya normalizados) contra la galería.
+        Devuelve (indices, similitudes), ambos de forma (m, k), ordenados de mayor a menor similitud.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[None, :]
+        m = embeddings.shape[0]
+        k = min(k, self.n)
+        if m == 0 or k == 0:
+            return np.zeros((m, 0), dtype=np.int64), np.zeros((m, 0), dtype=np.float32)
+
+        return self.indice.buscar(self.matriz, embeddings, k)
+
+    def identificar(self, embeddings, umbral_distancia=UMBRAL_DISTANCIA, desconocido="Desconocido"):
+        """
+        Devuelve el nombre de la persona más cercana para cada embedding, o 'desconocido'
+        si la distancia supera el umbral.
+        """
+        embeddings = normalizar(embeddings)
+        with self._lock:
+            indices, similitudes = self.match(embeddings, k=1)
+            if indices.shape[1] == 0:
+                return [desconocido] * embeddings.shape[0]
+
+            similitud_min = 1.0 - umbral_distancia ** 2 / 2.0
+            return [
+                self.nombres[indice] if similitud > similitud_min else desconocido
+                for indice, similitud in zip(indices[:, 0], similitudes[:, 0])
+            ]
+
+
+def guardar_snapshot(galeria, directorio, modelo):
+    """
+    Guarda la galería en 'directorio': la matriz normalizada en galeria-<version>.npy y los ids,
+    nombres y versión en galeria.json. El índice se reemplaza de forma atómica al final, así que
+    un lector siempre ve un snapshot completo; cada versión usa su propio .npy porque otros
+    procesos pueden tenerlo mapeado.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    with galeria._lock:
+        matriz = np.array(galeria.matriz)
+        nombres = list(galeria.nombres)
+        ids = list(galeria.ids)
+
+    version = time.time_ns()
+    archivo = f"galeria-{version}.npy"
+    np.save(os.path.join(directorio, archivo), matriz)
+    indice = {
+        "formato": FORMATO_SNAPSHOT,
+        "version": version,
+        "modelo": modelo,
+        "dimension": galeria.dimension,
+        "personas": len(ids),
+        "archivo": archivo,
+        "ids": ids,
+        "nombres": nombres,
+    }
+    temporal = os.path.join(directorio, f"{INDICE_SNAPSHOT}.{os.getpid()}.tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False)
+    os.replace(temporal, os.path.join(directorio, INDICE_SNAPSHOT))
+
+    # Versiones anteriores (con margen para no borrar la de otro proceso que aún no publica su índice)
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre.startswith("galeria-") and nombre.endswith(".npy") and nombre != archivo:
+            try:
+                if time.time() - os.path.getmtime(ruta) > 60:
+                    os.remove(ruta)
+            except OSError:
+                pass  # Mapeado por otro proceso (Windows): se borra en una próxima versión
+    return version
+
+
+def cargar_snapshot(directorio, modelo, dimension, indice=None):
+    """
+    Abre el snapshot de 'directorio' mapeando la matriz en memoria (sin leerla completa).
+    Devuelve None si no existe o no corresponde al formato, modelo o dimensión actuales.
+    """
+    ruta = os.path.join(directorio, INDICE_SNAPSHOT)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    if (datos.get("formato") != FORMATO_SNAPSHOT or datos.get("modelo") != modelo
+            or datos.get("dimension") != dimension):
+        return None
+
+    archivo = os.path.join(directorio, datos["archivo"])
+    matriz = np.load(archivo, mmap_mode="r") if datos["personas"] else np.load(archivo)
+    if matriz.shape != (datos["personas"], dimension) or len(datos["ids"]) != datos["personas"]:
+        return None
+
+    galeria = GaleriaRostros(dimension=dimension, capacidad=1, indice=indice)
+    galeria.usar_matriz(matriz, datos["nombres"], datos["ids"])
+    return galeria
@@ -0,0 +1,190 @@
+# frame_bus.py
+import time
+import threading
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory
+
+# Cabecera: [seq_global] seguido de [seq, alto, ancho, canales] por cada slot
+_CAMPOS_SLOT = 4
+
+
+class AnilloFrames:
+    """
+    Buffer circular de frames en memoria compartida (sin pickle ni proceso Manager).
+
+    El productor escribe cada frame en el siguiente slot y publica un número de secuencia;
+    los consumidores mapean el mismo bloque y leen el slot más reciente. Varios consumidores
+    pueden leer el mismo frame sin quitárselo entre ellos.
+
+    Cada escritura toca un 'timbre' compartido entre procesos (un semáforo acotado a 1 que el
+    productor libera sin esperar nunca a los consumidores: si un consumidor se detiene o muere,
+    el productor no se entera). En el proceso consumidor un hilo despachador espera el timbre y
+    despierta a los hilos bloqueados en esperar(), que vuelven a consultar 'seq'; así no hace
+    falta consultar el anillo periódicamente.
+    """
+
+    def __init__(self, nombre=None, slots=4, max_alto=1080, max_ancho=1920, canales=3, crear=True, timbre=None):
+        self.slots = slots
+        self.max_alto = max_alto
+        self.max_ancho = max_ancho
+        self.canales = canales
+        self.tam_slot = max_alto * max_ancho * canales
+        self._crear = crear
+        # Solo se comparte con los procesos que reciben el anillo al crearse (argumentos de Process)
+        self._timbre = timbre
+        if crear and timbre is None:
+            self._timbre = multiprocessing.BoundedSemaphore(1)
+            self._timbre.acquire()  # Sin aviso pendiente
+        # Locales a cada proceso consumidor (no se comparten)
+        self._condicion = threading.Condition()
+        self._despachador = None
+
+        bytes_cabecera = 8 * (1 + slots * _CAMPOS_SLOT)
+        bytes_cabecera += (-bytes_cabecera) % 64  # Alinear el inicio de los datos
+        tam_total = bytes_cabecera + slots * self.tam_slot
+
+        if crear:
+            self.shm = shared_memory.SharedMemory(name=nombre, create=True, size=tam_total)
+        else:
+            self.shm = shared_memory.SharedMemory(name=nombre)
+        self.nombre = self.shm.name
+
+        self._cabecera = np.ndarray((1 + slots * _CAMPOS_SLOT,), dtype=np.int64, buffer=self.shm.buf)
+        self._meta = self._cabecera[1:].reshape(slots, _CAMPOS_SLOT)
+        self._datos = np.ndarray((slots, self.tam_slot), dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=bytes_cabecera)
+        if crear:
+            self._cabecera[:] = 0
+
+    # Al pasar el anillo a otro proceso solo viaja el nombre; el hijo se vuelve a adjuntar
+    def __getstate__(self):
+        return {
+            "nombre": self.nombre, "slots": self.slots, "max_alto": self.max_alto,
+            "max_ancho": self.max_ancho, "canales": self.canales, "timbre": self._timbre,
+        }
+
+    def __setstate__(self, estado):
+        self.__init__(crear=False, **estado)
+
+    @property
+    def seq(self):
+        """
+        Número de secuencia del último frame publicado (0 si aún no hay ninguno).
+        """
+        return int(self._cabecera[0])
+
+    def escribir(self, frame):
+        """
+        Copia el frame en el siguiente slot y lo publica. Devuelve su número de secuencia.
+        """
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        alto, ancho, canales = frame.shape
+        if alto > self.max_alto or ancho > self.max_ancho or canales != self.canales:
+            frame = self._ajustar(frame)
+            alto, ancho, canales = frame.shape
+
+        seq = int(self._cabecera[0]) + 1
+        slot = seq % self.slots
+        meta = self._meta[slot]
+
+        meta[0] = -1  # Marca el slot como "en escritura"
+        destino = self._datos[slot, :alto * ancho * canales].reshape(alto, ancho, canales)
+        np.copyto(destino, frame)
+        meta[1], meta[2], meta[3] = alto, ancho, canales
+        meta[0] = seq
+        self._cabecera[0] = seq
+        if self._timbre is not None:
+            try:
+                self._timbre.release()  # Nunca bloquea
+            except ValueError:
+                pass  # Ya había un aviso sin atender; el consumidor leerá el seq más reciente
+        return seq
+
+    def esperar(self, ultimo_seq, timeout=None):
+        """
+        Bloquea hasta que se publique un frame más nuevo que 'ultimo_seq' o venza 'timeout'.
+        Devuelve True si hay un frame nuevo.
+        """
+        if self._timbre is None:
+            # Anillo adjuntado sin el timbre compartido: consulta cada 5 ms
+            limite = None if timeout is None else time.time() + timeout
+            while self.seq == ultimo_seq:
+                if limite is not None and time.time() >= limite:
+                    return False
+                time.sleep(0.005)
+            return True
+        with self._condicion:
+            if self._despachador is None:
+                self._despachador = threading.Thread(target=self._despachar, name=f"timbre-{self.nombre}",
+                                                     daemon=True)
+                self._despachador.start()
+            return self._condicion.wait_for(lambda: self.seq != ultimo_seq, timeout)
+
+    def _despachar(self):
+        # Un solo hilo por proceso consume el timbre y despierta a todos los que esperan. El
+        # tiempo límite cubre un aviso tomado por otro proceso consumidor del mismo anillo.
+        while self._cabecera is not None:
+            self._timbre.acquire(timeout=0.1)
+            with self._condicion:
+                self._condicion.notify_all()
+
+    def mapear(self, seq):
+        """
+        Devuelve una vista (sin copia) del frame 'seq', o None si ya fue sobrescrito.
+        Tras usar la vista hay que comprobar 'vigente(seq)' para descartar lecturas a medias.
+        """
+        meta = self._meta[seq % self.slots]
+        if int(meta[0]) != seq:
+            return None
+        alto, ancho, canales = int(meta[1]), int(meta[2]), int(meta[3])
+        return self._datos[seq % self.slots, :alto * ancho * canales].reshape(alto, ancho, canales)
+
+    def vigente(self, seq):
+        """
+        Indica si el slot del frame 'seq' todavía contiene ese frame.
+        """
+        return int(self._meta[seq % self.slots][0]) == seq
+
+    def leer_ultimo(self, ultimo_seq=0, copiar=True):
+        """
+        Devuelve (seq, frame) con el frame más reciente si es más nuevo que 'ultimo_seq';
+        en otro caso devuelve (ultimo_seq, None).
+        """
+        for _ in range(3):
+            seq = self.seq
+            if seq == 0 or seq == ultimo_seq:
+                return ultimo_seq, None
+            vista = self.mapear(seq)
+            if vista is None:
+                continue
+            frame = vista.copy() if copiar else vista
+            if self.vigente(seq):
+                return seq, frame
+        return ultimo_seq, None
+
+    def _ajustar(self, frame):
+        import cv2
+        if frame.shape[2] != self.canales:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR) if frame.shape[2] == 1 else frame[:, :, :self.canales]
+        alto, ancho = frame.shape[:2]
+        escala = min(self.max_alto / alto, self.max_ancho / ancho, 1.0)
+        if escala < 1.0:
+            frame = cv2.resize(frame, (int(ancho * escala), int(alto * escala)), interpolation=cv2.INTER_AREA)
+        return frame
+
+    def cerrar(self):
+        """
+        Libera el mapeo en este proceso.
+        """
+        self._cabecera = self._meta = self._datos = None
+        self.shm.close()
+
+    def liberar(self):
+        """
+        Cierra y elimina el bloque de memoria compartida (solo el proceso que lo creó).
+        """
+        self.cerrar()
+        if self._crear:
+            self.shm.unlink()
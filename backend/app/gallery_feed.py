@@ -0,0 +1,39 @@
+# gallery_feed.py
+import numpy as np
+
+# Tipos de cambio que Flask publica sobre la tabla personas
+AGREGAR = "agregar"      # Alta o reactivación (incluye el embedding)
+ELIMINAR = "eliminar"    # Baja, inactivación o borrado
+RENOMBRAR = "renombrar"  # Cambio de nombre de una persona activa
+
+
+def publicar(colas, operacion, id_persona, nombre=None, embedding=None):
+    """
+    Envía un cambio de la galería a cada proceso de detección (una cola por proceso).
+    El embedding viaja como bytes float32, igual que se guarda en la base de datos.
+    """
+    cambio = {
+        "op": operacion,
+        "id": int(id_persona),
+        "nombre": nombre,
+        "embedding": None if embedding is None else np.asarray(embedding, dtype=np.float32).tobytes(),
+    }
+    for cola in colas:
+        cola.put(cambio)
+
+
+def aplicar(galeria, cambio):
+    """
+    Aplica un cambio a la galería en memoria (solo toca la fila de esa persona).
+    Los cambios son idempotentes: se pueden repetir sin efecto adicional.
+    """
+    operacion = cambio["op"]
+    if operacion == AGREGAR:
+        galeria.agregar(cambio["id"], cambio["nombre"], np.frombuffer(cambio["embedding"], dtype=np.float32))
+        return True
+    if operacion == ELIMINAR:
+        return galeria.eliminar(cambio["id"])
+    if operacion == RENOMBRAR:
+        return galeria.renombrar(cambio["id"], cambio["nombre"])
+    print(f"[WARNING] Cambio de galería desconocido: {operacion}")
+    return False
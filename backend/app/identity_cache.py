@@ -0,0 +1,137 @@
+# identity_cache.py
+
+
+def iou(a, b):
+    """
+    Intersección sobre unión de dos cajas (x1, y1, x2, y2).
+    """
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _area(bbox):
+    return max(0.0, bbox[2] - bbox[0]) * max(0.0, bbox[3] - bbox[1])
+
+
+class CacheIdentidades:
+    """
+    Recuerda, por track de una cámara, la última identidad reconocida para no recalcular el
+    embedding ni compararlo con la galería en cada frame.
+
+    Cada rostro detectado se asocia por IoU a la última caja de un track. Un track con nombre
+    conocido se vuelve a verificar cada 'reverificar' inferencias, o antes si su rostro se ve
+    claramente mejor (caja 'mejora_tamano' veces más grande o score de detección
+    'mejora_score' más alto). Un track desconocido se reintenta con espera exponencial entre
+    'reintento_min' y 'reintento_max' inferencias.
+
+    También guarda el último embedding de cada track, que el tracker reutiliza como
+    descriptor de apariencia en los frames en que no se recalcula.
+    """
+
+    def __init__(self, camara_id, reverificar=30, mejora_tamano=1.5, mejora_score=0.1,
+                 reintento_min=2, reintento_max=32, iou_min=0.5, desconocido="Desconocido"):
+        self.camara_id = camara_id
+        self.reverificar = reverificar
+        self.mejora_tamano = mejora_tamano
+        self.mejora_score = mejora_score
+        self.reintento_min = reintento_min
+        self.reintento_max = reintento_max
+        self.iou_min = iou_min
+        self.desconocido = desconocido
+        self._entradas = {}  # track_id -> estado del reconocimiento
+        self.aciertos = 0
+        self.fallos = 0
+
+    def asociar(self, bboxes):
+        """
+        Asocia cada caja detectada al track cuya última caja más se le superpone (una caja por
+        track, de mayor a menor IoU). Devuelve una lista con el track_id o None por caja.
+        """
+        pares = []
+        for i, bbox in enumerate(bboxes):
+            for track_id, entrada in self._entradas.items():
+                superposicion = iou(bbox, entrada["bbox"])
+                if superposicion >= self.iou_min:
+                    pares.append((superposicion, i, track_id))
+
+        asociados = [None] * len(bboxes)
+        usados = set()
+        for _, i, track_id in sorted(pares, key=lambda par: -par[0]):
+            if asociados[i] is None and track_id not in usados:
+                asociados[i] = track_id
+                usados.add(track_id)
+        return asociados
+
+    def consultar(self, track_id, bbox, det_score):
+        """
+        Devuelve el nombre en caché si el rostro no necesita reconocerse en este frame,
+        o None si hay que calcular su embedding.
+        """
+        entrada = self._entradas.get(track_id) if track_id is not None else None
+        if entrada is None or entrada["nombre"] is None:
+            self.fallos += 1
+            return None
+
+        entrada["frames"] += 1
+        if entrada["nombre"] == self.desconocido:
+            vigente = entrada["frames"] < entrada["espera"]
+        else:
+            vigente = (
+                entrada["frames"] < self.reverificar
+                and _area(bbox) < entrada["area"] * self.mejora_tamano
+                and det_score < entrada["score"] + self.mejora_score
+            )
+
+        if vigente:
+            self.aciertos += 1
+            return entrada["nombre"]
+        self.fallos += 1
+        return None
+
+    def embedding(self, track_id):
+        """
+        Último embedding calculado para el track (None si no hay).
+        """
+        entrada = self._entradas.get(track_id) if track_id is not None else None
+        return entrada["embedding"] if entrada is not None else None
+
+    def registrar(self, track_id, bbox, nombre=None, det_score=0.0, embedding=None):
+        """
+        Actualiza el track tras el tracker con la caja de su detección. 'nombre' y 'embedding'
+        son el resultado del reconocimiento si se calculó en este frame (None: solo se
+        actualiza la caja).
+        """
+        entrada = self._entradas.setdefault(
+            track_id, {"bbox": bbox, "nombre": None, "area": 0.0, "score": 0.0, "frames": 0, "intentos": 0,
+                       "espera": 0, "embedding": None}
+        )
+        entrada["bbox"] = bbox
+        if embedding is not None:
+            entrada["embedding"] = embedding
+        if nombre is None:
+            return
+
+        entrada["nombre"] = nombre
+        entrada["area"] = _area(bbox)
+        entrada["score"] = det_score
+        entrada["frames"] = 0
+        if nombre == self.desconocido:
+            entrada["intentos"] += 1
+            entrada["espera"] = min(self.reintento_max, self.reintento_min * 2 ** (entrada["intentos"] - 1))
+        else:
+            entrada["intentos"] = 0
+
+    def podar(self, track_ids_vivos):
+        """
+        Olvida los tracks que el tracker ya eliminó.
+        """
+        vivos = set(track_ids_vivos)
+        for track_id in [track_id for track_id in self._entradas if track_id not in vivos]:
+            del self._entradas[track_id]
+
+    def porcentaje_aciertos(self):
+        total = self.aciertos + self.fallos
+        return 100.0 * self.aciertos / total if total else 0.0
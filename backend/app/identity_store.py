@@ -0,0 +1,94 @@
+# identity_store.py
+import time
+import threading
+from collections import OrderedDict
+from . import metrics
+
+_FALTA = object()
+
+
+class AlmacenIdentidades:
+    """
+    Nombre asignado a cada track ("camara/track_id"), local al proceso de detección.
+
+    Reemplaza al diccionario del Manager, donde cada consulta era una llamada entre procesos.
+    Una entrada vive mientras su track se siga usando: caduca 'ttl' segundos después del último
+    acceso, y si se superan 'max_entradas' se descarta la usada hace más tiempo (LRU), así que
+    la memoria no crece con los días. Otros procesos ven instantáneas publicadas en segundo plano.
+
+    Se usa como un diccionario (in, [], get, asignación).
+    """
+
+    def __init__(self, ttl=60.0, max_entradas=10_000):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()  # clave -> (nombre, último acceso); el menos reciente primero
+        self._lock = threading.Lock()
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    def _purgar(self, now):
+        # Las entradas están ordenadas por último acceso: se recorren solo las vencidas
+        while self._datos:
+            _, visto = next(iter(self._datos.values()))
+            if now - visto <= self.ttl:
+                break
+            self._datos.popitem(last=False)
+            self.expiradas += 1
+
+    def __contains__(self, clave):
+        with self._lock:
+            self._purgar(time.time())
+            return clave in self._datos
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
+
+    def get(self, clave, predeterminado=None):
+        with self._lock:
+            now = time.time()
+            self._purgar(now)
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return predeterminado
+            self._datos[clave] = (entrada[0], now)
+            self._datos.move_to_end(clave)
+            return entrada[0]
+
+    def __getitem__(self, clave):
+        nombre = self.get(clave, _FALTA)
+        if nombre is _FALTA:
+            raise KeyError(clave)
+        return nombre
+
+    def __setitem__(self, clave, nombre):
+        with self._lock:
+            now = time.time()
+            self._datos[clave] = (nombre, now)
+            self._datos.move_to_end(clave)
+            self._purgar(now)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.desalojadas += 1
+
+    def instantanea(self):
+        """
+        Copia {clave: nombre} de las entradas vigentes.
+        """
+        with self._lock:
+            self._purgar(time.time())
+            return {clave: nombre for clave, (nombre, _) in self._datos.items()}
+
+    def iniciar_publicacion(self, destino, clave, intervalo=5.0):
+        """
+        Publica periódicamente la instantánea en destino[clave] desde un hilo en segundo plano.
+        """
+        return metrics.publicar_periodicamente(destino, clave, self._publicable, intervalo, "publicar-identidades")
+
+    def _publicable(self):
+        instantanea = self.instantanea()
+        metrics.fijar("identidades.entradas", len(instantanea))
+        metrics.fijar("identidades.expiradas", self.expiradas)
+        metrics.fijar("identidades.desalojadas", self.desalojadas)
+        return instantanea
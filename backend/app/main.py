@@ -1,55 +1,110 @@
 # main.py
 import multiprocessing
 from .shared import get_reload_flag
+from .frame_bus import AnilloFrames
+from .camera_registry import cargar_camaras, STREAMS
+from . import config
 
-def run_flask(shared_flag):
+def run_flask(shared_flag, cambios_galeria):
     from . import create_app
     flask_app = create_app()
-    # Inyecta el flag compartido en la configuración
+    # Inyecta el flag compartido y las colas de cambios de la galería en la configuración
     flask_app.config['reload_encodings_flag'] = shared_flag
+    flask_app.config['cambios_galeria'] = cambios_galeria
     flask_app.run(host="0.0.0.0", port=5000)
 
-def run_fastapi(pose_queue, object_queue, face_queue, event_queue):
+def run_fastapi(camaras, rings, event_queue, metricas):
     from .app_fastapi import set_queues
     from .app_fastapi import app as fastapi_app
     import uvicorn
-    set_queues(pose_queue, object_queue, face_queue, event_queue)
+    set_queues(camaras, rings, event_queue, metricas)
     uvicorn.run(fastapi_app, host="0.0.0.0", port=8000)
 
-def run_camera_handler(pose_queue, object_queue, face_queue, event_queue, detection_history, track_id_to_name, reload_encodings_flag):
+def run_camera_handler(camara, pose_ring, object_ring, face_ring, event_queue, detection_history, track_id_to_name, reload_encodings_flag, cambios_galeria, metricas):
     from .camera_handler import set_queues, capturar_frames
+    from . import metrics
+    metrics.set_destino(metricas, f"detector-{camara['id']}")
     # Se pasa el flag compartido a la función set_queues para que esté disponible en el módulo de detección
-    set_queues(pose_queue, object_queue, face_queue, event_queue, detection_history, track_id_to_name, reload_encodings_flag)
-    capturar_frames()
+    set_queues(event_queue, detection_history, track_id_to_name, reload_encodings_flag, cambios_galeria)
+    capturar_frames(camara, pose_ring, object_ring, face_ring)
+
+def run_batch_handler(camaras, rings, event_queue, detection_history, track_id_to_name, reload_encodings_flag, cambios_galeria, metricas):
+    from .camera_handler import set_queues, capturar_camaras
+    from . import metrics
+    metrics.set_destino(metricas, "detector")
+    set_queues(event_queue, detection_history, track_id_to_name, reload_encodings_flag, cambios_galeria)
+    capturar_camaras(camaras, rings)
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
 
     manager = multiprocessing.Manager()
-    pose_queue    = manager.Queue(maxsize=10)
-    object_queue  = manager.Queue(maxsize=10)
-    face_queue    = manager.Queue(maxsize=10)
     event_queue   = manager.Queue(maxsize=50)
 
+    camaras = cargar_camaras()
+    print(f"[INFO] Cámaras registradas: {[camara['id'] for camara in camaras]}")
+
+    # Los frames anotados viajan por anillos en memoria compartida (sin pickle ni Manager),
+    # uno por cámara y stream: rings[(camara_id, stream)]
+    rings = {
+        (camara["id"], stream): AnilloFrames(
+            slots=config.BUS_SLOTS, max_alto=config.BUS_MAX_ALTO, max_ancho=config.BUS_MAX_ANCHO
+        )
+        for camara in camaras
+        for stream in STREAMS
+    }
+
+    # Historial anti-rebote de eventos de cada proceso de detección (instantáneas periódicas)
     detection_history = manager.dict()
+    # Instantáneas de las identidades por track de cada proceso de detección (se publican
+    # periódicamente; cada proceso trabaja con su propio almacén local)
     track_id_to_name  = manager.dict()
 
-    # Aquí se crea el flag compartido: un valor booleano inicializado en False
+    # Métricas publicadas por cada proceso (FPS por analizador, etc.), consultables en /metrics
+    metricas = manager.dict()
+
+    # Aquí se crea el flag compartido: un contador de versión de los encodings (inicia en 0)
     reload_encodings_flag = get_reload_flag()
 
-    flask_process = multiprocessing.Process(target=run_flask, args=(reload_encodings_flag,))
+    # Cambios de la galería (altas, bajas, renombres): Flask los publica en una cola
+    # por proceso de detección y cada uno los aplica a su galería en memoria
+    num_detectores = 1 if config.BATCH_ENTRE_CAMARAS else len(camaras)
+    cambios_galeria = [manager.Queue() for _ in range(num_detectores)]
+
+    flask_process = multiprocessing.Process(target=run_flask, args=(reload_encodings_flag, cambios_galeria))
     fastapi_process = multiprocessing.Process(
-        target=run_fastapi, args=(pose_queue, object_queue, face_queue, event_queue)
-    )
-    detection_process = multiprocessing.Process(
-        target=run_camera_handler,
-        args=(pose_queue, object_queue, face_queue, event_queue, detection_history, track_id_to_name, reload_encodings_flag)
+        target=run_fastapi, args=(camaras, rings, event_queue, metricas)
     )
+    if config.BATCH_ENTRE_CAMARAS:
+        # Un solo proceso para todas las cámaras: YOLO infiere en lotes
+        detection_processes = [
+            multiprocessing.Process(
+                target=run_batch_handler,
+                args=(camaras, rings, event_queue, detection_history, track_id_to_name, reload_encodings_flag,
+                      cambios_galeria[0], metricas)
+            )
+        ]
+    else:
+        # Un proceso de detección por cámara: el sistema escala por núcleos al agregar cámaras
+        detection_processes = [
+            multiprocessing.Process(
+                target=run_camera_handler,
+                args=(camara, rings[(camara["id"], "poses")], rings[(camara["id"], "objects")], rings[(camara["id"], "faces")],
+                      event_queue, detection_history, track_id_to_name, reload_encodings_flag, cambios, metricas)
+            )
+            for camara, cambios in zip(camaras, cambios_galeria)
+        ]
 
     flask_process.start()
     fastapi_process.start()
-    detection_process.start()
+    for detection_process in detection_processes:
+        detection_process.start()
 
-    flask_process.join()
-    fastapi_process.join()
-    detection_process.join()
+    try:
+        flask_process.join()
+        fastapi_process.join()
+        for detection_process in detection_processes:
+            detection_process.join()
+    finally:
+        for ring in rings.values():
+            ring.liberar()
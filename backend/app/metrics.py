@@ -0,0 +1,143 @@
+# metrics.py
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Valores locales del proceso (clave -> número)
+_valores = {}
+_lock = threading.Lock()
+
+# Diccionario compartido (Manager) donde se publican las métricas de cada proceso
+_destino = None
+_nombre_proceso = "detector"
+
+
+def set_destino(p_destino, nombre_proceso):
+    """
+    Configura el diccionario compartido y el nombre con el que este proceso publica sus métricas.
+    """
+    global _destino, _nombre_proceso
+    _destino = p_destino
+    _nombre_proceso = nombre_proceso
+
+
+def nombre_proceso():
+    """
+    Nombre con el que este proceso publica en los diccionarios compartidos.
+    """
+    return _nombre_proceso
+
+
+def fijar(clave, valor):
+    """
+    Asigna el valor actual de una métrica.
+    """
+    with _lock:
+        _valores[clave] = valor
+
+
+def incrementar(clave, n=1):
+    """
+    Incrementa un contador.
+    """
+    with _lock:
+        _valores[clave] = _valores.get(clave, 0) + n
+
+
+def instantanea():
+    """
+    Devuelve una copia de las métricas locales.
+    """
+    with _lock:
+        return dict(_valores)
+
+
+class MedidorTasa:
+    """
+    Mide cuántas veces por segundo ocurre algo, sobre una ventana deslizante.
+    """
+
+    def __init__(self, ventana=2.0):
+        self.ventana = ventana
+        self._marcas = deque()
+
+    def marcar(self):
+        """
+        Registra una ocurrencia y devuelve la tasa actual.
+        """
+        now = time.time()
+        self._marcas.append(now)
+        while self._marcas and now - self._marcas[0] > self.ventana:
+            self._marcas.popleft()
+        return self.tasa(now)
+
+    def tasa(self, now=None):
+        if now is None:
+            now = time.time()
+        if len(self._marcas) < 2:
+            return 0.0
+        transcurrido = max(now - self._marcas[0], 1e-6)
+        return (len(self._marcas) - 1) / transcurrido
+
+
+async def medir_retraso_bucle(intervalo=0.1, ventana=50):
+    """
+    Corrutina que mide cuánto se atrasa el bucle de asyncio: duerme 'intervalo' segundos y
+    registra el exceso (tiempo en que el bucle estuvo ocupado con otra cosa). Publica el
+    último valor y el máximo de las últimas 'ventana' muestras.
+    """
+    muestras = deque(maxlen=ventana)
+    while True:
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        retraso = max(0.0, time.perf_counter() - inicio - intervalo) * 1000
+        muestras.append(retraso)
+        fijar("bucle.retraso_ms", retraso)
+        fijar("bucle.retraso_max_ms", max(muestras))
+
+
+def _bucle_publicador(intervalo, imprimir):
+    while True:
+        time.sleep(intervalo)
+        valores = instantanea()
+        if _destino is not None:
+            try:
+                _destino[_nombre_proceso] = valores
+            except Exception as e:
+                print(f"[ERROR] No se pudieron publicar las métricas: {e}")
+        if imprimir and valores:
+            resumen = " | ".join(
+                f"{clave}: {valor:.2f}" if isinstance(valor, float) else f"{clave}: {valor}"
+                for clave, valor in sorted(valores.items())
+            )
+            print(f"[INFO] Métricas {_nombre_proceso} -> {resumen}")
+
+
+def iniciar_publicador(intervalo, imprimir=True):
+    """
+    Lanza un hilo que publica periódicamente las métricas en el diccionario compartido.
+    """
+    hilo = threading.Thread(target=_bucle_publicador, args=(intervalo, imprimir), daemon=True)
+    hilo.start()
+    return hilo
+
+
+def _bucle_publicacion(destino, clave, obtener, intervalo):
+    while True:
+        time.sleep(intervalo)
+        try:
+            destino[clave] = obtener()
+        except Exception as e:
+            print(f"[ERROR] No se pudo publicar {clave}: {e}")
+
+
+def publicar_periodicamente(destino, clave, obtener, intervalo, nombre="publicador"):
+    """
+    Lanza un hilo que cada 'intervalo' segundos guarda obtener() en destino[clave]
+    (un diccionario del Manager: una sola llamada entre procesos por intervalo).
+    """
+    hilo = threading.Thread(target=_bucle_publicacion, args=(destino, clave, obtener, intervalo),
+                            name=nombre, daemon=True)
+    hilo.start()
+    return hilo
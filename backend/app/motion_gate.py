@@ -0,0 +1,96 @@
+# motion_gate.py
+import cv2
+import time
+import threading
+from . import metrics
+
+
+class DetectorMovimiento:
+    """
+    Detecta movimiento por diferencia contra un fondo promedio, sobre una versión reducida
+    y en escala de grises del frame (costo despreciable frente a los modelos).
+    """
+
+    def __init__(self, ancho=160, umbral_pixel=25, fraccion_min=0.003, alpha=0.05):
+        self.ancho = ancho
+        self.umbral_pixel = umbral_pixel  # Diferencia mínima de intensidad por píxel
+        self.fraccion_min = fraccion_min  # Fracción de píxeles que deben cambiar
+        self.alpha = alpha  # Velocidad de adaptación del fondo
+        self._fondo = None
+
+    def hay_movimiento(self, frame):
+        alto = max(1, int(frame.shape[0] * self.ancho / frame.shape[1]))
+        pequeno = cv2.resize(frame, (self.ancho, alto), interpolation=cv2.INTER_AREA)
+        gris = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY) if pequeno.ndim == 3 else pequeno
+        gris = cv2.GaussianBlur(gris, (5, 5), 0)
+
+        if self._fondo is None or self._fondo.shape != gris.shape:
+            self._fondo = gris.astype("float32")
+            return True
+
+        diferencia = cv2.absdiff(gris, cv2.convertScaleAbs(self._fondo))
+        fraccion = (diferencia > self.umbral_pixel).mean()
+        cv2.accumulateWeighted(gris, self._fondo, self.alpha)
+        return fraccion >= self.fraccion_min
+
+
+class CompuertaMovimiento:
+    """
+    Decide, por cámara, si cada analizador debe procesar el frame actual.
+
+    Con movimiento (o durante 'retencion' segundos después del último) todos corren a tasa
+    completa. Sin movimiento, cada analizador corre como máximo una vez cada
+    'intervalo_quieto' segundos (None: no corre).
+    """
+
+    def __init__(self, camara_id, detector=None, retencion=2.0, intervalo_quieto=2.0):
+        self.camara_id = camara_id
+        self.detector = detector or DetectorMovimiento()
+        self.retencion = retencion
+        self.intervalo_quieto = intervalo_quieto
+        self._lock = threading.Lock()
+        self._ultimo_frame_id = None
+        self._ultimo_movimiento = 0.0
+        self._ultima_ejecucion = {}
+        self._procesados = {}
+        self._omitidos = {}
+
+    def hay_movimiento(self, frame_id, frame):
+        """
+        Evalúa el frame una sola vez aunque lo consulten varios analizadores.
+        """
+        with self._lock:
+            if frame_id != self._ultimo_frame_id:
+                self._ultimo_frame_id = frame_id
+                if self.detector.hay_movimiento(frame):
+                    self._ultimo_movimiento = time.time()
+            return time.time() - self._ultimo_movimiento <= self.retencion
+
+    def permitir(self, tipo, frame_id, frame):
+        """
+        Indica si el analizador 'tipo' puede ejecutar su modelo sobre este frame. No registra
+        nada: la decisión final (que puede depender de otros filtros) se informa con registrar().
+        """
+        if self.hay_movimiento(frame_id, frame):
+            return True
+        if self.intervalo_quieto is None:
+            return False
+        return time.time() - self._ultima_ejecucion.get(tipo, 0.0) >= self.intervalo_quieto
+
+    def registrar(self, tipo, procesado):
+        """
+        Registra si el analizador finalmente procesó el frame (cuenta para 'intervalo_quieto'
+        y para el porcentaje de frames omitidos).
+        """
+        if procesado:
+            self._ultima_ejecucion[tipo] = time.time()
+            self._procesados[tipo] = self._procesados.get(tipo, 0) + 1
+        else:
+            self._omitidos[tipo] = self._omitidos.get(tipo, 0) + 1
+
+        metrics.fijar(f"{self.camara_id}.{tipo}.omitidos_pct", self.porcentaje_omitido(tipo))
+
+    def porcentaje_omitido(self, tipo):
+        omitidos = self._omitidos.get(tipo, 0)
+        total = omitidos + self._procesados.get(tipo, 0)
+        return 100.0 * omitidos / total if total else 0.0
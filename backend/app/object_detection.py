@@ -11,11 +11,34 @@ device = 'cuda' if torch.cuda.is_available() else 'cpu'
 model.to(device)
 model.conf = 0.25  # Ajusta el umbral de confianza
 
-def procesar_objetos(frame, prev_time, track_id_to_name):
+# Planificador de lotes entre cámaras (None: se infiere frame por frame)
+planificador = None
+
+# Último resultado por cámara, para redibujarlo en los frames que no se infieren
+ultimos_resultados = {}
+
+def usar_planificador(p_planificador):
+    """
+    Envía las inferencias a un PlanificadorLotes compartido por varias cámaras.
+    """
+    global planificador
+    planificador = p_planificador
+
+def predecir_lote(frames):
+    """
+    Ejecuta una sola inferencia sobre una lista de frames y devuelve un resultado por frame.
+    """
+    return model.predict(frames, device=device, verbose=False)
+
+def procesar_objetos(frame, prev_time, track_id_to_name, camara_id=None):
     """
     Procesa un frame para detectar objetos y los anota.
     """
-    results = model.predict(frame, device=device, verbose=False)
+    if planificador is not None:
+        results = [planificador.inferir(frame)]
+    else:
+        results = model.predict(frame, device=device, verbose=False)
+    ultimos_resultados[camara_id] = results[0]
     annotated_frame = results[0].plot()  # Renderiza las detecciones en el frame
     
     eventos = []
@@ -28,3 +51,12 @@ def procesar_objetos(frame, prev_time, track_id_to_name):
             eventos.append({"etiqueta": etiqueta, "confianza": confianza.item()})
 
     return annotated_frame, eventos, prev_time
+
+def redibujar_objetos(frame, camara_id=None):
+    """
+    Dibuja sobre el frame las últimas detecciones de la cámara, sin ejecutar el modelo.
+    """
+    resultado = ultimos_resultados.get(camara_id)
+    if resultado is None:
+        return frame
+    return resultado.plot(img=frame)
@@ -1,5 +1,6 @@
 import os
 import cv2
+import time
 import torch
 import numpy as np
 from ultralytics import YOLO
@@ -14,6 +15,27 @@ device = 'cuda' if torch.cuda.is_available() else 'cpu'
 model = YOLO(model_path).to(device)
 model.conf = 0.25  # Ajusta el umbral de confianza si lo consideras necesario
 
+# Planificador de lotes entre cámaras (None: se infiere frame por frame)
+planificador = None
+
+# Últimos keypoints por cámara, para redibujarlos en los frames que no se infieren
+ultimas_poses = {}
+# Momento de la última inferencia por cámara
+tiempos_poses = {}
+
+def usar_planificador(p_planificador):
+    """
+    Envía las inferencias a un PlanificadorLotes compartido por varias cámaras.
+    """
+    global planificador
+    planificador = p_planificador
+
+def predecir_lote(frames):
+    """
+    Ejecuta una sola inferencia sobre una lista de frames y devuelve un resultado por frame.
+    """
+    return model.predict(frames, device=device, verbose=False)
+
 # ---------------------------------------------------
 # 2. Funciones auxiliares
 # ---------------------------------------------------
@@ -244,26 +266,21 @@ def detectar_actividad(keypoints):
 # ---------------------------------------------------
 # 4. Función principal de procesar cada frame
 # ---------------------------------------------------
-def procesar_frame(frame, prev_time, track_id_to_name):
+def procesar_frame(frame, prev_time, track_id_to_name, camara_id=None):
     """
     1. Aplica el modelo YOLO para detectar keypoints de cada persona en el frame.
     2. Determina la actividad y dibuja la etiqueta correspondiente en la imagen.
     3. Dibuja keypoints y líneas conectándolos para cada persona detectada.
     4. Retorna la imagen anotada y una lista de eventos (todos menos "Normal").
     """
-    # Realizar la predicción con el modelo YOLO
-    results = model.predict(frame, device=device, verbose=False)
-
-    # Crear una copia del frame para anotarlo
-    annotated_frame = frame.copy()
-
-    # Lista para almacenar los eventos detectados
-    eventos = []
-
-    # Colores para keypoints y líneas
-    keypoint_color = (0, 255, 0)  # Verde
-    line_color = (255, 0, 0)  # Azul
-
+    # Realizar la predicción con el modelo YOLO (en lote con otras cámaras si hay planificador)
+    if planificador is not None:
+        results = [planificador.inferir(frame)]
+    else:
+        results = model.predict(frame, device=device, verbose=False)
+
+    # Extraer los keypoints de cada persona detectada
+    personas = []
     for result in results:
         if result.keypoints is not None:
             # Obtener los keypoints detectados y convertirlos a numpy
@@ -275,48 +292,104 @@ def procesar_frame(frame, prev_time, track_id_to_name):
                     person_keypoints = person_keypoints[0]
 
                 if person_keypoints.shape == (17, 3):
-                    # Dibuja los keypoints como círculos en la imagen
-                    for kp in person_keypoints:
-                        x, y, conf = kp
-                        if conf > 0.5:  # Solo dibujar keypoints confiables
-                            cv2.circle(annotated_frame, (int(x), int(y)), 5, keypoint_color, -1)
-
-                    # Conexiones entre keypoints para formar un esqueleto
-                    skeleton_connections = [
-                        (5, 6), (5, 11), (6, 12), (11, 12),  # Hombros y caderas
-                        (5, 7), (7, 9), (6, 8), (8, 10),      # Brazos
-                        (11, 13), (13, 15), (12, 14), (14, 16) # Piernas
-                    ]
-
-                    for start, end in skeleton_connections:
-                        if person_keypoints[start][2] > 0.5 and person_keypoints[end][2] > 0.5:
-                            x1, y1 = person_keypoints[start][:2]
-                            x2, y2 = person_keypoints[end][:2]
-                            cv2.line(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), line_color, 2)
-
-                    # Determinar la actividad basada en los keypoints
-                    actividad, confianza = detectar_actividad(person_keypoints)
-
-                    # Calcular el centro de los hombros y caderas para posicionar el texto
-                    puntos_clave_indices = [5, 6, 11, 12]
-                    subset_points = person_keypoints[puntos_clave_indices, :2]
-                    centro_x = int(np.mean(subset_points[:, 0]))
-                    centro_y = int(np.mean(subset_points[:, 1]))
-
-                    # Dibujar la actividad detectada en la imagen
-                    cv2.putText(
-                        annotated_frame,
-                        actividad + f" ({confianza:.2f})",
-                        (centro_x, centro_y),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8,
-                        (0, 255, 255),
-                        2
-                    )
-
-                    # Registrar el evento si la actividad no es "Normal"
-                    if actividad != "Normal":
-                        eventos.append({"etiqueta": actividad, "confianza": confianza})
+                    personas.append(person_keypoints)
+
+    ultimas_poses[camara_id] = personas
+    tiempos_poses[camara_id] = time.time()
+
+    # Crear una copia del frame para anotarlo
+    annotated_frame, eventos = dibujar_poses(frame.copy(), personas)
 
     return annotated_frame, eventos, prev_time
 
+def redibujar_poses(frame, camara_id=None):
+    """
+    Dibuja sobre el frame las últimas poses de la cámara, sin ejecutar el modelo.
+    """
+    annotated_frame, _ = dibujar_poses(frame, ultimas_poses.get(camara_id, []))
+    return annotated_frame
+
+def dibujar_poses(annotated_frame, personas):
+    """
+    Dibuja keypoints, esqueleto y actividad de cada persona sobre el frame.
+    Retorna el frame anotado y la lista de eventos (todas las actividades menos "Normal").
+    """
+    # Lista para almacenar los eventos detectados
+    eventos = []
+
+    # Colores para keypoints y líneas
+    keypoint_color = (0, 255, 0)  # Verde
+    line_color = (255, 0, 0)  # Azul
+
+    for person_keypoints in personas:
+        # Dibuja los keypoints como círculos en la imagen
+        for kp in person_keypoints:
+            x, y, conf = kp
+            if conf > 0.5:  # Solo dibujar keypoints confiables
+                cv2.circle(annotated_frame, (int(x), int(y)), 5, keypoint_color, -1)
+
+        # Conexiones entre keypoints para formar un esqueleto
+        skeleton_connections = [
+            (5, 6), (5, 11), (6, 12), (11, 12),  # Hombros y caderas
+            (5, 7), (7, 9), (6, 8), (8, 10),      # Brazos
+            (11, 13), (13, 15), (12, 14), (14, 16) # Piernas
+        ]
+
+        for start, end in skeleton_connections:
+            if person_keypoints[start][2] > 0.5 and person_keypoints[end][2] > 0.5:
+                x1, y1 = person_keypoints[start][:2]
+                x2, y2 = person_keypoints[end][:2]
+                cv2.line(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), line_color, 2)
+
+        # Determinar la actividad basada en los keypoints
+        actividad, confianza = detectar_actividad(person_keypoints)
+
+        # Calcular el centro de los hombros y caderas para posicionar el texto
+        puntos_clave_indices = [5, 6, 11, 12]
+        subset_points = person_keypoints[puntos_clave_indices, :2]
+        centro_x = int(np.mean(subset_points[:, 0]))
+        centro_y = int(np.mean(subset_points[:, 1]))
+
+        # Dibujar la actividad detectada en la imagen
+        cv2.putText(
+            annotated_frame,
+            actividad + f" ({confianza:.2f})",
+            (centro_x, centro_y),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            (0, 255, 255),
+            2
+        )
+
+        # Registrar el evento si la actividad no es "Normal"
+        if actividad != "Normal":
+            eventos.append({"etiqueta": actividad, "confianza": confianza})
+
+    return annotated_frame, eventos
+
+def regiones_cabeza(camara_id=None, max_edad=0.5, threshold=0.3):
+    """
+    Devuelve las regiones (x1, y1, x2, y2) donde deberían estar las cabezas según las últimas
+    poses de la cámara (nariz, ojos y orejas; los hombros dan la escala).
+    Devuelve None si no hay poses recientes, para que el llamador use el frame completo.
+    """
+    if time.time() - tiempos_poses.get(camara_id, 0.0) > max_edad:
+        return None
+
+    regiones = []
+    for person_keypoints in ultimas_poses.get(camara_id, []):
+        cabeza = person_keypoints[0:5]
+        cabeza = cabeza[cabeza[:, 2] >= threshold]
+        if len(cabeza) == 0:
+            continue
+
+        centro_x, centro_y = cabeza[:, 0].mean(), cabeza[:, 1].mean()
+        # Medio lado de la región: el doble de la dispersión de los puntos de la cara
+        radio = max(np.ptp(cabeza[:, 0]), np.ptp(cabeza[:, 1])) * 2.0
+        hombro_izq, hombro_der = person_keypoints[5], person_keypoints[6]
+        if hombro_izq[2] >= threshold and hombro_der[2] >= threshold:
+            radio = max(radio, 0.9 * distancia(hombro_izq, hombro_der))
+        radio = max(radio, 24)
+
+        regiones.append((int(centro_x - radio), int(centro_y - radio), int(centro_x + radio), int(centro_y + radio)))
+    return regiones
@@ -7,6 +7,7 @@ from PIL import Image
 from insightface.app import FaceAnalysis
 from datetime import datetime
 from .db_connection import get_db_connection  # Importar conexión
+from . import config, gallery_feed
 import os
 import mysql.connector
 
@@ -14,6 +15,38 @@ import mysql.connector
 app_insightface = FaceAnalysis(providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
 app_insightface.prepare(ctx_id=0, det_size=(640, 640))  # ctx_id=0 para usar GPU
 
+def embedding_publicable(modelo, embedding):
+    """
+    Devuelve el embedding guardado (bytes float32) como vector si lo generó el modelo actual y
+    tiene la dimensión esperada; si no, None: la galería no lo puede usar y la persona debe
+    volver a registrarse.
+    """
+    if modelo != config.MODELO_EMBEDDING or not embedding or len(embedding) != config.DIMENSION_EMBEDDING * 4:
+        return None
+    return np.frombuffer(embedding, dtype=np.float32)
+
+AVISO_REREGISTRO = "El rostro registrado es de otro modelo; la persona debe volver a registrarse para ser reconocida."
+
+def notificar_cambio_galeria(operacion, id_persona, nombre=None, embedding=None):
+    """
+    Publica el cambio de una persona para que los procesos de detección actualicen solo esa
+    fila de su galería. Si no hay colas de cambios (o falla la publicación), se incrementa el
+    flag compartido para forzar una recarga completa.
+    """
+    colas = current_app.config.get('cambios_galeria')
+    if colas:
+        try:
+            gallery_feed.publicar(colas, operacion, id_persona, nombre, embedding)
+            print(f"[DEBUG] Cambio de galería publicado: {operacion} id={id_persona}")
+            return
+        except Exception as e:
+            print(f"[ERROR] No se pudo publicar el cambio de galería: {e}")
+
+    flag = current_app.config.get('reload_encodings_flag')
+    if flag is not None:
+        flag.value += 1
+        print("[DEBUG] Flag compartido activado.")
+
 def register_routes(app):
     @app.route('/register', methods=['POST'])
     def register_face():
@@ -40,10 +73,7 @@ def register_routes(app):
                 return jsonify({"error": "Se detectaron múltiples rostros en la imagen. Por favor, proporcione una imagen con un solo rostro."}), 400
 
             # Extraer el embedding del primer rostro detectado
-            encoding = faces[0].embedding
-
-            # Serializar el encoding como string para almacenar en la base de datos
-            encoding_serialized = base64.b64encode(encoding.tobytes()).decode('utf-8')
+            encoding = faces[0].embedding.astype(np.float32)
 
             # Inserción en la base de datos
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -52,22 +82,20 @@ def register_routes(app):
                 try:
                     cursor = connection.cursor()
                     query = """
-                        INSERT INTO personas (persona, encoding, fecha, estado)
-                        VALUES (%s, %s, %s, 'A')
+                        INSERT INTO personas (persona, embedding, modelo, fecha, estado)
+                        VALUES (%s, %s, %s, %s, 'A')
                     """
-                    cursor.execute(query, (name, encoding_serialized, current_time))
+                    # El embedding se guarda en binario (float32 crudo) junto con el modelo que lo generó
+                    cursor.execute(query, (name, encoding.tobytes(), config.MODELO_EMBEDDING, current_time))
                     connection.commit()
+                    persona_id = cursor.lastrowid
                 finally:
                     cursor.close()
                     connection.close()
             else:
                 return jsonify({"error": "No se pudo conectar a la base de datos."}), 500
             
-            # Obtener el flag desde la configuración de la app
-            flag = current_app.config.get('reload_encodings_flag')
-            if flag is not None:
-                flag.value = True
-                print("[DEBUG] Flag compartido activado.")
+            notificar_cambio_galeria(gallery_feed.AGREGAR, persona_id, name, encoding)
 
             return jsonify({"message": "Registro exitoso."}), 200
 
@@ -80,7 +108,8 @@ def register_routes(app):
             connection = get_db_connection()
             if connection:
                 cursor = connection.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM personas ORDER BY id ASC")
+                # Sin la columna binaria del embedding (no es serializable a JSON)
+                cursor.execute("SELECT id, persona, modelo, estado, fecha FROM personas ORDER BY id ASC")
                 records = cursor.fetchall()
                 
                 # Agrega un print de debug
@@ -271,16 +300,28 @@ def register_routes(app):
             cursor.execute(update_query, (nuevo_estado, record_id))
             conn.commit()
 
+            persona = None
+            if record_type == 'persona' and nuevo_estado == 'A':
+                cursor.execute("SELECT persona, embedding, modelo FROM personas WHERE id = %s", (record_id,))
+                persona = cursor.fetchone()
+
             cursor.close()
             conn.close()
 
-            # Obtener el flag desde la configuración de la app
-            flag = current_app.config.get('reload_encodings_flag')
-            if flag is not None:
-                flag.value = True
-                print("[DEBUG] Flag compartido activado.")
-
-            return jsonify({"message": f"Estado actualizado a {nuevo_estado}"}), 200
+            respuesta = {"message": f"Estado actualizado a {nuevo_estado}"}
+            if record_type == 'persona':
+                if persona:
+                    nombre, embedding, modelo = persona
+                    embedding = embedding_publicable(modelo, embedding)
+                    if embedding is not None:
+                        notificar_cambio_galeria(gallery_feed.AGREGAR, record_id, nombre, embedding)
+                    else:
+                        print(f"[WARNING] Persona {record_id} reactivada con un embedding de otro modelo ({modelo}); no se agrega a la galería.")
+                        respuesta["advertencia"] = AVISO_REREGISTRO
+                else:
+                    notificar_cambio_galeria(gallery_feed.ELIMINAR, record_id)
+
+            return jsonify(respuesta), 200
 
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -360,11 +401,7 @@ def register_routes(app):
             cursor.close()
             conn.close()
 
-            # Obtener el flag desde la configuración de la app
-            flag = current_app.config.get('reload_encodings_flag')
-            if flag is not None:
-                flag.value = True
-                print("[DEBUG] Flag compartido activado.")
+            notificar_cambio_galeria(gallery_feed.ELIMINAR, persona_id)
 
             print(f"Persona con ID {persona_id} eliminada exitosamente.")
             return jsonify({"message": "Persona eliminada exitosamente"}), 200
@@ -392,10 +429,12 @@ def register_routes(app):
 
             cursor = conn.cursor()
             
-            # Verificar si la persona existe
-            cursor.execute("SELECT id FROM personas WHERE id = %s", (persona_id,))
-            if not cursor.fetchone():
+            # Verificar si la persona existe (el estado previo define el cambio de la galería)
+            cursor.execute("SELECT estado, embedding, modelo FROM personas WHERE id = %s", (persona_id,))
+            anterior = cursor.fetchone()
+            if not anterior:
                 return jsonify({"error": "Persona no encontrada"}), 404
+            estado_anterior, embedding, modelo = anterior
 
             update_query = "UPDATE personas SET persona=%s, estado=%s WHERE id=%s"
             cursor.execute(update_query, (nombre, estado, persona_id))
@@ -405,13 +444,20 @@ def register_routes(app):
             cursor.close()
             conn.close()
 
-            # Obtener el flag desde la configuración de la app
-            flag = current_app.config.get('reload_encodings_flag')
-            if flag is not None:
-                flag.value = True
-                print("[DEBUG] Flag compartido activado.")
-                
-            return jsonify({"message": "Persona actualizada con éxito"}), 200
+            respuesta = {"message": "Persona actualizada con éxito"}
+            if estado != 'A':
+                notificar_cambio_galeria(gallery_feed.ELIMINAR, persona_id)
+            elif estado_anterior == 'A':
+                notificar_cambio_galeria(gallery_feed.RENOMBRAR, persona_id, nombre)
+            else:
+                embedding = embedding_publicable(modelo, embedding)
+                if embedding is not None:
+                    notificar_cambio_galeria(gallery_feed.AGREGAR, persona_id, nombre, embedding)
+                else:
+                    print(f"[WARNING] Persona {persona_id} reactivada con un embedding de otro modelo ({modelo}); no se agrega a la galería.")
+                    respuesta["advertencia"] = AVISO_REREGISTRO
+
+            return jsonify(respuesta), 200
 
         except Exception as e:
             print("Error al actualizar persona:", str(e))  # Depuración
@@ -6,7 +6,8 @@ _reload_encodings_flag = None
 def get_reload_flag():
     global _reload_encodings_flag
     if _reload_encodings_flag is None:
-        # Se crea el manager y el flag sólo una vez
+        # Se crea el manager y el flag sólo una vez.
+        # Es un contador de versión: cada proceso de cámara recarga cuando cambia.
         manager = multiprocessing.Manager()
-        _reload_encodings_flag = manager.Value('b', False)
+        _reload_encodings_flag = manager.Value('i', 0)
     return _reload_encodings_flag
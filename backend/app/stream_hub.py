@@ -0,0 +1,402 @@
+# stream_hub.py
+import json
+import time
+import asyncio
+import threading
+import cv2
+
+
+class Espectador:
+    """
+    Último JPEG pendiente de enviar a un cliente. Si el cliente no alcanzó a enviar el anterior
+    se reemplaza (un espectador lento salta frames, no acumula atraso).
+    """
+
+    def __init__(self):
+        self.cola = asyncio.Queue(maxsize=1)
+        self.saltados = 0
+
+    def entregar(self, jpeg):
+        if self.cola.full() and self.cola.get_nowait() is not None:
+            self.saltados += 1
+        self.cola.put_nowait(jpeg)
+
+    def despertar(self):
+        """
+        Interrumpe la espera del cliente (cambio de peldaño o cierre) con un None. No cuenta como
+        frame saltado: no es un frame, y el que reemplaza se descarta por el cambio, no porque el
+        cliente sea lento.
+        """
+        if self.cola.full():
+            self.cola.get_nowait()
+        self.cola.put_nowait(None)
+
+
+class DifusorStream:
+    """
+    Codifica cada frame nuevo de un anillo en JPEG una sola vez y entrega los mismos bytes
+    a todos los espectadores del stream (antes cada conexión codificaba su propia copia, así
+    que el costo crecía con cada visor).
+
+    Mientras haya espectadores, un hilo lector se bloquea en ring.esperar() y avisa al bucle
+    de asyncio con call_soon_threadsafe cada vez que se publica un frame (sin consultas
+    periódicas en el bucle). El último JPEG queda en caché y se envía de inmediato a quien se
+    conecta.
+
+    La codificación corre en 'ejecutor' (un ThreadPoolExecutor acotado compartido entre
+    streams; None: el ejecutor por defecto del bucle), nunca en el bucle, con calidad JPEG
+    'calidad' (None: la de OpenCV). Cada stream tiene como máximo una codificación en curso:
+    los frames que llegan mientras tanto se saltan y al terminar se toma el más reciente.
+
+    Para variantes reducidas (miniaturas) el frame se escala a 'ancho' píxeles como máximo
+    (conservando la proporción) y se codifican como mucho 'fps_max' frames por segundo.
+
+    'registrar_metrica(clave, valor)' recibe las métricas del stream (p. ej. metrics.fijar).
+    """
+
+    def __init__(self, ring, nombre, registrar_metrica=None, calidad=None, ejecutor=None, ancho=None, fps_max=None):
+        self.ring = ring
+        self.nombre = nombre
+        self.registrar_metrica = registrar_metrica
+        self.ejecutor = ejecutor
+        self.ancho = ancho
+        self.intervalo_min = 1.0 / fps_max if fps_max else 0.0
+        self._parametros = [cv2.IMWRITE_JPEG_QUALITY, int(calidad)] if calidad is not None else []
+        self._codificando = False
+        self._proximo = 0.0  # No se codifica antes de este instante (fps_max)
+        self._programado = False
+        self._espectadores = set()
+        self._loop = None
+        self._lector = None
+        self._detener = None
+        self.ultimo = None  # (seq, jpeg) del último frame codificado
+        self.codificados = 0
+
+    def suscribir(self):
+        espectador = Espectador()
+        # El JPEG en caché puede ser viejo si el stream estuvo sin espectadores; en ese caso
+        # el lector codifica el frame actual apenas arranca
+        if self.ultimo is not None and (self._lector is not None or self.ultimo[0] == self.ring.seq):
+            espectador.entregar(self.ultimo[1])
+        self._espectadores.add(espectador)
+        if self._lector is None:
+            self._iniciar_lector()
+        self._medir()
+        return espectador
+
+    def desuscribir(self, espectador):
+        self._espectadores.discard(espectador)
+        if not self._espectadores and self._lector is not None:
+            self._detener.set()
+            self._lector = None
+        self._medir()
+
+    def _iniciar_lector(self):
+        self._loop = asyncio.get_running_loop()
+        # Cada hilo lector tiene su propia señal: uno que aún no terminó no afecta al siguiente
+        self._detener = threading.Event()
+        self._lector = threading.Thread(target=self._leer, args=(self._detener,),
+                                        name=f"lector-{self.nombre}", daemon=True)
+        self._lector.start()
+
+    def _leer(self, detener):
+        ultimo_seq = self.ring.seq
+        if self.ultimo is None or self.ultimo[0] != ultimo_seq:
+            ultimo_seq = 0  # El frame actual todavía no se codificó
+        while not detener.is_set():
+            if not self.ring.esperar(ultimo_seq, timeout=0.5):
+                continue
+            ultimo_seq = self.ring.seq
+            try:
+                self._loop.call_soon_threadsafe(self._frame_nuevo)
+            except RuntimeError:
+                break  # El bucle de asyncio ya se cerró
+
+    def _frame_nuevo(self):
+        if not self._espectadores or self._codificando or self._programado:
+            return
+        espera = self._proximo - time.monotonic()
+        if espera > 0:
+            # Límite de FPS: se toma el frame más reciente cuando corresponda
+            self._programado = True
+            self._loop.call_later(espera, self._reintentar)
+            return
+        ultimo_seq = self.ultimo[0] if self.ultimo is not None else 0
+        # Vista directa sobre la memoria compartida (sin copia); se valida tras codificar
+        seq, frame = self.ring.leer_ultimo(ultimo_seq, copiar=False)
+        if frame is None:
+            return
+        self._codificando = True
+        self._proximo = time.monotonic() + self.intervalo_min
+        futuro = self._loop.run_in_executor(self.ejecutor, self._codificar, seq, frame)
+        futuro.add_done_callback(lambda f: self._codificado(seq, f))
+
+    def _reintentar(self):
+        self._programado = False
+        self._frame_nuevo()
+
+    def _codificado(self, seq, futuro):
+        self._codificando = False
+        try:
+            jpeg = futuro.result()
+        except Exception as e:
+            print(f"[ERROR] Falló la codificación del frame en {self.nombre}: {e}")
+            jpeg = None
+        if jpeg is not None:
+            self.ultimo = (seq, jpeg)
+            for espectador in list(self._espectadores):
+                espectador.entregar(jpeg)
+        # Si llegó un frame mientras se codificaba, se codifica el más reciente
+        self._frame_nuevo()
+
+    def _codificar(self, seq, frame):
+        # Corre en un hilo del ejecutor
+        inicio = time.perf_counter()
+        if self.ancho and frame.shape[1] > self.ancho:
+            alto = max(1, round(frame.shape[0] * self.ancho / frame.shape[1]))
+            frame = cv2.resize(frame, (self.ancho, alto), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", frame, self._parametros)
+        if not ok:
+            print(f"[ERROR] Falló la codificación del frame en {self.nombre}.")
+            return None
+        if not self.ring.vigente(seq):  # Descarta si el slot se reutilizó mientras se codificaba
+            return None
+        self.codificados += 1
+        if self.registrar_metrica is not None:
+            self.registrar_metrica(f"streams.{self.nombre}.codificacion_ms", (time.perf_counter() - inicio) * 1000)
+        self._medir()
+        return buffer.tobytes()
+
+    def _medir(self):
+        if self.registrar_metrica is None:
+            return
+        self.registrar_metrica(f"streams.{self.nombre}.espectadores", len(self._espectadores))
+        self.registrar_metrica(f"streams.{self.nombre}.codificados", self.codificados)
+
+    async def atender(self, websocket):
+        """
+        Envía al WebSocket (ya aceptado) cada frame nuevo del stream hasta que se desconecte.
+        """
+        espectador = self.suscribir()
+        try:
+            while True:
+                await websocket.send_bytes(await espectador.cola.get())
+        finally:
+            self.desuscribir(espectador)
+
+
+class ClienteEscalera:
+    """
+    Estado de un cliente de EscaleraStream: peldaño pedido, peldaño actual, topes de ancho y
+    FPS, y saltos de la ventana.
+    """
+
+    def __init__(self, peldano):
+        self.preferido = peldano
+        self.actual = peldano
+        self.limites = {}
+        self.espectador = None
+        self.enviados = 0
+        self.saltados_base = 0
+        self.ultimo_cambio = time.monotonic()
+        self.cerrado = False
+
+    def despertar(self):
+        if self.espectador is not None:
+            self.espectador.despertar()
+
+
+class EscaleraStream:
+    """
+    Variantes de un mismo stream compartidas entre clientes. 'peldanos' es la escalera de
+    congestión, de mayor a menor costo (dicts con 'ancho', 'fps' y 'calidad'). Cada variante
+    es un DifusorStream que se crea al primer uso y solo codifica mientras tenga espectadores,
+    así que el costo depende de las variantes en uso y no de la cantidad de clientes.
+
+    El cliente envía cuando quiera un texto JSON con 'ancho', 'fps' y/o 'calidad' máximos. La
+    calidad elige su peldaño inicial (ver elegir(); sin mensaje: el primero); el ancho y los
+    FPS son topes que se aplican por separado sobre cualquier peldaño (ver limites()), así que
+    pedir una pantalla chica no baja la calidad ni los FPS, y pedir menos FPS no reduce el
+    ancho. Si la conexión no alcanza, el Espectador del cliente salta frames: cuando en
+    'ventana' envíos los saltos superan 'umbral_saltos' se baja un peldaño, y tras 'subir_tras'
+    segundos sin saltos se sube uno, sin pasar del pedido.
+    """
+
+    def __init__(self, ring, nombre, peldanos, registrar_metrica=None, ejecutor=None,
+                 ventana=30, umbral_saltos=0.3, subir_tras=10.0):
+        self.ring = ring
+        self.nombre = nombre
+        self.peldanos = peldanos
+        self.registrar_metrica = registrar_metrica
+        self.ejecutor = ejecutor
+        self.ventana = ventana
+        self.umbral_saltos = umbral_saltos
+        self.subir_tras = subir_tras
+        self._difusores = {}  # (ancho, fps, calidad) -> DifusorStream
+        self.clientes = 0
+        self.bajadas = 0
+        self.subidas = 0
+
+    def variante(self, indice, limites):
+        """
+        (ancho, fps, calidad) que recibe un cliente en el peldaño 'indice' con los topes
+        'limites' (ver limites()). None es el valor original.
+        """
+        peldano = self.peldanos[indice]
+        return (_menor(peldano.get("ancho"), limites.get("ancho")),
+                _menor(peldano.get("fps"), limites.get("fps")),
+                peldano.get("calidad"))
+
+    def difusor(self, indice, limites=None):
+        ancho, fps, calidad = clave = self.variante(indice, limites or {})
+        if clave not in self._difusores:
+            peldano = self.peldanos[indice]
+            # El primer peldaño sin topes conserva el nombre del stream en las métricas
+            nombre = self.nombre if indice == 0 else f"{self.nombre}.p{indice}"
+            if ancho != peldano.get("ancho"):
+                nombre += f".{ancho}px"
+            if fps != peldano.get("fps"):
+                nombre += f".{fps}fps"
+            self._difusores[clave] = DifusorStream(
+                self.ring, nombre, registrar_metrica=self.registrar_metrica,
+                calidad=calidad, ejecutor=self.ejecutor, ancho=ancho, fps_max=fps,
+            )
+        return self._difusores[clave]
+
+    def elegir(self, preferencias):
+        """
+        Primer peldaño (el de más calidad) que no supera la calidad pedida, redondeada hacia
+        arriba al menor valor de la escalera que la cubre. El ancho y los FPS no eligen
+        peldaño: son topes (ver limites()).
+        """
+        if "calidad" not in preferencias:
+            return 0
+        limite = self._redondear("calidad", preferencias["calidad"])
+        for indice, peldano in enumerate(self.peldanos):
+            if _no_supera(peldano.get("calidad"), limite):
+                return indice
+        return len(self.peldanos) - 1
+
+    def limites(self, preferencias):
+        """
+        Topes de ancho y FPS pedidos, redondeados hacia arriba al menor valor de la escalera que
+        los cubre (un ancho de 1000 px recibe 1280, no 640) para que clientes parecidos
+        compartan variante; si ninguno lo cubre, o la clave no se envió, no limita.
+        """
+        limites = {}
+        for clave in ("ancho", "fps"):
+            if clave in preferencias:
+                limite = self._redondear(clave, preferencias[clave])
+                if limite is not None:
+                    limites[clave] = limite
+        return limites
+
+    def _redondear(self, clave, pedido):
+        cubren = [p[clave] for p in self.peldanos if p.get(clave) is not None and p[clave] >= pedido]
+        return min(cubren) if cubren else None
+
+    def _preferir(self, cliente, texto):
+        try:
+            mensaje = json.loads(texto)
+            if not isinstance(mensaje, dict):
+                raise ValueError("se esperaba un objeto")
+        except ValueError as e:
+            print(f"[WARNING] Preferencias inválidas en {self.nombre}: {e}")
+            return
+        preferencias = {}
+        for clave in ("ancho", "fps", "calidad"):
+            valor = mensaje.get(clave)
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool) and valor > 0:
+                preferencias[clave] = valor
+        cliente.preferido = cliente.actual = self.elegir(preferencias)
+        cliente.limites = self.limites(preferencias)
+        self._reiniciar_ventana(cliente)
+        cliente.despertar()
+
+    def _reiniciar_ventana(self, cliente):
+        cliente.enviados = 0
+        cliente.saltados_base = cliente.espectador.saltados if cliente.espectador is not None else 0
+        cliente.ultimo_cambio = time.monotonic()
+
+    def _evaluar(self, cliente):
+        """
+        Tras cada envío: baja o sube de peldaño según los frames saltados en la ventana.
+        """
+        cliente.enviados += 1
+        if cliente.enviados < self.ventana:
+            return
+        saltados = cliente.espectador.saltados - cliente.saltados_base
+        if saltados > self.umbral_saltos * (saltados + cliente.enviados) and cliente.actual < len(self.peldanos) - 1:
+            cliente.actual += 1
+            self.bajadas += 1
+            self._reiniciar_ventana(cliente)
+            self._medir()
+        elif (saltados == 0 and cliente.actual > cliente.preferido
+              and time.monotonic() - cliente.ultimo_cambio >= self.subir_tras):
+            cliente.actual -= 1
+            self.subidas += 1
+            self._reiniciar_ventana(cliente)
+            self._medir()
+        else:
+            cliente.enviados = 0
+            cliente.saltados_base = cliente.espectador.saltados
+
+    async def _recibir(self, websocket, cliente):
+        try:
+            while True:
+                mensaje = await websocket.receive()
+                if mensaje["type"] == "websocket.disconnect":
+                    return
+                if mensaje.get("text"):
+                    self._preferir(cliente, mensaje["text"])
+        finally:
+            cliente.cerrado = True
+            cliente.despertar()
+
+    def _medir(self):
+        if self.registrar_metrica is None:
+            return
+        self.registrar_metrica(f"streams.{self.nombre}.clientes", self.clientes)
+        self.registrar_metrica(f"streams.{self.nombre}.bajadas", self.bajadas)
+        self.registrar_metrica(f"streams.{self.nombre}.subidas", self.subidas)
+
+    async def atender(self, websocket):
+        """
+        Envía al WebSocket (ya aceptado) los frames del peldaño que le corresponde hasta que
+        se desconecte, atendiendo a la vez sus mensajes de preferencias.
+        """
+        cliente = ClienteEscalera(0)
+        receptor = asyncio.ensure_future(self._recibir(websocket, cliente))
+        self.clientes += 1
+        self._medir()
+        try:
+            while not cliente.cerrado:
+                indice, limites = cliente.actual, cliente.limites
+                difusor = self.difusor(indice, limites)
+                cliente.espectador = difusor.suscribir()
+                self._reiniciar_ventana(cliente)
+                try:
+                    while cliente.actual == indice and cliente.limites is limites and not cliente.cerrado:
+                        jpeg = await cliente.espectador.cola.get()
+                        if jpeg is None:
+                            continue
+                        await websocket.send_bytes(jpeg)
+                        self._evaluar(cliente)
+                finally:
+                    difusor.desuscribir(cliente.espectador)
+        finally:
+            receptor.cancel()
+            self.clientes -= 1
+            self._medir()
+
+
+def _menor(valor, limite):
+    # None: original (sin límite)
+    if limite is None:
+        return valor
+    return limite if valor is None else min(valor, limite)
+
+
+def _no_supera(valor, limite):
+    # None en el límite: no limita; None en el peldaño: valor original, supera cualquier límite
+    return limite is None or (valor is not None and valor <= limite)
@@ -0,0 +1,158 @@
+# bench_carga_galeria.py
+"""
+Tiempo de carga de la galería al arrancar con 50k personas: formato anterior (base64 en TEXT,
+decodificado fila por fila y apilado) frente al formato binario leído por bloques directamente
+a la matriz preasignada.
+
+Dos modos:
+
+- memoria (por defecto): microbenchmark de decodificación. Las filas se sirven desde memoria
+  con la misma interfaz fetchall/fetchmany de mysql-connector (los BLOB llegan como bytearray);
+  mide solo el costo del lado del proceso de detección, sin consulta ni transferencia.
+- --bd: extremo a extremo contra MySQL. Crea dos tablas de prueba (bench_galeria_texto con
+  TEXT y bench_galeria_blob con BLOB), las llena y mide SELECT + transferencia + decodificación
+  con mysql-connector; las tablas se borran al terminar. La conexión se toma de las variables
+  BENCH_BD_HOST, BENCH_BD_USUARIO, BENCH_BD_PASSWORD y BENCH_BD_NOMBRE (por defecto, los
+  valores de db_connection.py). Requiere mysql-connector-python.
+
+Uso (desde backend/):  python benchmarks/bench_carga_galeria.py [personas] [--bd]
+"""
+import os
+import sys
+import time
+import base64
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from face_gallery import GaleriaRostros, bloques_desde_cursor  # noqa: E402
+
+DIMENSION = 512
+FILAS_POR_LECTURA = 5000
+
+
+class CursorMemoria:
+    def __init__(self, filas):
+        self.filas = filas
+        self.posicion = 0
+
+    def fetchall(self):
+        filas, self.posicion = self.filas[self.posicion:], len(self.filas)
+        return filas
+
+    def fetchmany(self, tam):
+        filas = self.filas[self.posicion:self.posicion + tam]
+        self.posicion += len(filas)
+        return filas
+
+
+def carga_base64(cursor):
+    # Réplica del initialize_encodings anterior (cursor ya ejecutado)
+    known_encodings, known_names, known_ids = [], [], []
+    for row in cursor.fetchall():
+        persona_id, name, encoding_serialized = row
+        known_encodings.append(np.frombuffer(base64.b64decode(encoding_serialized), dtype=np.float32))
+        known_names.append(name)
+        known_ids.append(persona_id)
+    galeria = GaleriaRostros()
+    galeria.cargar(known_names, np.stack(known_encodings), known_ids)
+    return galeria
+
+
+def carga_binaria(cursor, total):
+    galeria = GaleriaRostros(capacidad=total)
+    galeria.cargar_por_bloques(bloques_desde_cursor(cursor, DIMENSION, FILAS_POR_LECTURA), total)
+    return galeria
+
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        galeria = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), galeria
+
+
+def medir_memoria(filas_texto, filas_binarias):
+    t_texto, galeria_texto = medir(lambda: carga_base64(CursorMemoria(filas_texto)))
+    t_binario, galeria_binaria = medir(lambda: carga_binaria(CursorMemoria(filas_binarias), len(filas_binarias)))
+    return t_texto, galeria_texto, t_binario, galeria_binaria
+
+
+def conectar_bd():
+    import mysql.connector  # Solo en el modo --bd
+
+    return mysql.connector.connect(
+        host=os.environ.get("BENCH_BD_HOST", "localhost"),
+        user=os.environ.get("BENCH_BD_USUARIO", "root"),
+        password=os.environ.get("BENCH_BD_PASSWORD", "1234"),
+        database=os.environ.get("BENCH_BD_NOMBRE", "tesis"),
+    )
+
+
+def medir_bd(filas_texto, filas_binarias):
+    connection = conectar_bd()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("DROP TABLE IF EXISTS bench_galeria_texto, bench_galeria_blob")
+        cursor.execute("CREATE TABLE bench_galeria_texto (id INT PRIMARY KEY, persona VARCHAR(255) NOT NULL, "
+                       "encoding TEXT NOT NULL)")
+        cursor.execute("CREATE TABLE bench_galeria_blob (id INT PRIMARY KEY, persona VARCHAR(255) NOT NULL, "
+                       "embedding BLOB NOT NULL)")
+        for inicio in range(0, len(filas_texto), FILAS_POR_LECTURA):
+            cursor.executemany("INSERT INTO bench_galeria_texto (id, persona, encoding) VALUES (%s, %s, %s)",
+                               filas_texto[inicio:inicio + FILAS_POR_LECTURA])
+            cursor.executemany("INSERT INTO bench_galeria_blob (id, persona, embedding) VALUES (%s, %s, %s)",
+                               [(i, n, bytes(e)) for i, n, e in filas_binarias[inicio:inicio + FILAS_POR_LECTURA]])
+        connection.commit()
+
+        def leer(consulta, funcion):
+            # Cursor nuevo por repetición: se mide la consulta y la transferencia completas
+            lector = connection.cursor()
+            try:
+                lector.execute(consulta)
+                return funcion(lector)
+            finally:
+                lector.close()
+
+        t_texto, galeria_texto = medir(lambda: leer(
+            "SELECT id, persona, encoding FROM bench_galeria_texto ORDER BY id", carga_base64))
+        t_binario, galeria_binaria = medir(lambda: leer(
+            "SELECT id, persona, embedding FROM bench_galeria_blob ORDER BY id",
+            lambda lector: carga_binaria(lector, len(filas_binarias))))
+        return t_texto, galeria_texto, t_binario, galeria_binaria
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS bench_galeria_texto, bench_galeria_blob")
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if a != "--bd"]
+    con_bd = "--bd" in sys.argv[1:]
+    personas = int(argumentos[0]) if argumentos else 50_000
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((personas, DIMENSION)).astype(np.float32)
+
+    filas_texto = [
+        (i, f"persona_{i}", base64.b64encode(embeddings[i].tobytes()).decode("utf-8")) for i in range(personas)
+    ]
+    filas_binarias = [(i, f"persona_{i}", bytearray(embeddings[i].tobytes())) for i in range(personas)]
+
+    medicion = medir_bd if con_bd else medir_memoria
+    t_texto, galeria_texto, t_binario, galeria_binaria = medicion(filas_texto, filas_binarias)
+    assert np.allclose(galeria_texto.matriz, galeria_binaria.matriz) and galeria_texto.ids == galeria_binaria.ids
+
+    mb_texto = sum(len(fila[2]) for fila in filas_texto) / 1e6
+    mb_binario = sum(len(fila[2]) for fila in filas_binarias) / 1e6
+    modo = "MySQL (consulta + transferencia + decodificación)" if con_bd else "memoria (solo decodificación)"
+    print(f"{personas} personas, dimensión {DIMENSION}; modo {modo}")
+    print(f"{'formato':>8} {'carga s':>9} {'MB embeddings':>16}")
+    print(f"{'base64':>8} {t_texto:>9.3f} {mb_texto:>16.1f}")
+    print(f"{'binario':>8} {t_binario:>9.3f} {mb_binario:>16.1f}")
+    print(f"Aceleración: {t_texto / t_binario:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
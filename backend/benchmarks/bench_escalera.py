@@ -0,0 +1,194 @@
+# bench_escalera.py
+"""
+Clientes con distinto ancho de banda y tamaño de pantalla sobre un mismo stream 1080p a 30 FPS:
+
+- fijo:     escalera de un solo peldaño (todos reciben el JPEG completo, esquema anterior).
+- escalera: los peldaños de config.STREAM_ESCALERA.
+
+Hay clientes rápidos sin preferencias, clientes que piden {"ancho": 640} y clientes con el
+ancho de banda limitado a LIMITADO_KBS que no piden nada: con la escalera deberían bajar solos
+a un peldaño que su conexión aguante (más FPS y menos atraso). Se informa por tipo de cliente
+los FPS y KiB/s recibidos y el ancho del último frame, y los JPEG/s del servidor.
+
+Uso (desde backend/):  python benchmarks/bench_escalera.py [segundos] [limitado_kbs]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import threading
+import cv2
+import numpy as np
+import uvicorn
+import websockets
+from websockets.client import ClientProtocol
+from websockets.frames import Frame, Opcode
+from websockets.uri import parse_uri
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+import config  # noqa: E402
+from frame_bus import AnilloFrames  # noqa: E402
+from stream_hub import EscaleraStream  # noqa: E402
+
+PUERTO = 8767
+FPS = 30
+VIDEO = os.path.join(os.path.dirname(__file__), "..", "videos", "video_face.mp4")
+CLIENTES = {"rápido": 4, "pide 640": 2, "limitado": 4}
+# Buffers pequeños para que el atraso de un cliente limitado llegue al servidor (en loopback
+# el kernel los agranda a varios MB)
+LIMITADO_RCVBUF = 16384
+SERVIDOR_SNDBUF = 65536
+
+
+def crear_app(escaleras):
+    app = FastAPI()
+
+    @app.websocket("/{modo}")
+    async def stream(websocket: WebSocket, modo: str):
+        await websocket.accept()
+        try:
+            await escaleras[modo].atender(websocket)
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            pass
+
+    return app
+
+
+def leer_frames(maximo=150):
+    cap = cv2.VideoCapture(VIDEO)
+    frames = []
+    while len(frames) < maximo:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (1920, 1080)))
+    cap.release()
+    return frames
+
+
+def publicar(ring, frames, detener):
+    i = 0
+    while not detener.is_set():
+        ring.escribir(frames[i % len(frames)])
+        i += 1
+        time.sleep(1 / FPS)
+
+
+def ancho_jpeg(jpeg):
+    if jpeg is None:
+        return 0
+    imagen = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    return imagen.shape[1] if imagen is not None else 0
+
+
+async def cliente(ruta, preferencias, limite, resultado):
+    async with websockets.connect(f"ws://127.0.0.1:{PUERTO}{ruta}", max_size=None) as ws:
+        if preferencias:
+            await ws.send(json.dumps(preferencias))
+        while time.time() < limite:
+            try:
+                jpeg = await asyncio.wait_for(ws.recv(), timeout=max(0.01, limite - time.time()))
+            except asyncio.TimeoutError:
+                break
+            resultado["frames"] += 1
+            resultado["bytes"] += len(jpeg)
+            resultado["ultimo"] = jpeg
+
+
+async def cliente_limitado(ruta, kbs, limite, resultado):
+    # Socket leído a mano con el protocolo sans-io a 'kbs' KiB/s: el cliente asyncio de
+    # websockets leería todo lo que llega sin respetar el límite
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, LIMITADO_RCVBUF)
+    sock.setblocking(False)
+    protocolo = ClientProtocol(parse_uri(f"ws://127.0.0.1:{PUERTO}{ruta}"), max_size=None)
+    try:
+        await loop.sock_connect(sock, ("127.0.0.1", PUERTO))
+        protocolo.send_request(protocolo.connect())
+        while time.time() < limite:
+            for datos in protocolo.data_to_send():
+                if datos:
+                    await loop.sock_sendall(sock, datos)
+            try:
+                datos = await asyncio.wait_for(loop.sock_recv(sock, 8192), timeout=max(0.01, limite - time.time()))
+            except asyncio.TimeoutError:
+                break
+            if not datos:
+                break
+            protocolo.receive_data(datos)
+            for evento in protocolo.events_received():
+                if isinstance(evento, Frame) and evento.opcode == Opcode.BINARY:
+                    resultado["frames"] += 1
+                    resultado["bytes"] += len(evento.data)
+                    resultado["ultimo"] = bytes(evento.data)
+            await asyncio.sleep(len(datos) / (kbs * 1024))
+    finally:
+        sock.close()
+
+
+async def medir(ruta, segundos, kbs):
+    resultados = {tipo: [] for tipo in CLIENTES}
+    limite = time.time() + segundos
+    tareas = []
+    for tipo, cantidad in CLIENTES.items():
+        for _ in range(cantidad):
+            resultado = {"frames": 0, "bytes": 0, "ultimo": None}
+            resultados[tipo].append(resultado)
+            if tipo == "limitado":
+                tareas.append(cliente_limitado(ruta, kbs, limite, resultado))
+            else:
+                preferencias = {"ancho": 640} if tipo == "pide 640" else None
+                tareas.append(cliente(ruta, preferencias, limite, resultado))
+    await asyncio.gather(*tareas)
+    return resultados
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 15.0
+    kbs = float(sys.argv[2]) if len(sys.argv) > 2 else 1500
+
+    frames = leer_frames()
+    ring = AnilloFrames(slots=4, max_alto=1080, max_ancho=1920)
+    detener = threading.Event()
+    threading.Thread(target=publicar, args=(ring, frames, detener), daemon=True).start()
+
+    escaleras = {
+        "fijo": EscaleraStream(ring, "fijo", config.STREAM_ESCALERA[:1]),
+        "escalera": EscaleraStream(ring, "escalera", config.STREAM_ESCALERA, ventana=config.STREAM_VENTANA_ENVIOS,
+                                   umbral_saltos=config.STREAM_UMBRAL_SALTOS, subir_tras=config.STREAM_SUBIR_S),
+    }
+    servidor = uvicorn.Server(uvicorn.Config(crear_app(escaleras), port=PUERTO, log_level="warning"))
+    escucha = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    escucha.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    escucha.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SERVIDOR_SNDBUF)  # Lo heredan las conexiones
+    escucha.bind(("127.0.0.1", PUERTO))
+    threading.Thread(target=servidor.run, kwargs={"sockets": [escucha]}, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+
+    print(f"Stream 1080p a {FPS} FPS durante {segundos:.0f} s; clientes {CLIENTES}, limitados a {kbs:.0f} KiB/s")
+    print(f"{'modo':>9} {'cliente':>9} {'FPS':>6} {'KiB/s':>7} {'ancho':>6}")
+    try:
+        for modo, escalera in escaleras.items():
+            resultados = asyncio.run(medir(f"/{modo}", segundos, kbs))
+            for tipo, lista in resultados.items():
+                fps = sum(r["frames"] for r in lista) / len(lista) / segundos
+                kibs = sum(r["bytes"] for r in lista) / len(lista) / segundos / 1024
+                anchos = sorted({ancho_jpeg(r["ultimo"]) for r in lista})
+                print(f"{modo:>9} {tipo:>9} {fps:>6.1f} {kibs:>7.0f} {'/'.join(map(str, anchos)):>6}")
+            codificados = sum(d.codificados for d in escalera._difusores.values())
+            print(f"{modo:>9} servidor: {codificados / segundos:.1f} JPEG/s, "
+                  f"{escalera.bajadas} bajadas, {escalera.subidas} subidas de peldaño")
+    finally:
+        servidor.should_exit = True
+        detener.set()
+        time.sleep(0.2)
+        ring.liberar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_eventos.py
+"""
+Eventos por segundo que procesa el filtro anti-rebote de guardar_eventos:
+
+- manager: estado en un manager.dict() (copiar, modificar y volver a escribir cada etiqueta).
+- local:   FiltroEventos (registros con __slots__ en memoria del proceso).
+
+Solo se mide la decisión de guardar o no (sin base de datos). Las etiquetas simulan un frame
+con varias detecciones repetidas (personas, objetos y un rostro desconocido).
+
+Uso (desde backend/):  python benchmarks/bench_eventos.py [eventos]
+"""
+import os
+import sys
+import time
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from event_debounce import FiltroEventos  # noqa: E402
+
+ETIQUETAS = ["person", "person", "chair", "laptop", "cell phone", "Desconocido", "Caída", "bottle"]
+
+
+def filtro_manager(detection_history, etiqueta, tipo, now,
+                   tiempo_persistencia=5, min_ocurrencias=60, tiempo_maximo_sin_detectar=3):
+    # Réplica de la lógica anterior de _guardar_eventos sobre el diccionario del Manager
+    if etiqueta in detection_history:
+        history = detection_history[etiqueta].copy()
+        last_saved = history['last_saved']
+        last_detected = history.get('last_detected', 0)
+        occurrences = history['occurrences']
+        if now - last_detected > tiempo_maximo_sin_detectar:
+            occurrences = 1
+        elif tipo == history['last_detected_type']:
+            occurrences += 1
+        else:
+            occurrences = 1
+        history['last_detected'] = now
+        history['last_detected_type'] = tipo
+        guardar = now - last_saved > tiempo_persistencia and occurrences >= min_ocurrencias
+        if guardar:
+            history['last_saved'] = now
+            occurrences = 0
+        history['occurrences'] = occurrences
+        detection_history[etiqueta] = history
+        return guardar
+    detection_history[etiqueta] = {
+        "last_saved": 0, "last_detected": now, "occurrences": 1, "last_detected_type": tipo,
+    }
+    return False
+
+
+def medir(registrar, eventos):
+    guardados = 0
+    inicio = time.perf_counter()
+    for i in range(eventos):
+        # ~30 frames por segundo simulados: el reloj avanza con los frames, no con el benchmark
+        now = 1_000.0 + (i // len(ETIQUETAS)) / 30.0
+        guardados += registrar(ETIQUETAS[i % len(ETIQUETAS)], "objetos", now)
+    return eventos / (time.perf_counter() - inicio), guardados
+
+
+def main():
+    eventos = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    manager = multiprocessing.Manager()
+    detection_history = manager.dict()
+
+    tasa_manager, guardados_manager = medir(
+        lambda etiqueta, tipo, now: filtro_manager(detection_history, etiqueta, tipo, now), eventos
+    )
+    manager.shutdown()
+    # Mismas decisiones con los mismos eventos; la tasa local se mide con más eventos
+    _, guardados_local = medir(FiltroEventos().registrar, eventos)
+    tasa_local, _ = medir(FiltroEventos().registrar, eventos * 50)
+
+    print(f"{'estado':>8} {'eventos/s':>12} {'guardados':>10}")
+    print(f"{'manager':>8} {tasa_manager:>12.0f} {guardados_manager:>10}")
+    print(f"{'local':>8} {tasa_local:>12.0f} {guardados_local:>10}")
+    print(f"Aceleración: {tasa_local / tasa_manager:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
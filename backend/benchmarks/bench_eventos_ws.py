@@ -0,0 +1,216 @@
+# bench_eventos_ws.py
+"""
+Prueba de carga de /ws/events con cientos de clientes WebSocket sintéticos.
+
+Levanta un servidor uvicorn local con dos rutas, cada una con su propia cola de eventos:
+
+- antes:  cada cliente hace get() sobre la cola compartida (un evento llega a un solo cliente).
+- centro: CentroEventos, un lector que difunde cada evento a todos los clientes.
+
+Un productor publica 'eventos' eventos a 'tasa' eventos/s. Una parte de los clientes es
+lenta (tarda LENTO_MS en procesar cada evento): los clientes rápidos deben recibir todos los
+eventos igualmente. Con eventos pequeños el atraso de un cliente lento queda en los buffers
+del socket; 'relleno' (bytes extra por evento) los llena antes para ver actuar la política.
+
+Uso (desde backend/):  python benchmarks/bench_eventos_ws.py [clientes] [eventos] [tasa] [politica] [relleno]
+"""
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+import uvicorn
+import websockets
+from websockets.client import ClientProtocol
+from websockets.frames import Frame, Opcode
+from websockets.uri import parse_uri
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from event_hub import CentroEventos  # noqa: E402
+
+PUERTO = 8765
+FRACCION_LENTOS = 0.1
+LENTO_MS = 200
+# Buffers de socket pequeños: en loopback el kernel los agranda a varios MB y absorberían todo
+# el atraso de un cliente lento (como en una red real no ocurre), sin que el servidor lo note
+LENTO_RCVBUF = 4096
+SERVIDOR_SNDBUF = 16384
+
+
+def crear_app(cola_antes, cola_centro, centro):
+    @asynccontextmanager
+    async def ciclo_de_vida(app):
+        centro.iniciar(cola_centro)
+        yield
+        centro.detener()
+
+    app = FastAPI(lifespan=ciclo_de_vida)
+    cola = cola_antes
+
+    @app.websocket("/antes")
+    async def antes(websocket: WebSocket):
+        # Réplica del /ws/events anterior
+        await websocket.accept()
+        try:
+            while True:
+                if not cola.empty():
+                    try:
+                        evento = cola.get_nowait()
+                    except queue.Empty:
+                        evento = None
+                    if evento is not None:
+                        await websocket.send_json(evento)
+                await asyncio.sleep(0.03)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    @app.websocket("/centro")
+    async def con_centro(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            await centro.atender(websocket)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    return app
+
+
+async def cliente(ruta, lento, limite, resultados):
+    recibidos = 0
+    latencias = []
+    try:
+        if lento:
+            recibidos = await cliente_lento(ruta, limite, resultados)
+        else:
+            async with websockets.connect(f"ws://127.0.0.1:{PUERTO}{ruta}") as ws:
+                resultados["conectados"] += 1
+                while time.time() < limite:
+                    try:
+                        mensaje = await asyncio.wait_for(ws.recv(), timeout=max(0.01, limite - time.time()))
+                    except asyncio.TimeoutError:
+                        break
+                    evento = json.loads(mensaje)
+                    if evento.get("fin"):
+                        break
+                    recibidos += 1
+                    latencias.append(time.time() - evento["t"])
+    except (websockets.ConnectionClosed, OSError):
+        pass
+    resultados["lentos" if lento else "rapidos"].append(recibidos)
+    resultados["latencias"].extend(latencias)
+
+
+async def cliente_lento(ruta, limite, resultados):
+    # Socket leído a mano con el protocolo sans-io: el cliente asyncio de websockets sigue
+    # leyendo del socket aunque no se llame a recv() y acumularía el atraso en su memoria
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, LENTO_RCVBUF)
+    sock.setblocking(False)
+    protocolo = ClientProtocol(parse_uri(f"ws://127.0.0.1:{PUERTO}{ruta}"))
+    recibidos = 0
+    try:
+        await loop.sock_connect(sock, ("127.0.0.1", PUERTO))
+        protocolo.send_request(protocolo.connect())
+        conectado = False
+        while time.time() < limite:
+            for datos in protocolo.data_to_send():
+                if datos:
+                    await loop.sock_sendall(sock, datos)
+            try:
+                datos = await asyncio.wait_for(loop.sock_recv(sock, 4096), timeout=max(0.01, limite - time.time()))
+            except asyncio.TimeoutError:
+                break
+            if not datos:
+                break
+            protocolo.receive_data(datos)
+            for evento in protocolo.events_received():
+                if not isinstance(evento, Frame):
+                    if not conectado:
+                        conectado = True
+                        resultados["conectados"] += 1
+                    continue
+                if evento.opcode != Opcode.TEXT:
+                    continue
+                if json.loads(evento.data).get("fin"):
+                    return recibidos
+                recibidos += 1
+                await asyncio.sleep(LENTO_MS / 1000)
+    finally:
+        sock.close()
+    return recibidos
+
+
+def producir(cola, eventos, tasa, relleno):
+    for i in range(eventos):
+        cola.put({"tipo": "objetos", "etiqueta": "person", "confianza": 0.9, "i": i, "t": time.time(),
+                  "relleno": "x" * relleno})
+        time.sleep(1 / tasa)
+    cola.put({"fin": True, "t": time.time()})
+
+
+async def ejecutar(ruta, cola, clientes, eventos, tasa, relleno):
+    resultados = {"conectados": 0, "rapidos": [], "lentos": [], "latencias": []}
+    duracion = eventos / tasa
+    limite = time.time() + duracion + 5
+    lentos = int(clientes * FRACCION_LENTOS)
+    tareas = [asyncio.ensure_future(cliente(ruta, i < lentos, limite, resultados)) for i in range(clientes)]
+    while resultados["conectados"] < clientes and time.time() < limite:
+        await asyncio.sleep(0.05)
+    productor = threading.Thread(target=producir, args=(cola, eventos, tasa, relleno), daemon=True)
+    productor.start()
+    await asyncio.gather(*tareas)
+    productor.join()
+    while not cola.empty():
+        cola.get_nowait()
+    return resultados
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(p / 100 * len(valores)))]
+
+
+def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    eventos = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    tasa = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    politica = sys.argv[4] if len(sys.argv) > 4 else "descartar_antiguos"
+    relleno = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+
+    # Misma cola acotada que main.py; una por ruta para que no compitan entre sí
+    colas = {"antes": queue.Queue(maxsize=50), "centro": queue.Queue(maxsize=50)}
+    centro = CentroEventos(capacidad_cliente=100, politica=politica)
+    servidor = uvicorn.Server(uvicorn.Config(crear_app(colas["antes"], colas["centro"], centro), port=PUERTO,
+                                             log_level="warning"))
+    escucha = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    escucha.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    escucha.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SERVIDOR_SNDBUF)  # Lo heredan las conexiones
+    escucha.bind(("127.0.0.1", PUERTO))
+    threading.Thread(target=servidor.run, kwargs={"sockets": [escucha]}, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+
+    print(f"{clientes} clientes ({int(clientes * FRACCION_LENTOS)} lentos), {eventos} eventos a {tasa:.0f}/s, "
+          f"política {politica}, relleno {relleno} B")
+    print(f"{'ruta':>7} {'rápidos: eventos/cliente':>25} {'lentos: eventos/cliente':>24} "
+          f"{'latencia rápidos p50':>21} {'p99':>8}")
+    for ruta in ("antes", "centro"):
+        resultados = asyncio.run(ejecutar(f"/{ruta}", colas[ruta], clientes, eventos, tasa, relleno))
+        rapidos = sum(resultados["rapidos"]) / max(1, len(resultados["rapidos"]))
+        lentos = sum(resultados["lentos"]) / max(1, len(resultados["lentos"]))
+        print(f"{ruta:>7} {rapidos:>25.1f} {lentos:>24.1f} "
+              f"{percentil(resultados['latencias'], 50) * 1000:>18.1f} ms {percentil(resultados['latencias'], 99) * 1000:>5.1f} ms")
+    print(f"Centro: {centro.descartados} eventos descartados a clientes lentos, {centro.desconectados} desconectados")
+    servidor.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench_galeria.py
+"""
+Micro-benchmark del reconocimiento contra la galería: comparación rostro por rostro
+(implementación anterior, lista de arrays) frente a una sola multiplicación de matrices.
+
+Uso (desde backend/):  python benchmarks/bench_galeria.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from face_gallery import GaleriaRostros, normalizar  # noqa: E402
+
+DIMENSION = 512
+ROSTROS_POR_FRAME = 5
+TAMANOS = [10, 100, 1_000, 10_000, 100_000]
+
+
+def medir(funcion, repeticiones):
+    funcion()  # Calentamiento
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def por_rostro(known_encodings, known_names, embeddings):
+    # Réplica del bucle original de procesar_rostros
+    nombres = []
+    for encoding in embeddings:
+        encoding = encoding / np.linalg.norm(encoding)
+        name = "Desconocido"
+        distances = np.linalg.norm(known_encodings - encoding, axis=1)
+        min_distance_index = np.argmin(distances)
+        if distances[min_distance_index] < 1.1:
+            name = known_names[min_distance_index]
+        nombres.append(name)
+    return nombres
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'identidades':>12} | {'por rostro (ms)':>16} | {'matricial (ms)':>15} | {'aceleración':>11}")
+    for n in TAMANOS:
+        base = normalizar(rng.standard_normal((n, DIMENSION)))
+        nombres = [f"persona_{i}" for i in range(n)]
+        # Rostros del frame: personas conocidas con algo de ruido
+        embeddings = base[rng.integers(0, n, ROSTROS_POR_FRAME)] + 0.02 * rng.standard_normal((ROSTROS_POR_FRAME, DIMENSION))
+        embeddings = embeddings.astype(np.float32)
+
+        lista = list(base)
+        galeria = GaleriaRostros(DIMENSION)
+        galeria.cargar(nombres, base)
+        assert por_rostro(lista, nombres, embeddings) == galeria.identificar(embeddings)
+
+        repeticiones = max(3, 20_000 // n)
+        t_anterior = medir(lambda: por_rostro(lista, nombres, embeddings), repeticiones)
+        t_matriz = medir(lambda: galeria.identificar(embeddings), repeticiones)
+        print(f"{n:>12} | {t_anterior:>16.3f} | {t_matriz:>15.3f} | {t_anterior / t_matriz:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
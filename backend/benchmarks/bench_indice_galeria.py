@@ -0,0 +1,84 @@
+# bench_indice_galeria.py
+"""
+Compara el índice IVF de la galería con la búsqueda exacta: recall@k (fracción de los k
+vecinos exactos que también devuelve el IVF) y latencia por frame, para varios nprobe.
+
+La galería sintética tiene estructura de grupos (como los embeddings reales, que se agrupan
+por rasgos comunes); las consultas son embeddings de personas de la galería con ruido
+(similitud coseno ~0.7 con su original, como un rostro visto por la cámara frente al registrado).
+
+Uso (desde backend/):  python benchmarks/bench_indice_galeria.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from face_gallery import GaleriaRostros, IndiceIVF, normalizar  # noqa: E402
+
+DIMENSION = 512
+ROSTROS_POR_FRAME = 5
+CONSULTAS = 500
+K = 10
+TAMANOS = [10_000, 50_000, 100_000]
+NPROBES = [4, 16, 64]
+GRUPOS = 256
+
+
+def galeria_sintetica(n, rng):
+    centros = normalizar(rng.standard_normal((GRUPOS, DIMENSION)))
+    grupo = rng.integers(0, GRUPOS, n)
+    return normalizar(centros[grupo] + 0.8 * normalizar(rng.standard_normal((n, DIMENSION))))
+
+
+def consultas_ruidosas(galeria, rng):
+    originales = rng.choice(len(galeria), CONSULTAS, replace=False)
+    ruido = normalizar(rng.standard_normal((CONSULTAS, DIMENSION)))
+    return originales, normalizar(galeria.matriz[originales] + ruido)
+
+
+def medir(galeria, consultas):
+    galeria.match(consultas[:ROSTROS_POR_FRAME], k=K)  # Calentamiento
+    resultados = []
+    inicio = time.perf_counter()
+    for i in range(0, CONSULTAS, ROSTROS_POR_FRAME):
+        resultados.append(galeria.match(consultas[i:i + ROSTROS_POR_FRAME], k=K)[0])
+    duracion = (time.perf_counter() - inicio) / (CONSULTAS / ROSTROS_POR_FRAME) * 1000
+    return np.concatenate(resultados), duracion
+
+
+def recall(exactos, aproximados, k):
+    aciertos = sum(len(set(e[:k]) & set(a[:k])) for e, a in zip(exactos, aproximados))
+    return aciertos / (len(exactos) * k)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{ROSTROS_POR_FRAME} rostros por frame, {CONSULTAS} consultas, dimensión {DIMENSION}")
+    print(f"{'personas':>9} {'índice':>12} {'ms/frame':>9} {'recall@1':>9} {f'recall@{K}':>10} {'construir s':>12}")
+    for n in TAMANOS:
+        embeddings = galeria_sintetica(n, rng)
+        nombres = [f"persona_{i}" for i in range(n)]
+
+        exacta = GaleriaRostros()
+        exacta.cargar(nombres, embeddings)
+        originales, consultas = consultas_ruidosas(exacta, rng)
+        exactos, ms_exacto = medir(exacta, consultas)
+        propios = (exactos[:, 0] == originales).mean()
+        print(f"{n:>9} {'exacto':>12} {ms_exacto:>9.2f} {1.0:>9.3f} {1.0:>10.3f} {'-':>12}"
+              f"   (top-1 = persona original: {propios:.3f})")
+
+        ivf = GaleriaRostros(indice=IndiceIVF(min_filas=0))
+        inicio = time.perf_counter()
+        ivf.cargar(nombres, embeddings)
+        construir = time.perf_counter() - inicio
+        for nprobe in NPROBES:
+            ivf.indice.nprobe = nprobe
+            aproximados, ms = medir(ivf, consultas)
+            print(f"{n:>9} {f'ivf/{nprobe}':>12} {ms:>9.2f} {recall(exactos, aproximados, 1):>9.3f} "
+                  f"{recall(exactos, aproximados, K):>10.3f} {construir:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
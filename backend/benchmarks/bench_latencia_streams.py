@@ -0,0 +1,93 @@
+# bench_latencia_streams.py
+"""
+Latencia entre que un frame se publica en el anillo y que está listo para enviarse, y CPU
+con el stream quieto:
+
+- consulta: el bucle de asyncio revisa el anillo cada 30 ms (esquema anterior).
+- aviso:    DifusorStream, cuyo hilo lector espera la notificación del anillo.
+
+Los frames se publican a intervalos irregulares; después se mide la CPU durante unos segundos
+sin frames nuevos con un espectador conectado.
+
+Uso (desde backend/):  python benchmarks/bench_latencia_streams.py [frames]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import threading
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from frame_bus import AnilloFrames  # noqa: E402
+from stream_hub import DifusorStream  # noqa: E402
+
+QUIETO_S = 3.0
+
+
+def publicar(ring, frames, publicados):
+    generador = random.Random(0)
+    imagen = np.zeros((360, 640, 3), dtype=np.uint8)
+    for i in range(frames):
+        time.sleep(generador.uniform(0.02, 0.08))
+        cv2.putText(imagen, str(i), (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        seq = ring.escribir(imagen)
+        publicados[seq] = time.perf_counter()
+
+
+async def con_consulta(ring, frames):
+    publicados, latencias = {}, []
+    productor = threading.Thread(target=publicar, args=(ring, frames, publicados), daemon=True)
+    productor.start()
+    ultimo_seq = ring.seq
+    while productor.is_alive() or ring.seq != ultimo_seq:
+        ultimo_seq, frame = ring.leer_ultimo(ultimo_seq, copiar=False)
+        if frame is not None:
+            cv2.imencode(".jpg", frame)
+            latencias.append(time.perf_counter() - publicados.get(ultimo_seq, time.perf_counter()))
+        await asyncio.sleep(0.03)
+    cpu = time.process_time()
+    limite = time.time() + QUIETO_S
+    while time.time() < limite:
+        ring.leer_ultimo(ultimo_seq, copiar=False)
+        await asyncio.sleep(0.03)
+    return latencias, (time.process_time() - cpu) / QUIETO_S * 100
+
+
+async def con_aviso(ring, frames):
+    publicados, latencias = {}, []
+    difusor = DifusorStream(ring, "bench")
+    espectador = difusor.suscribir()
+    productor = threading.Thread(target=publicar, args=(ring, frames, publicados), daemon=True)
+    productor.start()
+    while productor.is_alive() or not espectador.cola.empty():
+        try:
+            await asyncio.wait_for(espectador.cola.get(), timeout=0.2)
+        except asyncio.TimeoutError:
+            continue
+        seq = difusor.ultimo[0]
+        latencias.append(time.perf_counter() - publicados.get(seq, time.perf_counter()))
+    cpu = time.process_time()
+    await asyncio.sleep(QUIETO_S)
+    cpu = (time.process_time() - cpu) / QUIETO_S * 100
+    difusor.desuscribir(espectador)
+    return latencias, cpu
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'modo':>9} {'p50 ms':>7} {'p99 ms':>7} {'CPU quieto %':>13}")
+    for nombre, medir in (("consulta", con_consulta), ("aviso", con_aviso)):
+        ring = AnilloFrames(slots=4, max_alto=360, max_ancho=640)
+        latencias, cpu = asyncio.run(medir(ring, frames))
+        latencias.sort()
+        p50 = latencias[len(latencias) // 2] * 1000
+        p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000
+        print(f"{nombre:>9} {p50:>7.1f} {p99:>7.1f} {cpu:>13.2f}")
+        ring.liberar()
+
+
+if __name__ == "__main__":
+    main()
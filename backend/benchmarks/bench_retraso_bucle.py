@@ -0,0 +1,117 @@
+# bench_retraso_bucle.py
+"""
+Retraso del bucle de asyncio de FastAPI con varios streams 1080p a 30 FPS:
+
+- en el bucle: cv2.imencode se ejecuta dentro del bucle (esquema anterior).
+- ejecutor:    DifusorStream codifica en un ThreadPoolExecutor acotado.
+
+El retraso se mide como en producción (metrics.medir_retraso_bucle); es lo que espera
+cualquier otro WebSocket, incluido /ws/events. También se compara el tamaño de cada JPEG
+con la calidad por defecto de OpenCV (95) y la configurada.
+
+Uso (desde backend/):  python benchmarks/bench_retraso_bucle.py [streams] [segundos] [calidad]
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+import metrics  # noqa: E402
+from frame_bus import AnilloFrames  # noqa: E402
+from stream_hub import DifusorStream  # noqa: E402
+
+VIDEO = os.path.join(os.path.dirname(__file__), "..", "videos", "video_face.mp4")
+FPS = 30
+
+
+class EjecutorEnLinea(Executor):
+    """
+    Ejecuta la tarea en el mismo hilo que la envía: reproduce la codificación dentro del bucle.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        futuro = Future()
+        futuro.set_result(fn(*args, **kwargs))
+        return futuro
+
+
+def leer_frames(maximo=60):
+    cap = cv2.VideoCapture(VIDEO)
+    frames = []
+    while len(frames) < maximo:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (1920, 1080)))
+    cap.release()
+    return frames
+
+
+def publicar(ring, frames, detener):
+    i = 0
+    while not detener.is_set():
+        ring.escribir(frames[i % len(frames)])
+        i += 1
+        time.sleep(1 / FPS)
+
+
+async def medir(rings, ejecutor, calidad, segundos):
+    difusores = [DifusorStream(ring, f"s{i}", calidad=calidad, ejecutor=ejecutor) for i, ring in enumerate(rings)]
+    espectadores = [difusor.suscribir() for difusor in difusores]
+
+    async def consumir(espectador):
+        while True:
+            await espectador.cola.get()
+
+    consumidores = [asyncio.ensure_future(consumir(espectador)) for espectador in espectadores]
+    sonda = asyncio.ensure_future(metrics.medir_retraso_bucle(intervalo=0.01, ventana=10_000))
+    muestras = []
+    limite = time.time() + segundos
+    while time.time() < limite:
+        await asyncio.sleep(0.1)
+        muestras.append(metrics.instantanea().get("bucle.retraso_ms", 0.0))
+    maximo = metrics.instantanea().get("bucle.retraso_max_ms", 0.0)
+    for tarea in consumidores + [sonda]:
+        tarea.cancel()
+    for difusor, espectador in zip(difusores, espectadores):
+        difusor.desuscribir(espectador)
+    codificados = sum(difusor.codificados for difusor in difusores) / segundos
+    muestras.sort()
+    return muestras[len(muestras) // 2], maximo, codificados
+
+
+def main():
+    streams = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    calidad = int(sys.argv[3]) if len(sys.argv) > 3 else 80
+
+    frames = leer_frames()
+    for q in (95, calidad):
+        tamano = sum(len(cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, q])[1]) for f in frames) / len(frames)
+        print(f"JPEG 1080p calidad {q}: {tamano / 1024:.0f} KiB por frame")
+
+    rings = [AnilloFrames(slots=4, max_alto=1080, max_ancho=1920) for _ in range(streams)]
+    detener = threading.Event()
+    for ring in rings:
+        threading.Thread(target=publicar, args=(ring, frames, detener), daemon=True).start()
+
+    print(f"{streams} streams 1080p a {FPS} FPS, {os.cpu_count()} CPU")
+    print(f"{'modo':>11} {'retraso p50 ms':>15} {'máx ms':>8} {'JPEG/s':>8}")
+    try:
+        for nombre, ejecutor in (("en el bucle", EjecutorEnLinea()), ("ejecutor", ThreadPoolExecutor(2))):
+            p50, maximo, codificados = asyncio.run(medir(rings, ejecutor, calidad, segundos))
+            print(f"{nombre:>11} {p50:>15.1f} {maximo:>8.1f} {codificados:>8.1f}")
+            ejecutor.shutdown(wait=True)
+    finally:
+        detener.set()
+        time.sleep(0.2)
+        for ring in rings:
+            ring.liberar()
+
+
+if __name__ == "__main__":
+    main()
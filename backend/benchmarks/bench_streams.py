@@ -0,0 +1,139 @@
+# bench_streams.py
+"""
+Codificaciones JPEG por segundo y CPU del servidor al agregar visores a un mismo stream:
+
+- antes:   cada WebSocket lee el anillo y codifica su propia copia del frame.
+- difusor: DifusorStream codifica cada frame una vez y envía los mismos bytes a todos.
+
+Un hilo publica en un AnilloFrames los frames de videos/video_face.mp4 a 30 FPS, como lo
+haría un proceso de detección. Los visores son clientes WebSocket que solo reciben (corren en
+el mismo proceso, así que la CPU medida incluye su costo).
+
+Uso (desde backend/):  python benchmarks/bench_streams.py [segundos] [visores,...]
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+import cv2
+import uvicorn
+import websockets
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from frame_bus import AnilloFrames  # noqa: E402
+from stream_hub import DifusorStream  # noqa: E402
+
+PUERTO = 8766
+FPS = 30
+VIDEO = os.path.join(os.path.dirname(__file__), "..", "videos", "video_face.mp4")
+
+
+def crear_app(ring, difusor, contador):
+    app = FastAPI()
+
+    @app.websocket("/antes")
+    async def antes(websocket: WebSocket):
+        # Réplica de transmitir_stream anterior
+        await websocket.accept()
+        ultimo_seq = 0
+        try:
+            while True:
+                ultimo_seq, frame = ring.leer_ultimo(ultimo_seq, copiar=False)
+                if frame is not None:
+                    ok, buffer = cv2.imencode(".jpg", frame)
+                    contador["antes"] += 1
+                    if ok and ring.vigente(ultimo_seq):
+                        await websocket.send_bytes(buffer.tobytes())
+                await asyncio.sleep(0.03)
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            pass
+
+    @app.websocket("/difusor")
+    async def con_difusor(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            await difusor.atender(websocket)
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            pass
+
+    return app
+
+
+def leer_frames(maximo=150):
+    cap = cv2.VideoCapture(VIDEO)
+    frames = []
+    while len(frames) < maximo:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def publicar(ring, frames, detener):
+    i = 0
+    while not detener.is_set():
+        ring.escribir(frames[i % len(frames)])
+        i += 1
+        time.sleep(1 / FPS)
+
+
+async def visor(ruta, limite, recibidos):
+    async with websockets.connect(f"ws://127.0.0.1:{PUERTO}{ruta}", max_size=None) as ws:
+        while time.time() < limite:
+            try:
+                await asyncio.wait_for(ws.recv(), timeout=max(0.01, limite - time.time()))
+            except asyncio.TimeoutError:
+                break
+            recibidos.append(1)
+
+
+async def medir(ruta, visores, segundos):
+    recibidos = []
+    limite = time.time() + segundos
+    await asyncio.gather(*(visor(ruta, limite, recibidos) for _ in range(visores)))
+    return len(recibidos) / segundos / visores
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    lista_visores = [int(n) for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1, 4, 8, 16]
+
+    frames = leer_frames()
+    alto, ancho = frames[0].shape[:2]
+    print(f"{len(frames)} frames {ancho}x{alto} de {VIDEO}, {os.cpu_count()} CPU")
+    ring = AnilloFrames(slots=4, max_alto=alto, max_ancho=ancho)
+    detener = threading.Event()
+    threading.Thread(target=publicar, args=(ring, frames, detener), daemon=True).start()
+
+    difusor = DifusorStream(ring, "bench")
+    contador = {"antes": 0}
+    servidor = uvicorn.Server(uvicorn.Config(crear_app(ring, difusor, contador), port=PUERTO, log_level="warning"))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+
+    print(f"{'ruta':>8} {'visores':>8} {'JPEG/s':>8} {'FPS por visor':>14} {'CPU %':>7}")
+    try:
+        for ruta in ("antes", "difusor"):
+            for visores in lista_visores:
+                codificados = contador["antes"] if ruta == "antes" else difusor.codificados
+                cpu = time.process_time()
+                inicio = time.time()
+                fps = asyncio.run(medir(f"/{ruta}", visores, segundos))
+                duracion = time.time() - inicio
+                cpu = (time.process_time() - cpu) / duracion * 100
+                codificados = (contador["antes"] if ruta == "antes" else difusor.codificados) - codificados
+                print(f"{ruta:>8} {visores:>8} {codificados / duracion:>8.1f} {fps:>14.1f} {cpu:>7.0f}")
+    finally:
+        servidor.should_exit = True
+        detener.set()
+        time.sleep(0.2)
+        ring.liberar()
+
+
+if __name__ == "__main__":
+    main()
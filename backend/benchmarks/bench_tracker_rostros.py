@@ -0,0 +1,85 @@
+# bench_tracker_rostros.py
+"""
+FPS del pipeline de rostros sobre videos/video_face.mp4 con los dos modos de DeepSORT:
+
+- embedder:  DeepSort(embedder_gpu=True), que recorta cada rostro y ejecuta su propia CNN
+             (MobileNet) para el descriptor de apariencia (configuración anterior).
+- arcface:   DeepSort(embedder=None) recibiendo por 'embeds=' el embedding que InsightFace
+             ya calculó para cada rostro (configuración actual).
+
+En ambos casos InsightFace detecta y calcula embeddings en cada frame, así que la diferencia
+es el costo del segundo modelo.
+
+Uso (desde backend/):  python benchmarks/bench_tracker_rostros.py [frames]
+"""
+import os
+import sys
+import time
+import cv2
+from insightface.app import FaceAnalysis
+from deep_sort_realtime.deepsort_tracker import DeepSort
+
+VIDEO = os.path.join(os.path.dirname(__file__), "..", "videos", "video_face.mp4")
+
+
+def leer_frames(maximo):
+    cap = cv2.VideoCapture(VIDEO)
+    frames = []
+    while len(frames) < maximo:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def ejecutar(frames, faces_por_frame, tracker, usar_embeds):
+    inicio = time.perf_counter()
+    tiempo_tracker = 0.0
+    for frame, faces in zip(frames, faces_por_frame(frames)):
+        detecciones = []
+        for face in faces:
+            x1, y1, x2, y2 = map(int, face.bbox)
+            detecciones.append(([max(0, x1), max(0, y1), max(0, x2 - x1), max(0, y2 - y1)], 1.0, "rostro"))
+        inicio_tracker = time.perf_counter()
+        if usar_embeds:
+            tracker.update_tracks(detecciones, embeds=[face.normed_embedding for face in faces])
+        else:
+            tracker.update_tracks(detecciones, frame=frame)
+        tiempo_tracker += time.perf_counter() - inicio_tracker
+    total = time.perf_counter() - inicio
+    return len(frames) / total, tiempo_tracker / len(frames) * 1000
+
+
+def main():
+    maximo = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    frames = leer_frames(maximo)
+    print(f"{len(frames)} frames de {VIDEO}")
+
+    app = FaceAnalysis(providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
+    app.prepare(ctx_id=0, det_size=(640, 640))
+
+    def faces_por_frame(frames):
+        for frame in frames:
+            yield app.get(frame)
+
+    # Calentamiento de los modelos
+    for frame in frames[:5]:
+        app.get(frame)
+
+    modos = [
+        ("embedder", DeepSort(max_age=5, nn_budget=100, embedder_gpu=True), False),
+        ("arcface", DeepSort(max_age=5, nn_budget=100, embedder=None), True),
+    ]
+    resultados = {}
+    print(f"{'modo':>9} {'FPS':>7} {'tracker ms/frame':>17}")
+    for nombre, tracker, usar_embeds in modos:
+        fps, ms_tracker = ejecutar(frames, faces_por_frame, tracker, usar_embeds)
+        resultados[nombre] = fps
+        print(f"{nombre:>9} {fps:>7.2f} {ms_tracker:>17.2f}")
+    print(f"Aceleración: {resultados['arcface'] / resultados['embedder']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# conftest.py
+"""
+Permite importar los módulos de backend/app (p. ej. 'from app.event_debounce import ...') sin
+ejecutar app/__init__.py, que crea la aplicación Flask y carga los modelos de InsightFace.
+"""
+import os
+import sys
+import types
+
+_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+if "app" not in sys.modules:
+    paquete = types.ModuleType("app")
+    paquete.__path__ = [_APP]
+    sys.modules["app"] = paquete
@@ -0,0 +1,91 @@
+# test_analyzer_scheduler.py
+import time
+import pytest
+from app.analyzer_scheduler import PlanificadorAnalizadores
+
+FPS_CAPTURA = 30.0
+ANALIZADORES = {
+    "objetos": {"fps_objetivo": None, "prioridad": 3},
+    "rostros": {"fps_objetivo": 10, "prioridad": 2},
+    "poses": {"fps_objetivo": 10, "prioridad": 1},
+}
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: ahora[0])
+    return ahora
+
+
+def simular(reloj, planificador, duraciones, segundos, habilitado=lambda t: True):
+    """
+    Modo concurrente: cada analizador tiene su hilo, que toma el frame más reciente cuando
+    termina su inferencia anterior. Devuelve las inferencias por segundo de cada analizador.
+    """
+    inicio = reloj[0]
+    libre = {tipo: inicio for tipo in duraciones}
+    en_curso = []  # (fin, tipo)
+    inferencias = {tipo: 0 for tipo in duraciones}
+    for i in range(int(segundos * FPS_CAPTURA)):
+        t = inicio + i / FPS_CAPTURA
+        for fin, tipo in sorted(en_curso):
+            if fin <= t:
+                reloj[0] = fin
+                planificador.registrar(tipo, duraciones[tipo])
+                en_curso.remove((fin, tipo))
+        reloj[0] = t
+        for tipo, duracion in duraciones.items():
+            if libre[tipo] > t:
+                continue  # Ocupado: no ve este frame
+            if planificador.permitir(tipo, habilitado(t - inicio)):
+                inferencias[tipo] += 1
+                libre[tipo] = t + duracion
+                en_curso.append((t + duracion, tipo))
+    return {tipo: n / segundos for tipo, n in inferencias.items()}
+
+
+def crear(reloj):
+    return PlanificadorAnalizadores("cam", ANALIZADORES, fps_captura=lambda: FPS_CAPTURA)
+
+
+def strides(planificador):
+    return {tipo: e["stride"] for tipo, e in planificador._estado.items()}
+
+
+def test_analizador_sin_objetivo_lento_no_sacrifica_a_los_demas(reloj):
+    # YOLO en CPU: objetos nunca llega a 30 FPS, pero los otros núcleos están libres
+    planificador = crear(reloj)
+    tasas = simular(reloj, planificador, {"objetos": 0.06, "rostros": 0.03, "poses": 0.03}, 30)
+    assert strides(planificador) == {"objetos": 1, "rostros": 1, "poses": 1}
+    assert tasas["rostros"] == pytest.approx(10, abs=0.5)
+    assert tasas["poses"] == pytest.approx(10, abs=0.5)
+    assert tasas["objetos"] > 10
+
+
+def test_objetivo_de_fps_no_se_redondea_a_la_tasa_de_captura(reloj):
+    planificador = crear(reloj)
+    tasas = simular(reloj, planificador, {"rostros": 0.01, "poses": 0.01}, 10)
+    assert tasas["poses"] == pytest.approx(10, abs=0.2)
+
+
+def test_analizador_que_no_alcanza_su_objetivo_sacrifica_al_de_menor_prioridad(reloj):
+    planificador = crear(reloj)
+    simular(reloj, planificador, {"objetos": 0.06, "rostros": 0.2, "poses": 0.03}, 10)
+    assert strides(planificador)["poses"] > 1
+    assert strides(planificador)["rostros"] == 1
+
+
+def test_escena_quieta_no_cuenta_como_saturacion(reloj):
+    # El filtro de movimiento habilita un frame cada 2 s
+    planificador = crear(reloj)
+    simular(reloj, planificador, {"objetos": 0.06, "rostros": 0.03, "poses": 0.03}, 30,
+            habilitado=lambda t: t % 2.0 < 1 / FPS_CAPTURA)
+    assert strides(planificador) == {"objetos": 1, "rostros": 1, "poses": 1}
+
+
+def test_devuelve_el_stride_cuando_sobra_margen(reloj):
+    planificador = crear(reloj)
+    planificador._estado["poses"]["stride"] = 8
+    simular(reloj, planificador, {"objetos": 0.06, "rostros": 0.03, "poses": 0.03}, 30)
+    assert strides(planificador)["poses"] == 1
@@ -0,0 +1,73 @@
+# test_capture.py
+import time
+import numpy as np
+from app.capture import CapturaCamara
+
+
+class FuenteFalsa:
+    """
+    Imita un cv2.VideoCapture en vivo: entrega 'frames' frames y luego falla para siempre.
+    """
+
+    def __init__(self, frames, abierta=True):
+        self.frames = frames
+        self.abierta = abierta
+        self.liberada = False
+
+    def read(self):
+        if self.liberada or self.frames <= 0:
+            return False, None
+        self.frames -= 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return self.abierta and not self.liberada
+
+    def release(self):
+        self.liberada = True
+
+    def set(self, propiedad, valor):
+        return True
+
+    def get(self, propiedad):
+        return 0.0
+
+
+def test_fuente_caida_se_reabre_con_espera_creciente(capsys):
+    # La fuente deja de entregar frames; los dos primeros intentos de reabrirla fallan
+    fuentes = [FuenteFalsa(0, abierta=False), FuenteFalsa(0, abierta=False), FuenteFalsa(5)]
+    abiertas = []
+
+    def reabrir():
+        abiertas.append(fuentes[len(abiertas)])
+        return abiertas[-1]
+
+    inicial = FuenteFalsa(3)
+    captura = CapturaCamara(inicial, nombre="cam_test", reabrir=reabrir, reintento_min=0.01, reintento_max=0.03)
+    captura.start()
+    limite = time.time() + 2.0
+    while captura.capturados < 8 and time.time() < limite:
+        time.sleep(0.005)
+    captura.detener()
+    captura.join(timeout=1.0)
+
+    assert captura.capturados == 8  # 3 frames antes de caer y 5 después de reabrir
+    assert inicial.liberada
+    assert abiertas[:3] == fuentes
+    assert all(f.liberada for f in fuentes[:2])
+    assert captura.reconexiones == 1
+    # Un aviso por intento (no uno cada 100 ms mientras la fuente está caída)
+    avisos = capsys.readouterr().out.count("[WARNING] No se pudo leer el frame (cam_test)")
+    assert avisos <= 4
+    assert captura.reintento_min <= captura._espera <= captura.reintento_max
+
+
+def test_sin_reabrir_solo_espera():
+    fuente = FuenteFalsa(0)
+    captura = CapturaCamara(fuente, nombre="cam_test", reintento_min=0.01, reintento_max=0.02)
+    captura.start()
+    captura.esperar(0, timeout=0.1)
+    captura.detener()
+    captura.join(timeout=1.0)
+    assert not fuente.liberada
+    assert captura._espera == 0.02
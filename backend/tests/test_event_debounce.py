@@ -0,0 +1,55 @@
+# test_event_debounce.py
+from app.event_debounce import FiltroEventos
+
+
+def primer_evento(filtro, instantes, etiqueta="person", tipo="poses"):
+    """
+    Registra la etiqueta en cada instante y devuelve el primero en que se guardó el evento.
+    """
+    for now in instantes:
+        if filtro.registrar(etiqueta, tipo, now):
+            return now
+    return None
+
+
+def test_tasa_completa_confirma_tras_tiempo_min():
+    filtro = FiltroEventos(tiempo_min_deteccion=2.0)
+    instantes = [1000.0 + i / 30 for i in range(30 * 10)]
+    assert abs(primer_evento(filtro, instantes) - 1002.0) < 0.05
+
+
+def test_escena_quieta_confirma_igual_de_rapido():
+    # Filtro de movimiento: sin movimiento el analizador infiere una vez cada ~2 s
+    filtro = FiltroEventos(tiempo_min_deteccion=2.0, tiempo_maximo_sin_detectar=3)
+    instantes = [1000.0 + 2.13 * i for i in range(60)]
+    assert primer_evento(filtro, instantes) == instantes[1]
+
+
+def test_analizador_con_stride_confirma_igual_de_rapido():
+    # Planificador con stride 8 sobre una cámara de 30 FPS
+    filtro = FiltroEventos(tiempo_min_deteccion=2.0)
+    instantes = [1000.0 + 8 * i / 30 for i in range(100)]
+    assert primer_evento(filtro, instantes) - 1000.0 < 2.3
+
+
+def test_detecciones_aisladas_no_generan_evento():
+    filtro = FiltroEventos(tiempo_min_deteccion=2.0, tiempo_maximo_sin_detectar=3)
+    instantes = [1000.0 + 3.5 * i for i in range(20)]
+    assert primer_evento(filtro, instantes) is None
+
+
+def test_cambio_de_tipo_reinicia_la_racha():
+    filtro = FiltroEventos(tiempo_min_deteccion=2.0)
+    assert not filtro.registrar("person", "poses", 1000.0)
+    assert not filtro.registrar("person", "objetos", 1001.5)
+    assert not filtro.registrar("person", "poses", 1002.5)
+    assert not filtro.registrar("person", "poses", 1004.0)
+    assert filtro.registrar("person", "poses", 1004.6)
+
+
+def test_no_repite_antes_del_tiempo_de_persistencia():
+    filtro = FiltroEventos(tiempo_persistencia=5, tiempo_min_deteccion=2.0)
+    instantes = [1000.0 + i / 10 for i in range(200)]
+    guardados = [now for now in instantes if filtro.registrar("knife", "objetos", now)]
+    assert len(guardados) >= 2
+    assert all(b - a > 5 for a, b in zip(guardados, guardados[1:]))
@@ -0,0 +1,58 @@
+# test_stream_hub.py
+from app import config
+from app.stream_hub import EscaleraStream, Espectador
+
+
+def variante(escalera, preferencias, bajadas=0):
+    indice = min(escalera.elegir(preferencias) + bajadas, len(escalera.peldanos) - 1)
+    return escalera.variante(indice, escalera.limites(preferencias))
+
+
+def test_pantalla_chica_no_baja_calidad_ni_fps():
+    escalera = EscaleraStream(None, "cam", config.STREAM_ESCALERA)
+    # Antes: peldaño 320/5 FPS/calidad 50
+    assert variante(escalera, {"ancho": 300}) == (320, None, config.STREAM_CALIDAD_JPEG)
+    assert variante(escalera, {"ancho": 1000}) == (1280, None, config.STREAM_CALIDAD_JPEG)
+
+
+def test_pocos_fps_no_reducen_ancho():
+    escalera = EscaleraStream(None, "cam", config.STREAM_ESCALERA)
+    # Antes: peldaño 640/10 FPS/calidad 60
+    assert variante(escalera, {"fps": 8}) == (None, 10, config.STREAM_CALIDAD_JPEG)
+
+
+def test_calidad_elige_peldano():
+    escalera = EscaleraStream(None, "cam", config.STREAM_ESCALERA)
+    assert escalera.elegir({}) == 0
+    assert escalera.elegir({"calidad": 70}) == 1  # Se redondea hacia arriba a 75
+    assert escalera.elegir({"calidad": 10}) == len(config.STREAM_ESCALERA) - 1
+
+
+def test_congestion_baja_peldanos_sin_pasar_los_topes():
+    escalera = EscaleraStream(None, "cam", config.STREAM_ESCALERA)
+    preferencias = {"ancho": 300}
+    variantes = [variante(escalera, preferencias, bajadas) for bajadas in range(len(config.STREAM_ESCALERA))]
+    assert [v[0] for v in variantes] == [320] * len(config.STREAM_ESCALERA)
+    assert [v[2] for v in variantes] == [p["calidad"] for p in config.STREAM_ESCALERA]
+    assert variantes[-1][1] == 5
+
+
+def test_clientes_con_los_mismos_topes_comparten_difusor():
+    escalera = EscaleraStream(None, "cam", config.STREAM_ESCALERA)
+    a = escalera.difusor(0, escalera.limites({"ancho": 300}))
+    b = escalera.difusor(0, escalera.limites({"ancho": 250}))
+    assert a is b
+    assert a.nombre == "cam.320px"
+    assert escalera.difusor(0).nombre == "cam"
+    assert escalera.difusor(0) is not a
+
+
+def test_despertar_no_cuenta_como_salto():
+    espectador = Espectador()
+    espectador.entregar(b"a")
+    espectador.despertar()  # Reemplaza un frame pendiente
+    espectador.despertar()
+    espectador.entregar(b"b")  # Reemplaza el aviso, no un frame
+    assert espectador.saltados == 0
+    espectador.entregar(b"c")
+    assert espectador.saltados == 1
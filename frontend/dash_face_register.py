@@ -255,9 +255,9 @@ html_content = """
         initWebSocket("faceCanvas", "ws://localhost:8000/ws/faces");
 
         // Inicializar WebSockets para miniaturas
-        initWebSocketThumb("poseThumbCanvas", "ws://localhost:8000/ws/poses");
-        initWebSocketThumb("objectThumbCanvas", "ws://localhost:8000/ws/objects");
-        initWebSocketThumb("faceThumbCanvas", "ws://localhost:8000/ws/faces");
+        initWebSocketThumb("poseThumbCanvas", "ws://localhost:8000/ws/poses/thumb");
+        initWebSocketThumb("objectThumbCanvas", "ws://localhost:8000/ws/objects/thumb");
+        initWebSocketThumb("faceThumbCanvas", "ws://localhost:8000/ws/faces/thumb");
 
         // ----- IDs de cámaras principales -----
         const cameras = ["poseContainer", "objectContainer", "faceContainer"];
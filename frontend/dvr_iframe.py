@@ -29,6 +29,16 @@ dvr_html_content = """
         .sidebar h2 {
             margin-bottom: 20px;
         }
+        .camera-select {
+            width: 100%;
+            padding: 8px;
+            margin-bottom: 20px;
+            background-color: #3A3A3A;
+            color: #fff;
+            border: 1px solid #555;
+            border-radius: 5px;
+            font-size: 15px;
+        }
         .controls {
             margin-bottom: 20px;
             display: flex;
@@ -137,6 +147,9 @@ dvr_html_content = """
     <div class="sidebar">
         <h2>Lista de Cámaras</h2>
 
+        <!-- Cámara seleccionada (se llena desde /cameras) -->
+        <select id="cameraSelect" class="camera-select"></select>
+
         <!-- Controles con flechas -->
         <div class="controls">
             <button id="prevCameraBtn">&#8592;</button>
@@ -150,17 +163,17 @@ dvr_html_content = """
             <div class="camera-item" onclick="showSingleCamera('poseContainer')">
                 <!-- Miniatura de la cámara de Poses -->
                 <canvas id="poseThumbCanvas" class="mini-thumb"></canvas>
-                <span>Cámara Poses</span>
+                <span>Poses</span>
             </div>
             <div class="camera-item" onclick="showSingleCamera('objectContainer')">
                 <!-- Miniatura de la cámara de Objetos -->
                 <canvas id="objectThumbCanvas" class="mini-thumb"></canvas>
-                <span>Cámara Objetos</span>
+                <span>Objetos</span>
             </div>
             <div class="camera-item" onclick="showSingleCamera('faceContainer')">
                 <!-- Miniatura de la cámara de Rostros -->
                 <canvas id="faceThumbCanvas" class="mini-thumb"></canvas>
-                <span>Cámara Rostros</span>
+                <span>Rostros</span>
             </div>
         </div>
     </div>
@@ -192,6 +205,7 @@ dvr_html_content = """
             const image = new Image();
 
             socket.binaryType = "arraybuffer";
+            socket.onopen = () => enviarPreferencias(socket);
             socket.onmessage = (event) => {
                 const blob = new Blob([event.data], { type: "image/jpeg" });
                 const url = URL.createObjectURL(blob);
@@ -209,6 +223,7 @@ dvr_html_content = """
             socket.onclose = () => {
                 console.log(`Conexión WebSocket cerrada (${websocketUrl})`);
             };
+            return socket;
         }
 
         // ----- WebSocket Initialization for thumbnails -----
@@ -238,17 +253,66 @@ dvr_html_content = """
             socket.onclose = () => {
                 console.log(`Conexión WebSocket cerrada (THUMB) (${websocketUrl})`);
             };
+            return socket;
+        }
+
+        // ----- Streams de la cámara seleccionada -----
+        const API_HOST = "localhost:8000";
+        const streams = [
+            { stream: "poses", canvas: "poseCanvas", thumb: "poseThumbCanvas" },
+            { stream: "objects", canvas: "objectCanvas", thumb: "objectThumbCanvas" },
+            { stream: "faces", canvas: "faceCanvas", thumb: "faceThumbCanvas" },
+        ];
+        let sockets = [];
+        let principales = [];
+
+        function conectarCamara(cameraId) {
+            // Cerrar los WebSockets de la cámara anterior
+            sockets.forEach((socket) => socket.close());
+            sockets = [];
+            principales = [];
+            streams.forEach((s) => {
+                const url = `ws://${API_HOST}/ws/${cameraId}/${s.stream}`;
+                const principal = initWebSocket(s.canvas, url);
+                principales.push(principal);
+                sockets.push(principal);
+                sockets.push(initWebSocketThumb(s.thumb, `${url}/thumb`));
+            });
         }
 
-        // Inicializar WebSockets para vistas principales
-        initWebSocket("poseCanvas", "ws://localhost:8000/ws/poses");
-        initWebSocket("objectCanvas", "ws://localhost:8000/ws/objects");
-        initWebSocket("faceCanvas", "ws://localhost:8000/ws/faces");
+        // ----- Calidad pedida al servidor -----
+        // El canvas nunca supera el ancho del iframe: no tiene sentido recibir frames más anchos
+        function enviarPreferencias(socket) {
+            if (socket.readyState === WebSocket.OPEN) {
+                socket.send(JSON.stringify({ ancho: Math.round(window.innerWidth * window.devicePixelRatio) }));
+            }
+        }
 
-        // Inicializar WebSockets para miniaturas
-        initWebSocketThumb("poseThumbCanvas", "ws://localhost:8000/ws/poses");
-        initWebSocketThumb("objectThumbCanvas", "ws://localhost:8000/ws/objects");
-        initWebSocketThumb("faceThumbCanvas", "ws://localhost:8000/ws/faces");
+        let esperaResize = null;
+        window.addEventListener("resize", () => {
+            clearTimeout(esperaResize);
+            esperaResize = setTimeout(() => principales.forEach(enviarPreferencias), 500);
+        });
+
+        const cameraSelect = document.getElementById("cameraSelect");
+        cameraSelect.addEventListener("change", () => conectarCamara(cameraSelect.value));
+
+        fetch(`http://${API_HOST}/cameras`)
+            .then((response) => response.json())
+            .then((camaras) => {
+                camaras.forEach((camara) => {
+                    const option = document.createElement("option");
+                    option.value = camara.id;
+                    option.textContent = camara.nombre;
+                    cameraSelect.appendChild(option);
+                });
+                if (camaras.length > 0) {
+                    conectarCamara(camaras[0].id);
+                }
+            })
+            .catch((error) => {
+                console.error("No se pudo obtener la lista de cámaras:", error);
+            });
 
         // ----- IDs de cámaras principales -----
         const cameras = ["poseContainer", "objectContainer", "faceContainer"];